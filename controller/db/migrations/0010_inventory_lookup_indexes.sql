@@ -0,0 +1,4 @@
+CREATE INDEX `hotels_workcell_name_idx` ON `hotels` (`workcell_id`,`name`);--> statement-breakpoint
+CREATE INDEX `nests_hotel_position_idx` ON `nests` (`hotel_id`,`row`,`column`);--> statement-breakpoint
+CREATE INDEX `nests_tool_idx` ON `nests` (`tool_id`);--> statement-breakpoint
+CREATE INDEX `plates_nest_idx` ON `plates` (`nest_id`);
\ No newline at end of file
@@ -0,0 +1,47 @@
+CREATE TABLE `inventory_changes` (
+	`seq` integer PRIMARY KEY AUTOINCREMENT NOT NULL,
+	`table_name` text NOT NULL,
+	`row_id` integer NOT NULL,
+	`op` text NOT NULL,
+	`changed_at` text DEFAULT (datetime('now')) NOT NULL
+);--> statement-breakpoint
+CREATE UNIQUE INDEX `inventory_changes_row_idx` ON `inventory_changes` (`table_name`,`row_id`);--> statement-breakpoint
+INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) SELECT 'hotels', `id`, 'upsert' FROM `hotels`;--> statement-breakpoint
+INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) SELECT 'nests', `id`, 'upsert' FROM `nests`;--> statement-breakpoint
+INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) SELECT 'plates', `id`, 'upsert' FROM `plates`;--> statement-breakpoint
+CREATE TRIGGER `hotels_changes_insert` AFTER INSERT ON `hotels` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'hotels' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('hotels', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `hotels_changes_update` AFTER UPDATE ON `hotels` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'hotels' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('hotels', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `hotels_changes_delete` AFTER DELETE ON `hotels` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'hotels' AND `row_id` = OLD.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('hotels', OLD.`id`, 'delete');
+END;--> statement-breakpoint
+CREATE TRIGGER `nests_changes_insert` AFTER INSERT ON `nests` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'nests' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('nests', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `nests_changes_update` AFTER UPDATE ON `nests` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'nests' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('nests', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `nests_changes_delete` AFTER DELETE ON `nests` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'nests' AND `row_id` = OLD.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('nests', OLD.`id`, 'delete');
+END;--> statement-breakpoint
+CREATE TRIGGER `plates_changes_insert` AFTER INSERT ON `plates` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'plates' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('plates', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `plates_changes_update` AFTER UPDATE ON `plates` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'plates' AND `row_id` = NEW.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('plates', NEW.`id`, 'upsert');
+END;--> statement-breakpoint
+CREATE TRIGGER `plates_changes_delete` AFTER DELETE ON `plates` BEGIN
+	DELETE FROM `inventory_changes` WHERE `table_name` = 'plates' AND `row_id` = OLD.`id`;
+	INSERT INTO `inventory_changes` (`table_name`, `row_id`, `op`) VALUES ('plates', OLD.`id`, 'delete');
+END;
\ No newline at end of file
@@ -0,0 +1,10 @@
+CREATE TABLE `idempotency_keys` (
+	`key` text PRIMARY KEY NOT NULL,
+	`endpoint` text NOT NULL,
+	`request_hash` text NOT NULL,
+	`status_code` integer,
+	`response` text,
+	`created_at` text DEFAULT (datetime('now')) NOT NULL
+);
+--> statement-breakpoint
+CREATE INDEX `idempotency_keys_created_at_idx` ON `idempotency_keys` (`created_at`);
\ No newline at end of file
@@ -1,7 +1,15 @@
 // schema.ts - Replace your current schema with this
 // Key changes: Added onDelete: "cascade" to ALL foreign keys that should cascade
 
-import { sqliteTable, text, integer, real, unique, index } from "drizzle-orm/sqlite-core";
+import {
+  sqliteTable,
+  text,
+  integer,
+  real,
+  unique,
+  index,
+  uniqueIndex,
+} from "drizzle-orm/sqlite-core";
 import { sql, relations } from "drizzle-orm";
 
 export const timestamps = {
@@ -39,24 +47,35 @@ export const tools = sqliteTable(
   (t) => [unique("unique_tool_name_per_workcell").on(t.name, t.workcellId)],
 );
 
-export const hotels = sqliteTable("hotels", {
-  id: integer("id").primaryKey({ autoIncrement: true }),
-  name: text("name").notNull(),
-  rows: integer("rows").notNull(),
-  columns: integer("columns").notNull(),
-  workcellId: integer("workcell_id").references(() => workcells.id, { onDelete: "cascade" }),
-  ...timestamps,
-});
+export const hotels = sqliteTable(
+  "hotels",
+  {
+    id: integer("id").primaryKey({ autoIncrement: true }),
+    name: text("name").notNull(),
+    rows: integer("rows").notNull(),
+    columns: integer("columns").notNull(),
+    workcellId: integer("workcell_id").references(() => workcells.id, { onDelete: "cascade" }),
+    ...timestamps,
+  },
+  (t) => [index("hotels_workcell_name_idx").on(t.workcellId, t.name)],
+);
 
-export const nests = sqliteTable("nests", {
-  id: integer("id").primaryKey({ autoIncrement: true }),
-  name: text("name"),
-  row: integer("row").notNull(),
-  column: integer("column").notNull(),
-  toolId: integer("tool_id").references(() => tools.id, { onDelete: "cascade" }),
-  hotelId: integer("hotel_id").references(() => hotels.id, { onDelete: "cascade" }),
-  ...timestamps,
-});
+export const nests = sqliteTable(
+  "nests",
+  {
+    id: integer("id").primaryKey({ autoIncrement: true }),
+    name: text("name"),
+    row: integer("row").notNull(),
+    column: integer("column").notNull(),
+    toolId: integer("tool_id").references(() => tools.id, { onDelete: "cascade" }),
+    hotelId: integer("hotel_id").references(() => hotels.id, { onDelete: "cascade" }),
+    ...timestamps,
+  },
+  (t) => [
+    index("nests_hotel_position_idx").on(t.hotelId, t.row, t.column),
+    index("nests_tool_idx").on(t.toolId),
+  ],
+);
 
 export const plates = sqliteTable(
   "plates",
@@ -72,9 +91,43 @@ export const plates = sqliteTable(
   (t) => [
     unique("unique_plate_name_per_workcell").on(t.name, t.workcellId),
     unique("unique_plate_barcode_per_workcell").on(t.barcode, t.workcellId),
+    index("plates_nest_idx").on(t.nestId),
   ],
 );
 
+// Change log for hotels, nests and plates, written by SQLite triggers (see migration 0011).
+// Each row keeps only its latest change, so `seq` is a high-water mark for delta syncs.
+export const inventoryChanges = sqliteTable(
+  "inventory_changes",
+  {
+    seq: integer("seq").primaryKey({ autoIncrement: true }),
+    tableName: text("table_name", { enum: ["hotels", "nests", "plates"] }).notNull(),
+    rowId: integer("row_id").notNull(),
+    op: text("op", { enum: ["upsert", "delete"] }).notNull(),
+    changedAt: text("changed_at")
+      .notNull()
+      .default(sql`(datetime('now'))`),
+  },
+  (t) => [uniqueIndex("inventory_changes_row_idx").on(t.tableName, t.rowId)],
+);
+
+// Results of create requests sent with an Idempotency-Key header, replayed when the
+// same key is sent again. `statusCode` stays null while the first request runs.
+export const idempotencyKeys = sqliteTable(
+  "idempotency_keys",
+  {
+    key: text("key").primaryKey(),
+    endpoint: text("endpoint").notNull(),
+    requestHash: text("request_hash").notNull(),
+    statusCode: integer("status_code"),
+    response: text("response", { mode: "json" }),
+    createdAt: text("created_at")
+      .notNull()
+      .default(sql`(datetime('now'))`),
+  },
+  (t) => [index("idempotency_keys_created_at_idx").on(t.createdAt)],
+);
+
 export const wells = sqliteTable("wells", {
   id: integer("id").primaryKey({ autoIncrement: true }),
   row: text("row").notNull(),
@@ -366,6 +419,8 @@ export const schema = {
   hotels,
   nests,
   plates,
+  inventoryChanges,
+  idempotencyKeys,
   wells,
   reagents,
   plateNestHistory,
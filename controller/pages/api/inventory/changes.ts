@@ -0,0 +1,68 @@
+import { NextApiRequest, NextApiResponse } from "next";
+import { appRouter } from "@/server/routers/_app";
+import { createContext } from "@/server/trpc";
+
+// Longest a request may wait for a change, and how often the change log is checked
+const MAX_WAIT_SECONDS = 30;
+const POLL_INTERVAL_MS = 250;
+
+// Delta feed of hotels, nests and plates for clients that keep a local copy.
+// GET /api/inventory/changes?since=<seq> returns what changed after `seq`.
+// With &wait=<seconds> it is a long poll: when nothing changed after `seq` the
+// response is held until something does or the wait runs out, so a client can
+// follow the feed by passing the returned seq back in, one request per change.
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  const ctx = createContext();
+  const caller = appRouter.createCaller(ctx);
+
+  try {
+    if (req.method === "GET") {
+      const { since, wait } = req.query;
+      const sinceSeq = since ? parseInt(since as string) : 0;
+      if (Number.isNaN(sinceSeq)) {
+        return res.status(400).json({ error: "since must be a sequence number" });
+      }
+      const waitSeconds = wait ? parseFloat(wait as string) : 0;
+      if (Number.isNaN(waitSeconds) || waitSeconds < 0) {
+        return res.status(400).json({ error: "wait must be a number of seconds" });
+      }
+
+      if (sinceSeq > 0 && waitSeconds > 0) {
+        const deadline = Date.now() + Math.min(waitSeconds, MAX_WAIT_SECONDS) * 1000;
+        // The client may give up (or time out) before the wait runs out
+        let closed = false;
+        res.on("close", () => {
+          closed = true;
+        });
+        while (
+          !closed &&
+          Date.now() < deadline &&
+          (await caller.inventory.getChangeSeq()).seq === sinceSeq
+        ) {
+          await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS));
+        }
+        if (closed) {
+          return;
+        }
+      }
+
+      const changes = await caller.inventory.getChanges({ since: sinceSeq });
+      return res.status(200).json(changes);
+    }
+
+    return res.status(405).json({ error: "Method not allowed" });
+  } catch (error: any) {
+    console.error("Inventory changes API error:", error);
+    const statusCode =
+      error.code === "NOT_FOUND"
+        ? 404
+        : error.code === "CONFLICT"
+          ? 409
+          : error.code === "BAD_REQUEST"
+            ? 400
+            : 500;
+    return res.status(statusCode).json({
+      error: error.message || "Internal server error",
+    });
+  }
+}
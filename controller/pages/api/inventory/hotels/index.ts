@@ -0,0 +1,45 @@
+import { NextApiRequest, NextApiResponse } from "next";
+import { appRouter } from "@/server/routers/_app";
+import { createContext } from "@/server/trpc";
+import { parseFields } from "@/server/utils/fields";
+import { withIdempotency } from "@/server/utils/idempotency";
+
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  const ctx = createContext();
+  const caller = appRouter.createCaller(ctx);
+
+  try {
+    if (req.method === "GET") {
+      const { workcellName, name, fields } = req.query;
+
+      const hotels = await caller.inventory.findHotels({
+        workcellName: workcellName ? (workcellName as string) : undefined,
+        name: name ? (name as string) : undefined,
+        fields: parseFields(fields),
+      });
+
+      return res.status(200).json(hotels);
+    }
+
+    if (req.method === "POST") {
+      return await withIdempotency(req, res, "inventory.createHotel", () =>
+        caller.inventory.createHotel(req.body),
+      );
+    }
+
+    return res.status(405).json({ error: "Method not allowed" });
+  } catch (error: any) {
+    console.error("Hotel API error:", error);
+    const statusCode =
+      error.code === "NOT_FOUND"
+        ? 404
+        : error.code === "CONFLICT"
+          ? 409
+          : error.code === "BAD_REQUEST"
+            ? 400
+            : 500;
+    return res.status(statusCode).json({
+      error: error.message || "Internal server error",
+    });
+  }
+}
@@ -1,6 +1,8 @@
 import { NextApiRequest, NextApiResponse } from "next";
 import { appRouter } from "@/server/routers/_app";
 import { createContext } from "@/server/trpc";
+import { parseFields } from "@/server/utils/fields";
+import { withIdempotency } from "@/server/utils/idempotency";
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const ctx = createContext();
@@ -8,13 +10,23 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   try {
     if (req.method === "GET") {
-      const nests = await caller.inventory.getNests();
+      const { name, hotelId, toolId, row, column, fields } = req.query;
+
+      const nests = await caller.inventory.findNests({
+        name: name ? (name as string) : undefined,
+        hotelId: hotelId ? parseInt(hotelId as string) : undefined,
+        toolId: toolId ? parseInt(toolId as string) : undefined,
+        row: row ? parseInt(row as string) : undefined,
+        column: column ? parseInt(column as string) : undefined,
+        fields: parseFields(fields),
+      });
       return res.status(200).json(nests);
     }
 
     if (req.method === "POST") {
-      const result = await caller.inventory.createNest(req.body);
-      return res.status(201).json(result);
+      return await withIdempotency(req, res, "inventory.createNest", () =>
+        caller.inventory.createNest(req.body),
+      );
     }
 
     return res.status(405).json({ error: "Method not allowed" });
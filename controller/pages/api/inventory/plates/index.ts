@@ -1,6 +1,8 @@
 import { NextApiRequest, NextApiResponse } from "next";
 import { appRouter } from "@/server/routers/_app";
 import { createContext } from "@/server/trpc";
+import { parseFields } from "@/server/utils/fields";
+import { withIdempotency } from "@/server/utils/idempotency";
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const ctx = createContext();
@@ -8,31 +10,25 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   try {
     if (req.method === "GET") {
-      const { workcellName, toolId, nestId } = req.query;
-
-      let plates = await caller.inventory.getPlates(
-        workcellName ? (workcellName as string) : undefined,
-      );
-
-      // Filter by toolId if provided
-      if (toolId) {
-        const nests = await caller.inventory.getNests();
-        const toolNests = nests.filter((n) => n.toolId === parseInt(toolId as string));
-        const nestIds = toolNests.map((n) => n.id);
-        plates = plates.filter((p) => p.nestId && nestIds.includes(p.nestId));
-      }
-
-      // Filter by nestId if provided
-      if (nestId) {
-        plates = plates.filter((p) => p.nestId === parseInt(nestId as string));
-      }
+      const { workcellName, name, barcode, nestId, toolId, hotelId, fields } = req.query;
+
+      const plates = await caller.inventory.findPlates({
+        workcellName: workcellName ? (workcellName as string) : undefined,
+        name: name ? (name as string) : undefined,
+        barcode: barcode ? (barcode as string) : undefined,
+        nestId: nestId ? parseInt(nestId as string) : undefined,
+        toolId: toolId ? parseInt(toolId as string) : undefined,
+        hotelId: hotelId ? parseInt(hotelId as string) : undefined,
+        fields: parseFields(fields),
+      });
 
       return res.status(200).json(plates);
     }
 
     if (req.method === "POST") {
-      const result = await caller.inventory.createPlate(req.body);
-      return res.status(201).json(result);
+      return await withIdempotency(req, res, "inventory.createPlate", () =>
+        caller.inventory.createPlate(req.body),
+      );
     }
 
     return res.status(405).json({ error: "Method not allowed" });
@@ -0,0 +1,32 @@
+import { NextApiRequest, NextApiResponse } from "next";
+import { appRouter } from "@/server/routers/_app";
+import { createContext } from "@/server/trpc";
+
+// POST /api/robot-arm/locations/bulk inserts many locations of one tool at once.
+// Per-item results report locations that were skipped as duplicates or invalid.
+export default async function handler(req: NextApiRequest, res: NextApiResponse) {
+  const ctx = createContext();
+  const caller = appRouter.createCaller(ctx);
+
+  try {
+    if (req.method === "POST") {
+      const result = await caller.robotArm.location.bulkCreate(req.body);
+      return res.status(200).json(result);
+    }
+
+    return res.status(405).json({ error: "Method not allowed" });
+  } catch (error: any) {
+    console.error("Robot arm locations bulk API error:", error);
+    const statusCode =
+      error.code === "NOT_FOUND"
+        ? 404
+        : error.code === "CONFLICT"
+          ? 409
+          : error.code === "BAD_REQUEST"
+            ? 400
+            : 500;
+    return res.status(statusCode).json({
+      error: error.message || "Internal server error",
+    });
+  }
+}
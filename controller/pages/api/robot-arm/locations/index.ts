@@ -1,6 +1,7 @@
 import { NextApiRequest, NextApiResponse } from "next";
 import { appRouter } from "@/server/routers/_app";
 import { createContext } from "@/server/trpc";
+import { withIdempotency } from "@/server/utils/idempotency";
 
 export default async function handler(req: NextApiRequest, res: NextApiResponse) {
   const ctx = createContext();
@@ -16,8 +17,9 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
     }
 
     if (req.method === "POST") {
-      const result = await caller.robotArm.location.create(req.body);
-      return res.status(201).json(result);
+      return await withIdempotency(req, res, "robotArm.location.create", () =>
+        caller.robotArm.location.create(req.body),
+      );
     }
 
     if (req.method === "PUT") {
@@ -9,6 +9,19 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
 
   try {
     if (req.method === "GET") {
+      const { names } = req.query;
+
+      // ?names=a,b,c returns only those variables
+      if (typeof names === "string") {
+        const variables = await caller.variable.getMany(
+          names
+            .split(",")
+            .map((name) => name.trim())
+            .filter(Boolean),
+        );
+        return res.status(200).json(variables);
+      }
+
       const variables = await caller.variable.getAll();
       return res.status(200).json(variables);
     }
@@ -18,6 +31,12 @@ export default async function handler(req: NextApiRequest, res: NextApiResponse)
       return res.status(201).json(result);
     }
 
+    // PUT with an array of {name, value, type} creates or overwrites them all at once
+    if (req.method === "PUT") {
+      const result = await caller.variable.bulkUpsert(req.body);
+      return res.status(200).json(result);
+    }
+
     return res.status(405).json({ error: "Method not allowed" });
   } catch (error: any) {
     console.error("Variable API error:", error);
@@ -2,8 +2,18 @@ import { z } from "zod";
 import { procedure, router } from "@/server/trpc";
 import { db } from "@/db/client";
 import { findOne, findMany, getSelectedWorkcellId } from "@/db/helpers";
-import { nests, plates, wells, reagents, hotels, tools, workcells } from "@/db/schema";
-import { eq, and, inArray } from "drizzle-orm";
+import {
+  nests,
+  plates,
+  wells,
+  reagents,
+  hotels,
+  tools,
+  workcells,
+  inventoryChanges,
+} from "@/db/schema";
+import { eq, and, or, gt, max, inArray, getTableColumns } from "drizzle-orm";
+import { SQLiteColumn } from "drizzle-orm/sqlite-core";
 import { TRPCError } from "@trpc/server";
 
 const zNest = z.object({
@@ -29,6 +39,29 @@ const zPlateCreate = z.object({
   plateType: z.string(),
   nestId: z.number().nullable().optional(),
 });
+
+const zPlateUpsertItem = z.object({
+  name: z.string().nullable(),
+  barcode: z.string().min(1),
+  plateType: z.string(),
+  row: z.number(),
+  column: z.number(),
+  nestName: z.string().optional(),
+});
+
+const zBulkPlateUpsert = z.object({
+  hotelId: z.number(),
+  items: z.array(zPlateUpsertItem).max(1000),
+});
+
+const zHotelPlatesClear = z.object({
+  hotel: z.union([z.number(), z.string().min(1)]),
+  mode: z.enum(["unassign", "delete"]).default("unassign"),
+  plateIds: z.array(z.number()).max(1000).optional(),
+});
+
+export type PlateUpsertStatus = "created" | "updated" | "name_conflict";
+
 const zReagent = z.object({
   id: z.number().optional(),
   name: z.string(),
@@ -44,6 +77,49 @@ const zHotel = z.object({
   columns: z.number(),
 });
 
+// `createNests` also creates the hotel's full rows x columns nest grid
+const zHotelCreate = zHotel.omit({ id: true }).extend({
+  createNests: z.boolean().default(false),
+});
+
+// Rows per multi-row nest insert, well under SQLite's bound-parameter limit
+const NEST_INSERT_CHUNK = 500;
+
+// Optional filters for the inventory list endpoints; each one is applied in SQL.
+// `fields` limits the returned columns (all columns when omitted).
+const zFields = z.array(z.string()).optional();
+
+const zHotelFilter = z.object({
+  workcellName: z.string().optional(),
+  name: z.string().optional(),
+  fields: zFields,
+});
+
+const zNestFilter = z.object({
+  name: z.string().optional(),
+  hotelId: z.number().optional(),
+  toolId: z.number().optional(),
+  row: z.number().optional(),
+  column: z.number().optional(),
+  fields: zFields,
+});
+
+const zPlateFilter = z.object({
+  workcellName: z.string().optional(),
+  name: z.string().optional(),
+  barcode: z.string().optional(),
+  nestId: z.number().optional(),
+  toolId: z.number().optional(),
+  hotelId: z.number().optional(),
+  fields: zFields,
+});
+
+const zChangesSince = z.object({
+  since: z.number().int().min(0).default(0),
+});
+
+type ChangedTable = "hotels" | "nests" | "plates";
+
 // Helper function to get workcell by name
 async function getWorkcellByName(workcellName: string) {
   const workcell = await findOne(workcells, eq(workcells.name, workcellName));
@@ -56,6 +132,30 @@ async function getWorkcellByName(workcellName: string) {
   return workcell;
 }
 
+// Helper function to resolve a workcell name, falling back to the selected workcell
+async function resolveWorkcellId(workcellName?: string): Promise<number> {
+  if (workcellName) {
+    const workcell = await getWorkcellByName(workcellName);
+    return workcell.id;
+  }
+  return await getSelectedWorkcellId();
+}
+
+// Helper function to select only the requested columns of a table
+function selectColumns<T extends Record<string, SQLiteColumn>>(columns: T, fields?: string[]): T {
+  if (!fields || fields.length === 0) {
+    return columns;
+  }
+  const unknown = fields.filter((field) => !(field in columns));
+  if (unknown.length > 0) {
+    throw new TRPCError({
+      code: "BAD_REQUEST",
+      message: `Unknown fields: ${unknown.join(", ")}`,
+    });
+  }
+  return Object.fromEntries(fields.map((field) => [field, columns[field]])) as T;
+}
+
 // Helper function to get plate configuration
 function getPlateWellConfig(plateType: string): { columns: number[]; rows: string[] } {
   const configs: Record<string, { columns: number[]; rows: string[] }> = {
@@ -75,6 +175,22 @@ function getPlateWellConfig(plateType: string): { columns: number[]; rows: strin
   return configs[plateType] || { columns: [], rows: [] };
 }
 
+// Helper function to build the well rows for a new plate
+function buildPlateWells(plateId: number, plateType: string) {
+  const config = getPlateWellConfig(plateType);
+  const wellsToCreate = [];
+  for (const column of config.columns) {
+    for (const row of config.rows) {
+      wellsToCreate.push({
+        plateId,
+        row,
+        column,
+      });
+    }
+  }
+  return wellsToCreate;
+}
+
 export const inventoryRouter = router({
   getNests: procedure.query(async () => {
     const workcellId = await getSelectedWorkcellId();
@@ -104,6 +220,34 @@ export const inventoryRouter = router({
     return [...toolNests, ...hotelNests];
   }),
 
+  // Nests of the selected workcell matching every given filter, e.g. one hotel position
+  findNests: procedure.input(zNestFilter).query(async ({ input }) => {
+    const workcellId = await getSelectedWorkcellId();
+
+    const workcellToolIds = db
+      .select({ id: tools.id })
+      .from(tools)
+      .where(eq(tools.workcellId, workcellId));
+    const workcellHotelIds = db
+      .select({ id: hotels.id })
+      .from(hotels)
+      .where(eq(hotels.workcellId, workcellId));
+
+    const conditions = [
+      or(inArray(nests.toolId, workcellToolIds), inArray(nests.hotelId, workcellHotelIds)),
+    ];
+    if (input.name !== undefined) conditions.push(eq(nests.name, input.name));
+    if (input.hotelId !== undefined) conditions.push(eq(nests.hotelId, input.hotelId));
+    if (input.toolId !== undefined) conditions.push(eq(nests.toolId, input.toolId));
+    if (input.row !== undefined) conditions.push(eq(nests.row, input.row));
+    if (input.column !== undefined) conditions.push(eq(nests.column, input.column));
+
+    return await db
+      .select(selectColumns(getTableColumns(nests), input.fields))
+      .from(nests)
+      .where(and(...conditions));
+  }),
+
   getNest: procedure.input(z.number()).query(async ({ input: nestId }) => {
     const nest = await findOne(nests, eq(nests.id, nestId));
     if (!nest) {
@@ -192,6 +336,35 @@ export const inventoryRouter = router({
     return workcellPlates;
   }),
 
+  // Plates of a workcell matching every given filter; toolId/hotelId match the plate's nest
+  findPlates: procedure.input(zPlateFilter).query(async ({ input }) => {
+    const workcellId = await resolveWorkcellId(input.workcellName);
+
+    const conditions = [eq(plates.workcellId, workcellId)];
+    if (input.name !== undefined) conditions.push(eq(plates.name, input.name));
+    if (input.barcode !== undefined) conditions.push(eq(plates.barcode, input.barcode));
+    if (input.nestId !== undefined) conditions.push(eq(plates.nestId, input.nestId));
+    if (input.toolId !== undefined) {
+      const toolNestIds = db
+        .select({ id: nests.id })
+        .from(nests)
+        .where(eq(nests.toolId, input.toolId));
+      conditions.push(inArray(plates.nestId, toolNestIds));
+    }
+    if (input.hotelId !== undefined) {
+      const hotelNestIds = db
+        .select({ id: nests.id })
+        .from(nests)
+        .where(eq(nests.hotelId, input.hotelId));
+      conditions.push(inArray(plates.nestId, hotelNestIds));
+    }
+
+    return await db
+      .select(selectColumns(getTableColumns(plates), input.fields))
+      .from(plates)
+      .where(and(...conditions));
+  }),
+
   getPlate: procedure.input(z.number()).query(async ({ input: plateId }) => {
     const plate = await findOne(plates, eq(plates.id, plateId));
     if (!plate) {
@@ -245,22 +418,9 @@ export const inventoryRouter = router({
       const plate = newPlate[0];
 
       // Create wells based on plate type
-      const config = getPlateWellConfig(plate.plateType);
-      if (config.columns.length > 0 && config.rows.length > 0) {
-        const wellsToCreate = [];
-        for (const column of config.columns) {
-          for (const row of config.rows) {
-            wellsToCreate.push({
-              plateId: plate.id,
-              row,
-              column,
-            });
-          }
-        }
-
-        if (wellsToCreate.length > 0) {
-          await db.insert(wells).values(wellsToCreate);
-        }
+      const wellsToCreate = buildPlateWells(plate.id, plate.plateType);
+      if (wellsToCreate.length > 0) {
+        await db.insert(wells).values(wellsToCreate);
       }
 
       return plate;
@@ -279,6 +439,182 @@ export const inventoryRouter = router({
     }
   }),
 
+  // Create or move many plates into a hotel in one transaction, keyed by barcode.
+  // Missing nests are created on the way. Per-item status mirrors the single-plate
+  // flow used by the scripts: an existing barcode is moved ("updated"), a name that
+  // is already taken by another barcode in the workcell is skipped ("name_conflict").
+  bulkUpsertPlates: procedure.input(zBulkPlateUpsert).mutation(async ({ input }) => {
+    const workcellId = await getSelectedWorkcellId();
+
+    const hotel = await findOne(
+      hotels,
+      and(eq(hotels.id, input.hotelId), eq(hotels.workcellId, workcellId)),
+    );
+    if (!hotel) {
+      throw new TRPCError({
+        code: "NOT_FOUND",
+        message: "Hotel not found",
+      });
+    }
+
+    const barcodes = input.items.map((item) => item.barcode);
+    const names = input.items.map((item) => item.name).filter((name): name is string => !!name);
+
+    // better-sqlite3 transactions are synchronous, so queries run with .all()/.get()
+    try {
+      return db.transaction((tx) => {
+        const hotelNests = tx.select().from(nests).where(eq(nests.hotelId, hotel.id)).all();
+        const nestsByPosition = new Map(hotelNests.map((n) => [`${n.row}:${n.column}`, n]));
+
+        const workcellPlates =
+          input.items.length > 0
+            ? tx
+                .select()
+                .from(plates)
+                .where(
+                  and(
+                    eq(plates.workcellId, workcellId),
+                    or(
+                      inArray(plates.barcode, barcodes),
+                      names.length > 0 ? inArray(plates.name, names) : undefined,
+                    ),
+                  ),
+                )
+                .all()
+            : [];
+        const platesByBarcode = new Map(workcellPlates.map((p) => [p.barcode, p]));
+        const platesByName = new Map(workcellPlates.map((p) => [p.name, p]));
+
+        const results = input.items.map((item) => {
+          const position = `${item.row}:${item.column}`;
+          let nest = nestsByPosition.get(position);
+          const nestCreated = !nest;
+          if (!nest) {
+            nest = tx
+              .insert(nests)
+              .values({
+                name: item.nestName ?? `Nest ${item.row + 1}-${item.column + 1}`,
+                row: item.row,
+                column: item.column,
+                hotelId: hotel.id,
+                toolId: null,
+              })
+              .returning()
+              .get();
+            nestsByPosition.set(position, nest);
+          }
+
+          const existing = platesByBarcode.get(item.barcode);
+          if (existing) {
+            const updated = tx
+              .update(plates)
+              .set({ nestId: nest.id })
+              .where(eq(plates.id, existing.id))
+              .returning()
+              .get();
+            platesByBarcode.set(updated.barcode, updated);
+            return {
+              barcode: item.barcode,
+              status: "updated" as PlateUpsertStatus,
+              plate: updated,
+              nestId: nest.id,
+              nestCreated,
+            };
+          }
+
+          if (item.name && platesByName.has(item.name)) {
+            return {
+              barcode: item.barcode,
+              status: "name_conflict" as PlateUpsertStatus,
+              plate: null,
+              nestId: nest.id,
+              nestCreated,
+            };
+          }
+
+          const plate = tx
+            .insert(plates)
+            .values({
+              name: item.name,
+              barcode: item.barcode,
+              plateType: item.plateType,
+              nestId: nest.id,
+              workcellId,
+            })
+            .returning()
+            .get();
+
+          const wellsToCreate = buildPlateWells(plate.id, plate.plateType);
+          if (wellsToCreate.length > 0) {
+            tx.insert(wells).values(wellsToCreate).run();
+          }
+
+          platesByBarcode.set(plate.barcode, plate);
+          platesByName.set(plate.name, plate);
+          return {
+            barcode: item.barcode,
+            status: "created" as PlateUpsertStatus,
+            plate,
+            nestId: nest.id,
+            nestCreated,
+          };
+        });
+
+        return { hotelId: hotel.id, results };
+      });
+    } catch (error: any) {
+      if (
+        error.code === "SQLITE_CONSTRAINT" ||
+        error.message?.includes("UNIQUE constraint failed")
+      ) {
+        throw new TRPCError({
+          code: "CONFLICT",
+          message: "Inventory changed while upserting plates, please retry",
+        });
+      }
+      throw error;
+    }
+  }),
+
+  // Unassign or delete every plate sitting in a hotel's nests with a single statement.
+  // The hotel can be given by id or by name within the selected workcell. With plateIds
+  // only those plates are cleared; ids not in the hotel are left alone.
+  clearHotelPlates: procedure.input(zHotelPlatesClear).mutation(async ({ input }) => {
+    const workcellId = await getSelectedWorkcellId();
+
+    const hotel = await findOne(
+      hotels,
+      and(
+        typeof input.hotel === "number" ? eq(hotels.id, input.hotel) : eq(hotels.name, input.hotel),
+        eq(hotels.workcellId, workcellId),
+      ),
+    );
+    if (!hotel) {
+      throw new TRPCError({
+        code: "NOT_FOUND",
+        message: "Hotel not found",
+      });
+    }
+
+    const hotelNestIds = db.select({ id: nests.id }).from(nests).where(eq(nests.hotelId, hotel.id));
+    const cleared = { id: plates.id, name: plates.name, barcode: plates.barcode };
+
+    const inHotel = inArray(plates.nestId, hotelNestIds);
+    const where = input.plateIds ? and(inHotel, inArray(plates.id, input.plateIds)) : inHotel;
+
+    const clearedPlates =
+      input.mode === "delete"
+        ? await db.delete(plates).where(where).returning(cleared)
+        : await db.update(plates).set({ nestId: null }).where(where).returning(cleared);
+
+    return {
+      hotelId: hotel.id,
+      mode: input.mode,
+      count: clearedPlates.length,
+      plates: clearedPlates,
+    };
+  }),
+
   updatePlate: procedure.input(zPlate).mutation(async ({ input }) => {
     const { id, ...updateData } = input;
 
@@ -639,6 +975,112 @@ export const inventoryRouter = router({
     return await findMany(hotels, eq(hotels.workcellId, workcell.id));
   }),
 
+  findHotels: procedure.input(zHotelFilter).query(async ({ input }) => {
+    const workcellId = await resolveWorkcellId(input.workcellName);
+
+    const conditions = [eq(hotels.workcellId, workcellId)];
+    if (input.name !== undefined) conditions.push(eq(hotels.name, input.name));
+
+    return await db
+      .select(selectColumns(getTableColumns(hotels), input.fields))
+      .from(hotels)
+      .where(and(...conditions));
+  }),
+
+  // Latest inventory change sequence number; a single lookup on the primary key,
+  // cheap enough for the changes endpoint to poll while a client long-polls
+  getChangeSeq: procedure.query(async () => {
+    const [latest] = await db.select({ seq: max(inventoryChanges.seq) }).from(inventoryChanges);
+    return { seq: latest?.seq ?? 0 };
+  }),
+
+  // Hotels, nests and plates of the selected workcell changed after the `since`
+  // sequence number, plus the ids to drop. `since` 0 (or a sequence number the
+  // server no longer knows) returns everything with `full` set, and the client
+  // should replace its copy. Rows that left the workcell are reported as deleted.
+  getChanges: procedure.input(zChangesSince).query(async ({ input }) => {
+    const workcellId = await getSelectedWorkcellId();
+
+    // One read transaction so the rows and the returned seq are consistent
+    return db.transaction((tx) => {
+      const seq =
+        tx.select({ seq: max(inventoryChanges.seq) }).from(inventoryChanges).get()?.seq ?? 0;
+      const full = input.since === 0 || input.since > seq;
+      const since = full ? 0 : input.since;
+
+      const changes = tx
+        .select({ tableName: inventoryChanges.tableName, rowId: inventoryChanges.rowId })
+        .from(inventoryChanges)
+        .where(gt(inventoryChanges.seq, since))
+        .all();
+      const changedIds: Record<ChangedTable, number[]> = { hotels: [], nests: [], plates: [] };
+      for (const change of changes) {
+        changedIds[change.tableName].push(change.rowId);
+      }
+
+      const workcellToolIds = tx
+        .select({ id: tools.id })
+        .from(tools)
+        .where(eq(tools.workcellId, workcellId));
+      const workcellHotelIds = tx
+        .select({ id: hotels.id })
+        .from(hotels)
+        .where(eq(hotels.workcellId, workcellId));
+
+      // A full sync reads the tables directly rather than through a long id list
+      const changedHotels = tx
+        .select()
+        .from(hotels)
+        .where(
+          and(
+            eq(hotels.workcellId, workcellId),
+            full ? undefined : inArray(hotels.id, changedIds.hotels),
+          ),
+        )
+        .all();
+      const changedNests = tx
+        .select()
+        .from(nests)
+        .where(
+          and(
+            or(inArray(nests.toolId, workcellToolIds), inArray(nests.hotelId, workcellHotelIds)),
+            full ? undefined : inArray(nests.id, changedIds.nests),
+          ),
+        )
+        .all();
+      const changedPlates = tx
+        .select()
+        .from(plates)
+        .where(
+          and(
+            eq(plates.workcellId, workcellId),
+            full ? undefined : inArray(plates.id, changedIds.plates),
+          ),
+        )
+        .all();
+
+      const deletedIds = (ids: number[], rows: { id: number }[]) => {
+        if (full) return [];
+        const present = new Set(rows.map((row) => row.id));
+        return ids.filter((id) => !present.has(id));
+      };
+
+      return {
+        seq,
+        full,
+        workcellId,
+        hotels: changedHotels,
+        nests: changedNests,
+        plates: changedPlates,
+        deleted: {
+          hotels: deletedIds(changedIds.hotels, changedHotels),
+          nests: deletedIds(changedIds.nests, changedNests),
+          plates: deletedIds(changedIds.plates, changedPlates),
+        },
+      };
+    });
+  }),
+
   getHotelById: procedure.input(z.number()).query(async ({ input }) => {
     const hotel = await findOne(hotels, eq(hotels.id, input));
     if (!hotel) {
@@ -650,19 +1092,47 @@ export const inventoryRouter = router({
     return hotel;
   }),
 
-  createHotel: procedure.input(zHotel.omit({ id: true })).mutation(async ({ input }) => {
+  // With `createNests`, the nests are created in the same transaction and returned as
+  // `nests`, named "Nest {row+1}-{column+1}" like the nests bulkUpsertPlates creates
+  createHotel: procedure.input(zHotelCreate).mutation(async ({ input }) => {
     const workcellId = await getSelectedWorkcellId();
-    const result = await db
-      .insert(hotels)
-      .values({
-        name: input.name,
-        workcellId: workcellId,
-        rows: input.rows,
-        columns: input.columns,
-      })
-      .returning();
 
-    return result[0];
+    return db.transaction((tx) => {
+      const hotel = tx
+        .insert(hotels)
+        .values({
+          name: input.name,
+          workcellId: workcellId,
+          rows: input.rows,
+          columns: input.columns,
+        })
+        .returning()
+        .get();
+
+      if (!input.createNests) {
+        return hotel;
+      }
+
+      const grid = [];
+      for (let row = 0; row < input.rows; row++) {
+        for (let column = 0; column < input.columns; column++) {
+          grid.push({
+            name: `Nest ${row + 1}-${column + 1}`,
+            row,
+            column,
+            hotelId: hotel.id,
+            toolId: null,
+          });
+        }
+      }
+
+      const hotelNests = [];
+      for (let start = 0; start < grid.length; start += NEST_INSERT_CHUNK) {
+        const chunk = grid.slice(start, start + NEST_INSERT_CHUNK);
+        hotelNests.push(...tx.insert(nests).values(chunk).returning().all());
+      }
+      return { ...hotel, nests: hotelNests };
+    });
   }),
 
   updateHotel: procedure.input(zHotel).mutation(async ({ input }) => {
@@ -10,7 +10,7 @@ import {
   tools,
   logs,
 } from "@/db/schema";
-import { eq } from "drizzle-orm";
+import { and, eq, inArray } from "drizzle-orm";
 import { TRPCError } from "@trpc/server";
 import Tool from "../tools";
 
@@ -37,6 +37,22 @@ export const zRobotArmLocationUpdate = zRobotArmLocationBase
   })
   .required({ id: true });
 
+// Items are checked one by one so a bad teach point is reported, not fatal to the batch
+export const zRobotArmLocationBulkCreate = z.object({
+  toolId: z.number(),
+  locations: z
+    .array(
+      z.object({
+        name: z.string(),
+        locationType: z.string(),
+        coordinates: z.string(),
+        orientation: z.string().default("landscape"),
+      }),
+    )
+    .max(1000),
+  reloadWaypoints: z.boolean().optional(),
+});
+
 // Robot Arm Sequence schemas
 const zRobotArmSequenceBase = z.object({
   name: z.string().min(1),
@@ -118,8 +134,35 @@ export type RobotArmSequence = z.infer<typeof zRobotArmSequenceCreate> & { id: n
 export type RobotArmMotionProfile = z.infer<typeof zRobotArmMotionProfileCreate> & { id: number };
 export type RobotArmGripParams = z.infer<typeof zRobotArmGripParamsCreate> & { id: number };
 
+export type LocationInsertStatus = "inserted" | "duplicate_name" | "invalid";
+
+// Rows per multi-row location insert, well under SQLite's bound-parameter limit
+const LOCATION_INSERT_CHUNK = 500;
+
 // ==================== HELPER FUNCTION ====================
 
+/**
+ * Reason a location can't be stored, or null if it is valid: coordinates must be
+ * whitespace-separated finite numbers
+ */
+function invalidLocationReason(location: {
+  name: string;
+  locationType: string;
+  coordinates: string;
+}): string | null {
+  if (!location.name.trim()) {
+    return "Name is empty";
+  }
+  if (location.locationType !== "j" && location.locationType !== "c") {
+    return `Unknown location type '${location.locationType}'`;
+  }
+  const values = location.coordinates.trim().split(/\s+/);
+  if (!location.coordinates.trim() || values.some((value) => !Number.isFinite(Number(value)))) {
+    return `Invalid coordinates '${location.coordinates}'`;
+  }
+  return null;
+}
+
 /**
  * Safely reload PF400 waypoints - doesn't throw if tool isn't connected
  */
@@ -206,6 +249,102 @@ export const robotArmRouter = router({
       }
     }),
 
+    // Insert many locations of one tool in a single transaction. Each item gets a
+    // result: "inserted" (with its id), "duplicate_name" (the tool or an earlier
+    // item already has the name) or "invalid" (with the reason).
+    bulkCreate: procedure.input(zRobotArmLocationBulkCreate).mutation(async ({ input }) => {
+      const tool = await findOne(tools, eq(tools.id, input.toolId));
+      if (!tool) {
+        throw new TRPCError({
+          code: "NOT_FOUND",
+          message: "Tool not found",
+        });
+      }
+
+      const names = input.locations.map((location) => location.name);
+
+      // better-sqlite3 transactions are synchronous, so queries run with .all()/.run()
+      const results = db.transaction((tx) => {
+        const takenNames = new Set(
+          names.length > 0
+            ? tx
+                .select({ name: robotArmLocations.name })
+                .from(robotArmLocations)
+                .where(
+                  and(
+                    eq(robotArmLocations.toolId, input.toolId),
+                    inArray(robotArmLocations.name, names),
+                  ),
+                )
+                .all()
+                .map((row) => row.name)
+            : [],
+        );
+
+        const itemResults: {
+          name: string;
+          status: LocationInsertStatus;
+          id?: number;
+          error?: string;
+        }[] = [];
+        const rows: (typeof robotArmLocations.$inferInsert)[] = [];
+        const rowResultIndex: number[] = [];
+
+        for (const location of input.locations) {
+          const reason = invalidLocationReason(location);
+          if (reason) {
+            itemResults.push({ name: location.name, status: "invalid", error: reason });
+          } else if (takenNames.has(location.name)) {
+            itemResults.push({ name: location.name, status: "duplicate_name" });
+          } else {
+            takenNames.add(location.name);
+            rowResultIndex.push(itemResults.length);
+            itemResults.push({ name: location.name, status: "inserted" });
+            rows.push({
+              name: location.name,
+              locationType: location.locationType,
+              coordinates: location.coordinates.trim().split(/\s+/).join(" "),
+              orientation: location.orientation,
+              toolId: input.toolId,
+            });
+          }
+        }
+
+        for (let start = 0; start < rows.length; start += LOCATION_INSERT_CHUNK) {
+          const inserted = tx
+            .insert(robotArmLocations)
+            .values(rows.slice(start, start + LOCATION_INSERT_CHUNK))
+            .returning({ id: robotArmLocations.id })
+            .all();
+          inserted.forEach((row, i) => {
+            itemResults[rowResultIndex[start + i]].id = row.id;
+          });
+        }
+
+        if (rows.length > 0) {
+          tx.insert(logs)
+            .values({
+              level: "info",
+              action: "Robot Arm Locations Created",
+              details: `${rows.length} locations created for tool ${tool.name}.`,
+            })
+            .run();
+        }
+        return itemResults;
+      });
+
+      // Reload waypoints for the tool only if explicitly requested (non-blocking, won't fail the request)
+      if (input.reloadWaypoints) {
+        await safeReloadWaypoints(input.toolId);
+      }
+
+      return {
+        toolId: input.toolId,
+        inserted: results.filter((result) => result.status === "inserted").length,
+        results,
+      };
+    }),
+
     update: procedure.input(zRobotArmLocationUpdate).mutation(async ({ input }) => {
       const { id, ...updateData } = input;
 
@@ -3,7 +3,7 @@ import { procedure, router } from "@/server/trpc";
 import { db } from "@/db/client";
 import { findOne, findMany, getSelectedWorkcellId } from "@/db/helpers";
 import { variables, logs } from "@/db/schema";
-import { eq, and } from "drizzle-orm";
+import { eq, and, inArray } from "drizzle-orm";
 import { TRPCError } from "@trpc/server";
 
 // Variable type validation
@@ -155,6 +155,9 @@ export const zVariableUpdate = zVariableBase
     },
   );
 
+// Batch upsert schema - each item is validated like a single create
+export const zVariableBulkUpsert = z.array(zVariableCreate).min(1).max(500);
+
 export const zVariable = zVariableBase.extend({
   id: z.number().optional(),
 });
@@ -250,6 +253,17 @@ export const variableRouter = router({
     return allVariables;
   }),
 
+  getMany: procedure.input(z.array(z.string())).query(async ({ input }) => {
+    if (input.length === 0) {
+      return [];
+    }
+    const workcellId = await getSelectedWorkcellId();
+    return await findMany(
+      variables,
+      and(eq(variables.workcellId, workcellId), inArray(variables.name, input)),
+    );
+  }),
+
   get: procedure.input(z.string()).query(async ({ input }) => {
     const numericId = parseInt(input);
 
@@ -320,6 +334,80 @@ export const variableRouter = router({
     }
   }),
 
+  // Create many variables or overwrite their values in one transaction, matched by name.
+  // An existing variable keeps its type; an item of another type rejects the whole request.
+  bulkUpsert: procedure.input(zVariableBulkUpsert).mutation(async ({ input }) => {
+    const workcellId = await getSelectedWorkcellId();
+
+    let formatted: { name: string; value: string; type: z.infer<typeof variableTypeEnum> }[];
+    try {
+      formatted = input.map((item) => ({
+        ...item,
+        value: VariableHelpers.validateAndFormatValue(item.value, item.type),
+      }));
+    } catch (error: any) {
+      throw new TRPCError({
+        code: "BAD_REQUEST",
+        message: error.message || "Invalid variable data",
+      });
+    }
+
+    const names = formatted.map((item) => item.name);
+    const created: string[] = [];
+    const updated: string[] = [];
+
+    // better-sqlite3 transactions are synchronous, so queries run with .all()/.get()
+    const result = db.transaction((tx) => {
+      const existing = tx
+        .select()
+        .from(variables)
+        .where(and(eq(variables.workcellId, workcellId), inArray(variables.name, names)))
+        .all();
+      const byName = new Map(existing.map((v) => [v.name, v]));
+
+      for (const item of formatted) {
+        const current = byName.get(item.name);
+        if (current && current.type !== item.type) {
+          throw new TRPCError({
+            code: "BAD_REQUEST",
+            message: `Variable ${item.name} is of type ${current.type}, not ${item.type}`,
+          });
+        }
+      }
+
+      return formatted.map((item) => {
+        const current = byName.get(item.name);
+        let row;
+        if (current) {
+          row = tx
+            .update(variables)
+            .set({ value: item.value, updatedAt: new Date() })
+            .where(eq(variables.id, current.id))
+            .returning()
+            .get();
+          updated.push(item.name);
+        } else {
+          row = tx
+            .insert(variables)
+            .values({ ...item, workcellId })
+            .returning()
+            .get();
+          created.push(item.name);
+        }
+        byName.set(item.name, row);
+        return row;
+      });
+    });
+
+    await db.insert(logs).values({
+      level: "info",
+      action: "Variables Upserted",
+      details: `${created.length} variable(s) created, ${updated.length} updated.`,
+    });
+
+    return { created, updated, variables: result };
+  }),
+
   edit: procedure.input(zVariableUpdate).mutation(async ({ input }) => {
     const { id, ...updateData } = input;
 
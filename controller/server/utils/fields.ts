@@ -0,0 +1,11 @@
+// Query parameter helpers for the REST API routes
+
+// Parse a comma-separated `fields` query parameter into a column list
+export function parseFields(fields: string | string[] | undefined): string[] | undefined {
+  if (!fields) return undefined;
+  const list = (Array.isArray(fields) ? fields.join(",") : fields)
+    .split(",")
+    .map((field) => field.trim())
+    .filter(Boolean);
+  return list.length > 0 ? list : undefined;
+}
@@ -0,0 +1,106 @@
+// Idempotency keys for the REST create endpoints
+
+import crypto from "crypto";
+import type { NextApiRequest, NextApiResponse } from "next";
+import { and, eq, isNull, lt, or, sql } from "drizzle-orm";
+import { db } from "@/db/client";
+import { idempotencyKeys } from "@/db/schema";
+
+const KEY_HEADER = "idempotency-key";
+const MAX_KEY_LENGTH = 255;
+
+// Stored results are replayed for this long; clients retry within seconds
+const KEY_TTL = "-24 hours";
+
+// A claim without a result after this long belongs to a request that died
+// (e.g. the process was restarted mid-create); the next request takes it over
+const CLAIM_LEASE = "-5 minutes";
+
+function requestHash(body: unknown): string {
+  return crypto
+    .createHash("sha256")
+    .update(JSON.stringify(body ?? null))
+    .digest("hex");
+}
+
+/**
+ * Run `create` and respond with its result, honouring an Idempotency-Key header.
+ *
+ * Without a key this is just res.status(201).json(await create()). With one,
+ * the first request's result is stored and a retry with the same key gets it
+ * back (with an Idempotent-Replayed header) instead of creating a duplicate or
+ * failing with 409. A retry that arrives while the first request still runs
+ * gets 503 with Retry-After; reusing a key for a different request gets 422.
+ * Failed requests are not stored, so they can be retried with the same key,
+ * and a claim left behind by a request that never finished is taken over once
+ * it is older than CLAIM_LEASE.
+ */
+export async function withIdempotency(
+  req: NextApiRequest,
+  res: NextApiResponse,
+  endpoint: string,
+  create: () => Promise<unknown>,
+  statusCode = 201,
+) {
+  const header = req.headers[KEY_HEADER];
+  const key = Array.isArray(header) ? header[0] : header;
+  if (!key) {
+    return res.status(statusCode).json(await create());
+  }
+  if (key.length > MAX_KEY_LENGTH) {
+    return res.status(400).json({ error: `Idempotency-Key is longer than ${MAX_KEY_LENGTH}` });
+  }
+
+  const hash = requestHash(req.body);
+  await db
+    .delete(idempotencyKeys)
+    .where(
+      or(
+        lt(idempotencyKeys.createdAt, sql`datetime('now', ${KEY_TTL})`),
+        and(
+          isNull(idempotencyKeys.statusCode),
+          lt(idempotencyKeys.createdAt, sql`datetime('now', ${CLAIM_LEASE})`),
+        ),
+      ),
+    );
+
+  const claimed = await db
+    .insert(idempotencyKeys)
+    .values({ key, endpoint, requestHash: hash })
+    .onConflictDoNothing()
+    .returning();
+
+  if (claimed.length === 0) {
+    const [stored] = await db.select().from(idempotencyKeys).where(eq(idempotencyKeys.key, key));
+    if (stored && (stored.endpoint !== endpoint || stored.requestHash !== hash)) {
+      return res
+        .status(422)
+        .json({ error: "Idempotency-Key was already used for a different request" });
+    }
+    // Still running, or the first request just failed and released the key
+    if (!stored || stored.statusCode === null) {
+      res.setHeader("Retry-After", "1");
+      return res
+        .status(503)
+        .json({ error: "A request with this Idempotency-Key is still in progress" });
+    }
+    res.setHeader("Idempotent-Replayed", "true");
+    return res.status(stored.statusCode).json(stored.response);
+  }
+
+  let result: unknown;
+  try {
+    result = await create();
+  } catch (error) {
+    await db
+      .delete(idempotencyKeys)
+      .where(and(eq(idempotencyKeys.key, key), isNull(idempotencyKeys.statusCode)));
+    throw error;
+  }
+
+  await db
+    .update(idempotencyKeys)
+    .set({ statusCode, response: result })
+    .where(eq(idempotencyKeys.key, key));
+  return res.status(statusCode).json(result);
+}
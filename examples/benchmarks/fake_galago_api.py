@@ -0,0 +1,606 @@
+"""
+In-process stand-in for the Galago controller REST API.
+
+Serves the inventory, variables, tools and robot-arm location endpoints the
+example scripts use, from in-memory tables, with an optional fixed latency
+per request and an optional capacity: requests beyond ``capacity`` in
+flight are turned away with 503 and Retry-After, like an overloaded
+controller. Like the controller, inventory lists honour ``fields=`` and
+responses of 1 KB or more are gzipped for clients that accept it,
+inventory writes are logged for the ``/api/inventory/changes`` delta feed
+(which supports ``wait=`` long polls) and creates sent with an
+Idempotency-Key are answered from the first result. Every request is
+counted together with the bytes received and sent so benchmarks can
+report request counts and payload sizes without a live controller.
+"""
+
+import gzip
+import json
+import math
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+WORKCELL_ID = 1
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def filter_rows(
+    rows: Iterable[Dict[str, Any]], query: Dict[str, str], fields: Tuple[str, ...]
+) -> List[Dict[str, Any]]:
+    """Keep the rows whose fields equal every filter given in the query string."""
+    filters = {f: query[f] for f in fields if f in query}
+    rows = [r for r in rows if all(str(r.get(f)) == v for f, v in filters.items())]
+    if query.get("fields"):
+        columns = query["fields"].split(",")
+        unknown = [c for c in columns if rows and c not in rows[0]]
+        if unknown:
+            raise ApiError(400, f"Unknown fields: {', '.join(unknown)}")
+        rows = [{c: r.get(c) for c in columns} for r in rows]
+    return rows
+
+
+def now() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class FakeInventory:
+    """In-memory tables with the same field names as the controller."""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # Wakes long polls of the changes feed
+        self.changed = threading.Condition(self.lock)
+        self.next_id = 1
+        self.hotels: Dict[int, Dict[str, Any]] = {}
+        self.nests: Dict[int, Dict[str, Any]] = {}
+        self.plates: Dict[int, Dict[str, Any]] = {}
+        self.variables: Dict[str, Dict[str, Any]] = {}
+        self.tools: Dict[int, Dict[str, Any]] = {}
+        self.locations: Dict[int, Dict[str, Any]] = {}
+        # Latest change per inventory row, as the controller's triggers keep it
+        self.change_seq = 0
+        self.changes: Dict[Tuple[str, int], Tuple[int, str]] = {}
+        # Idempotency-Key -> (route, request body, status, response) of a create
+        self.idempotent_results: Dict[str, Tuple[str, Any, int, Any]] = {}
+
+    def new_id(self) -> int:
+        self.next_id += 1
+        return self.next_id
+
+    def row(self, **fields: Any) -> Dict[str, Any]:
+        stamp = now()
+        return {"id": self.new_id(), **fields, "createdAt": stamp, "updatedAt": stamp}
+
+    def log_change(self, table: str, row_id: int, op: str = "upsert") -> None:
+        with self.changed:
+            self.change_seq += 1
+            self.changes[(table, row_id)] = (self.change_seq, op)
+            self.changed.notify_all()
+
+    # ==================== SEEDING ====================
+
+    def seed_background(self, size: int) -> None:
+        """Fill the workcell with ``size`` unrelated hotel nests and plates.
+
+        Makes list endpoints return realistic payloads, so scripts that
+        download whole tables pay for it.
+        """
+        if size <= 0:
+            return
+        hotel = self.add_hotel("Background Hotel", rows=size, columns=1)
+        for row in range(size):
+            nest = self.add_nest(f"Nest {row + 1}-1", row, 0, hotel["id"])
+            self.add_plate(f"BG-{row:05d}", f"BG-{row:05d}", "96 well", nest["id"])
+
+    def add_tool(self, name: str, tool_type: str = "pf400") -> Dict[str, Any]:
+        tool = self.row(
+            type=tool_type,
+            name=name,
+            description="",
+            imageUrl=None,
+            ip="localhost",
+            port=0,
+            config={},
+            workcellId=WORKCELL_ID,
+        )
+        self.tools[tool["id"]] = tool
+        return tool
+
+    def add_hotel(self, name: str, rows: int, columns: int) -> Dict[str, Any]:
+        hotel = self.row(name=name, rows=rows, columns=columns, workcellId=WORKCELL_ID)
+        self.hotels[hotel["id"]] = hotel
+        self.log_change("hotels", hotel["id"])
+        return hotel
+
+    def add_nest(
+        self, name: str, row: int, column: int, hotel_id: Optional[int]
+    ) -> Dict[str, Any]:
+        nest = self.row(name=name, row=row, column=column, toolId=None, hotelId=hotel_id)
+        self.nests[nest["id"]] = nest
+        self.log_change("nests", nest["id"])
+        return nest
+
+    def add_plate(
+        self, name: Optional[str], barcode: str, plate_type: str, nest_id: Optional[int]
+    ) -> Dict[str, Any]:
+        for plate in self.plates.values():
+            if plate["barcode"] == barcode or (name and plate["name"] == name):
+                raise ApiError(
+                    409, "A plate with this barcode or name already exists in this workcell"
+                )
+        plate = self.row(
+            name=name,
+            barcode=barcode,
+            plateType=plate_type,
+            nestId=nest_id,
+            workcellId=WORKCELL_ID,
+        )
+        self.plates[plate["id"]] = plate
+        self.log_change("plates", plate["id"])
+        return plate
+
+    def set_variable(self, name: str, value: str, var_type: str) -> Dict[str, Any]:
+        var = self.variables.get(name)
+        if var is None:
+            var = self.row(name=name, value=value, type=var_type, workcellId=WORKCELL_ID)
+            self.variables[name] = var
+        else:
+            var.update(value=value, type=var_type, updatedAt=now())
+        return var
+
+    # ==================== HANDLERS ====================
+
+    def handle(
+        self,
+        method: str,
+        path: str,
+        query: Dict[str, str],
+        body: Any,
+        idempotency_key: Optional[str] = None,
+    ) -> Tuple[int, Any]:
+        for route_method, pattern, handler in self.routes():
+            match = re.fullmatch(pattern, path)
+            if match and route_method == method:
+                with self.lock:
+                    if method != "POST" or not idempotency_key:
+                        return handler(query, body, *match.groups())
+                    return self.handle_idempotent(
+                        idempotency_key, f"{method} {path}", body, handler, match.groups(), query
+                    )
+        if any(re.fullmatch(pattern, path) for _, pattern, _ in self.routes()):
+            raise ApiError(405, "Method not allowed")
+        raise ApiError(404, "Not found")
+
+    def handle_idempotent(self, key, route, body, handler, args, query) -> Tuple[int, Any]:
+        stored = self.idempotent_results.get(key)
+        if stored is not None:
+            if stored[:2] != (route, body):
+                raise ApiError(422, "Idempotency-Key was already used for a different request")
+            return stored[2], stored[3]
+        status, payload = handler(query, body, *args)
+        self.idempotent_results[key] = (route, body, status, payload)
+        return status, payload
+
+    def routes(self) -> List[Tuple[str, str, Callable[..., Tuple[int, Any]]]]:
+        return [
+            ("GET", r"/api/inventory/hotels", self.get_hotels),
+            ("POST", r"/api/inventory/hotels", self.post_hotel),
+            ("GET", r"/api/inventory/changes", self.get_changes),
+            ("GET", r"/api/inventory/nests", self.get_nests),
+            ("POST", r"/api/inventory/nests", self.post_nest),
+            ("GET", r"/api/inventory/plates", self.get_plates),
+            ("POST", r"/api/inventory/plates", self.post_plate),
+            ("POST", r"/api/inventory/plates/bulk", self.post_plates_bulk),
+            ("POST", r"/api/inventory/plates/clear", self.post_plates_clear),
+            ("PUT", r"/api/inventory/plates/(\d+)", self.put_plate),
+            ("DELETE", r"/api/inventory/plates/(\d+)", self.delete_plate),
+            ("GET", r"/api/variables", self.get_variables),
+            ("POST", r"/api/variables", self.post_variable),
+            ("PUT", r"/api/variables", self.put_variables),
+            ("GET", r"/api/variables/([^/]+)", self.get_variable),
+            ("PUT", r"/api/variables/([^/]+)", self.put_variable),
+            ("GET", r"/api/tools", self.get_tools),
+            ("GET", r"/api/tools/([^/]+)", self.get_tool),
+            ("GET", r"/api/robot-arm/locations", self.get_locations),
+            ("POST", r"/api/robot-arm/locations/bulk", self.post_locations_bulk),
+            ("POST", r"/api/robot-arm/locations", self.post_location),
+            ("PUT", r"/api/robot-arm/locations", self.put_location),
+            ("DELETE", r"/api/robot-arm/locations", self.delete_location),
+        ]
+
+    def get_hotels(self, query, body):
+        return 200, filter_rows(self.hotels.values(), query, ("name",))
+
+    def post_hotel(self, query, body):
+        hotel = self.add_hotel(body["name"], body["rows"], body["columns"])
+        if not body.get("createNests"):
+            return 201, hotel
+        nests = [
+            self.add_nest(f"Nest {row + 1}-{column + 1}", row, column, hotel["id"])
+            for row in range(hotel["rows"])
+            for column in range(hotel["columns"])
+        ]
+        return 201, {**hotel, "nests": nests}
+
+    def get_changes(self, query, body):
+        since = int(query.get("since", 0))
+        wait = min(float(query.get("wait", 0)), 30)
+        if since and wait:
+            # Handlers run under self.lock, which the wait releases
+            self.changed.wait_for(lambda: self.change_seq != since, timeout=wait)
+        full = since == 0 or since > self.change_seq
+        response: Dict[str, Any] = {
+            "seq": self.change_seq,
+            "full": full,
+            "workcellId": WORKCELL_ID,
+            "deleted": {"hotels": [], "nests": [], "plates": []},
+        }
+        for table in ("hotels", "nests", "plates"):
+            rows = getattr(self, table)
+            if full:
+                response[table] = list(rows.values())
+                continue
+            changed = [
+                row_id
+                for (name, row_id), (seq, _) in self.changes.items()
+                if name == table and seq > since
+            ]
+            response[table] = [rows[row_id] for row_id in changed if row_id in rows]
+            response["deleted"][table] = [row_id for row_id in changed if row_id not in rows]
+        return 200, response
+
+    def get_nests(self, query, body):
+        filters = ("name", "hotelId", "toolId", "row", "column")
+        return 200, filter_rows(self.nests.values(), query, filters)
+
+    def post_nest(self, query, body):
+        nest = self.add_nest(body["name"], body["row"], body["column"], body.get("hotelId"))
+        return 201, nest
+
+    def get_plates(self, query, body):
+        plates = list(self.plates.values())
+        for key in ("toolId", "hotelId"):
+            if key in query:
+                nest_ids = {
+                    n["id"] for n in self.nests.values() if str(n[key]) == query[key]
+                }
+                plates = [p for p in plates if p["nestId"] in nest_ids]
+        return 200, filter_rows(plates, query, ("name", "barcode", "nestId"))
+
+    def post_plate(self, query, body):
+        plate = self.add_plate(
+            body.get("name"), body["barcode"], body["plateType"], body.get("nestId")
+        )
+        return 201, plate
+
+    def post_plates_bulk(self, query, body):
+        hotel_id = body["hotelId"]
+        if hotel_id not in self.hotels:
+            raise ApiError(404, "Hotel not found")
+        by_position = {
+            (n["row"], n["column"]): n for n in self.nests.values() if n["hotelId"] == hotel_id
+        }
+        by_barcode = {p["barcode"]: p for p in self.plates.values()}
+        by_name = {p["name"]: p for p in self.plates.values()}
+        results = []
+        for item in body["items"]:
+            position = (item["row"], item["column"])
+            nest = by_position.get(position)
+            nest_created = nest is None
+            if nest is None:
+                name = item.get("nestName") or f"Nest {item['row'] + 1}-{item['column'] + 1}"
+                nest = self.add_nest(name, item["row"], item["column"], hotel_id)
+                by_position[position] = nest
+            result = {"barcode": item["barcode"], "nestId": nest["id"], "nestCreated": nest_created}
+            existing = by_barcode.get(item["barcode"])
+            if existing:
+                existing.update(nestId=nest["id"], updatedAt=now())
+                self.log_change("plates", existing["id"])
+                result.update(status="updated", plate=existing)
+            elif item.get("name") and item["name"] in by_name:
+                result.update(status="name_conflict", plate=None)
+            else:
+                plate = self.add_plate(
+                    item.get("name"), item["barcode"], item["plateType"], nest["id"]
+                )
+                by_barcode[plate["barcode"]] = plate
+                by_name[plate["name"]] = plate
+                result.update(status="created", plate=plate)
+            results.append(result)
+        return 200, {"hotelId": hotel_id, "results": results}
+
+    def post_plates_clear(self, query, body):
+        hotel_ref = body["hotel"]
+        hotel = next(
+            (
+                h
+                for h in self.hotels.values()
+                if h["id"] == hotel_ref or h["name"] == hotel_ref
+            ),
+            None,
+        )
+        if hotel is None:
+            raise ApiError(404, "Hotel not found")
+        mode = body.get("mode", "unassign")
+        nest_ids = {n["id"] for n in self.nests.values() if n["hotelId"] == hotel["id"]}
+        cleared = [p for p in self.plates.values() if p["nestId"] in nest_ids]
+        if body.get("plateIds") is not None:
+            plate_ids = set(body["plateIds"])
+            cleared = [p for p in cleared if p["id"] in plate_ids]
+        for plate in cleared:
+            if mode == "delete":
+                del self.plates[plate["id"]]
+                self.log_change("plates", plate["id"], "delete")
+            else:
+                plate["nestId"] = None
+                self.log_change("plates", plate["id"])
+        summary = [{"id": p["id"], "name": p["name"], "barcode": p["barcode"]} for p in cleared]
+        return 200, {"hotelId": hotel["id"], "mode": mode, "count": len(cleared), "plates": summary}
+
+    def put_plate(self, query, body, plate_id):
+        plate = self.plates.get(int(plate_id))
+        if plate is None:
+            raise ApiError(404, "Plate not found")
+        plate.update({k: v for k, v in body.items() if k != "id"}, updatedAt=now())
+        self.log_change("plates", plate["id"])
+        return 200, plate
+
+    def delete_plate(self, query, body, plate_id):
+        if self.plates.pop(int(plate_id), None) is None:
+            raise ApiError(404, "Plate not found")
+        self.log_change("plates", int(plate_id), "delete")
+        return 200, {"message": "Plate deleted successfully"}
+
+    def get_variables(self, query, body):
+        variables = list(self.variables.values())
+        if "names" in query:
+            names = set(query["names"].split(","))
+            variables = [v for v in variables if v["name"] in names]
+        return 200, variables
+
+    def post_variable(self, query, body):
+        if body["name"] in self.variables:
+            raise ApiError(409, "Variable with that name already exists in this workcell")
+        return 201, self.set_variable(body["name"], body["value"], body["type"])
+
+    def put_variables(self, query, body):
+        for item in body:
+            var = self.variables.get(item["name"])
+            if var is not None and var["type"] != item["type"]:
+                raise ApiError(
+                    400, f"Variable {item['name']} is of type {var['type']}, not {item['type']}"
+                )
+        created = [item["name"] for item in body if item["name"] not in self.variables]
+        rows = [self.set_variable(i["name"], i["value"], i["type"]) for i in body]
+        updated = [item["name"] for item in body if item["name"] not in created]
+        return 200, {"created": created, "updated": updated, "variables": rows}
+
+    def get_variable(self, query, body, name):
+        if name not in self.variables:
+            raise ApiError(404, "Variable not found")
+        return 200, self.variables[name]
+
+    def put_variable(self, query, body, name):
+        var = self.variables.get(name)
+        if var is None:
+            raise ApiError(404, "Variable not found")
+        return 200, self.set_variable(name, body.get("value", var["value"]), var["type"])
+
+    def get_tools(self, query, body):
+        return 200, list(self.tools.values())
+
+    def get_tool(self, query, body, name):
+        for tool in self.tools.values():
+            if tool["name"] == name or str(tool["id"]) == name:
+                return 200, tool
+        raise ApiError(404, "Tool not found")
+
+    def get_locations(self, query, body):
+        locations = list(self.locations.values())
+        if "toolId" in query:
+            locations = [loc for loc in locations if str(loc["toolId"]) == query["toolId"]]
+        return 200, locations
+
+    def post_location(self, query, body):
+        for loc in self.locations.values():
+            if loc["toolId"] == body["toolId"] and loc["name"] == body["name"]:
+                raise ApiError(
+                    409, f"Location with name '{body['name']}' already exists for this tool"
+                )
+        fields = {k: body[k] for k in ("name", "locationType", "coordinates", "orientation")}
+        loc = self.row(**fields, toolId=body["toolId"])
+        self.locations[loc["id"]] = loc
+        return 201, loc
+
+    def post_locations_bulk(self, query, body):
+        tool_id = body["toolId"]
+        if not any(tool["id"] == tool_id for tool in self.tools.values()):
+            raise ApiError(404, "Tool not found")
+        taken = {loc["name"] for loc in self.locations.values() if loc["toolId"] == tool_id}
+        results = []
+        for item in body["locations"]:
+            values = item["coordinates"].split()
+            try:
+                valid = bool(values) and all(math.isfinite(float(v)) for v in values)
+            except ValueError:
+                valid = False
+            if not item["name"].strip() or item["locationType"] not in ("j", "c") or not valid:
+                results.append({"name": item["name"], "status": "invalid", "error": "Invalid"})
+            elif item["name"] in taken:
+                results.append({"name": item["name"], "status": "duplicate_name"})
+            else:
+                taken.add(item["name"])
+                fields = {k: item[k] for k in ("name", "locationType", "coordinates")}
+                loc = self.row(
+                    **fields, orientation=item.get("orientation", "landscape"), toolId=tool_id
+                )
+                self.locations[loc["id"]] = loc
+                results.append({"name": item["name"], "status": "inserted", "id": loc["id"]})
+        inserted = sum(1 for result in results if result["status"] == "inserted")
+        return 200, {"toolId": tool_id, "inserted": inserted, "results": results}
+
+    def put_location(self, query, body):
+        loc = self.locations.get(body["id"])
+        if loc is None:
+            raise ApiError(404, "Location not found")
+        loc.update({k: v for k, v in body.items() if k != "id"}, updatedAt=now())
+        return 200, loc
+
+    def delete_location(self, query, body):
+        if self.locations.pop(body["id"], None) is None:
+            raise ApiError(404, "Location not found")
+        return 200, {"message": "Location deleted successfully"}
+
+
+class RequestStats:
+    """Counters shared by every handler thread."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.requests = 0
+            self.connections = 0
+            self.bytes_in = 0
+            self.bytes_out = 0
+            self.by_route: Dict[str, int] = {}
+
+    def record(self, method: str, path: str, bytes_in: int, bytes_out: int) -> None:
+        route = method + " " + re.sub(r"/\d+", "/{id}", path)
+        with self.lock:
+            self.requests += 1
+            self.bytes_in += bytes_in
+            self.bytes_out += bytes_out
+            self.by_route[route] = self.by_route.get(route, 0) + 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "connections": self.connections,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "by_route": dict(self.by_route),
+            }
+
+
+class FakeGalagoApi:
+    """Runs FakeInventory behind a threaded HTTP/1.1 server on localhost."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        port: int = 0,
+        capacity: Optional[int] = None,
+        retry_after: str = "1",
+    ):
+        self.inventory = FakeInventory()
+        self.stats = RequestStats()
+        self.latency = latency
+        self.capacity = capacity
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.in_flight_lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self.server.daemon_threads = True
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeGalagoApi":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "FakeGalagoApi":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def _handler_class(self):
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this every
+            # response waits on the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                with api.stats.lock:
+                    api.stats.connections += 1
+
+            def log_message(self, format, *args):
+                pass
+
+            def _dispatch(self):
+                parts = urlsplit(self.path)
+                query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+
+                with api.in_flight_lock:
+                    overloaded = api.capacity is not None and api.in_flight >= api.capacity
+                    if not overloaded:
+                        api.in_flight += 1
+
+                if overloaded:
+                    status, payload = 503, {"error": "Controller is busy"}
+                else:
+                    try:
+                        if api.latency:
+                            time.sleep(api.latency)
+                        body = json.loads(raw) if raw else None
+                        status, payload = api.inventory.handle(
+                            self.command,
+                            parts.path,
+                            query,
+                            body,
+                            self.headers.get("Idempotency-Key"),
+                        )
+                    except ApiError as e:
+                        status, payload = e.status, {"error": str(e)}
+                    except (KeyError, TypeError, ValueError) as e:
+                        status, payload = 400, {"error": f"Bad request: {e}"}
+                    finally:
+                        with api.in_flight_lock:
+                            api.in_flight -= 1
+
+                out = json.dumps(payload).encode()
+                self.send_response(status)
+                if overloaded:
+                    self.send_header("Retry-After", api.retry_after)
+                self.send_header("Content-Type", "application/json")
+                accepted = self.headers.get("Accept-Encoding") or ""
+                if len(out) >= 1024 and "gzip" in accepted:
+                    out = gzip.compress(out, compresslevel=6)
+                    self.send_header("Content-Encoding", "gzip")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+                api.stats.record(self.command, parts.path, len(raw), len(out))
+
+            do_GET = do_POST = do_PUT = do_DELETE = _dispatch
+
+        return Handler
@@ -0,0 +1,207 @@
+"""
+Offline benchmarks for the example scripts.
+
+Starts the in-process FakeGalagoApi, seeds it, and runs each script as a
+subprocess against it at several scales. For every run it reports wall time,
+request count, connections opened and bytes sent/received, so regressions
+in the scripts' HTTP behaviour show up as numbers.
+
+Usage:
+    python run_benchmarks.py [--scales 10 100 1000] [--latency-ms 2]
+                             [--background 500] [--json results.json]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from fake_galago_api import FakeGalagoApi
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts")
+HOTEL_NAME = "Hotel 1"
+TOOL_NAME = "Pf400"
+
+
+def write_gbg_file(path: str, count: int) -> None:
+    """Write a GBG locations file with ``count`` distinct joint locations.
+
+    Joints stay within the PF400 limits, and neighbouring points are further
+    apart than the near-duplicate tolerance.
+    """
+    bases = (100.0, -40.0, 20.0, -500.0, 80.0, 0.0)
+    steps = (0.02, 0.001, 0.005, 0.02, 0.0, 0.0)
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n')
+        f.write('<Locations xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance">\n')
+        for i in range(count):
+            joints = "".join(
+                f"<Joint{j + 1}>{bases[j] + (i + 1) * steps[j]:.3f}</Joint{j + 1}>"
+                for j in range(6)
+            )
+            f.write(
+                f"  <xsi:JointLocation><Name>point_{i:05d}</Name>{joints}"
+                "</xsi:JointLocation>\n"
+            )
+        f.write("</Locations>\n")
+
+
+def seed_variables(api: FakeGalagoApi, protocol: str, scale: int) -> None:
+    inventory = api.inventory
+    barcodes = "\n".join(f"CSV-{i:05d},Assay" for i in range(scale))
+    inventory.set_variable("labware", "96 well", "string")
+    inventory.set_variable("current_protocol", protocol, "string")
+    inventory.set_variable("plate_count", str(scale), "number")
+    inventory.set_variable("tmp_file", f"Barcode,Assay\n{barcodes}", "string")
+
+
+def run_script(
+    api: FakeGalagoApi, args: List[str], extra_env: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """Run a script against the fake API and collect its cost."""
+    env = dict(os.environ, GALAGO_API_URL=api.url, PYTHONPATH=SCRIPTS_DIR, **(extra_env or {}))
+    api.stats.reset()
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, *args],
+        cwd=SCRIPTS_DIR,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+    )
+    elapsed = time.perf_counter() - start
+    result = {
+        "ok": proc.returncode == 0,
+        "wall_time_s": round(elapsed, 3),
+        **api.stats.snapshot(),
+    }
+    if proc.returncode != 0:
+        result["output_tail"] = proc.stdout[-2000:]
+    return result
+
+
+def run_scale(scale: int, latency: float, background: int, workdir: str) -> Dict[str, Any]:
+    """Run every scenario at one scale against a freshly seeded server."""
+    results: Dict[str, Any] = {}
+    with FakeGalagoApi(latency=latency) as api:
+        api.inventory.seed_background(background)
+        tool = api.inventory.add_tool(TOOL_NAME)
+
+        # Keep journals in the temp dir and ignore a mirror set in the caller's shell
+        env = {
+            "GALAGO_JOURNAL_DIR": os.path.join(workdir, f"journal_{scale}"),
+            "GALAGO_INVENTORY_MIRROR": "",
+        }
+
+        seed_variables(api, "Reader Assay V1", scale)
+        results["create_hotel_plates V1"] = run_script(api, ["create_hotel_plates.py"], env)
+
+        seed_variables(api, "Reader Assay V2", scale)
+        results["create_hotel_plates V2"] = run_script(api, ["create_hotel_plates.py"], env)
+
+        # Re-running on an unchanged hotel, cold and then with a warm local mirror
+        mirror_env = {
+            **env,
+            "GALAGO_INVENTORY_MIRROR": os.path.join(workdir, f"mirror_{scale}.sqlite3"),
+        }
+        results["V2 rerun"] = run_script(api, ["create_hotel_plates.py"], env)
+        run_script(api, ["create_hotel_plates.py"], mirror_env)
+        results["V2 rerun (warm mirror)"] = run_script(
+            api, ["create_hotel_plates.py"], mirror_env
+        )
+
+        results["clear_hotel_plates"] = run_script(
+            api, ["clear_hotel_plates.py", HOTEL_NAME], env
+        )
+
+        gbg_file = os.path.join(workdir, f"locations_{scale}.xml")
+        write_gbg_file(gbg_file, scale)
+        importer = (
+            "import gbg_pf400_locations_uploader as g; "
+            f"g.parse_and_import_xml({gbg_file!r}, {tool['id']})"
+        )
+        results["gbg import"] = run_script(api, ["-c", importer], env)
+
+        syncer = (
+            "import gbg_pf400_locations_uploader as g; "
+            f"g.sync_locations({gbg_file!r}, {tool['id']})"
+        )
+        results["gbg sync (no changes)"] = run_script(api, ["-c", syncer], env)
+
+        # Commissioning several arms at once: one file per arm
+        arms_dir = os.path.join(workdir, f"arms_{scale}")
+        os.makedirs(arms_dir)
+        for arm in ("A", "B", "C"):
+            api.inventory.add_tool(f"{TOOL_NAME}_{arm}")
+            write_gbg_file(os.path.join(arms_dir, f"{TOOL_NAME}_{arm}.xml"), scale)
+        results["gbg batch import (3 arms)"] = run_script(
+            api, ["gbg_pf400_locations_uploader.py", "--batch", arms_dir], env
+        )
+    return results
+
+
+def print_table(all_results: Dict[int, Dict[str, Any]]) -> None:
+    header = (
+        f"{'scenario':<26}{'scale':>7}{'status':>8}{'wall s':>9}"
+        f"{'reqs':>7}{'conns':>7}{'KB in':>9}{'KB out':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for scale, results in all_results.items():
+        for name, r in results.items():
+            print(
+                f"{name:<26}{scale:>7}{'ok' if r['ok'] else 'FAIL':>8}"
+                f"{r['wall_time_s']:>9.3f}{r['requests']:>7}{r['connections']:>7}"
+                f"{r['bytes_in'] / 1024:>9.1f}{r['bytes_out'] / 1024:>9.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Galago example scripts")
+    parser.add_argument("--scales", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--latency-ms", type=float, default=2.0, help="Added latency per request"
+    )
+    parser.add_argument(
+        "--background",
+        type=int,
+        default=500,
+        help="Unrelated nests/plates already in the workcell",
+    )
+    parser.add_argument("--json", help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    all_results: Dict[int, Dict[str, Any]] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for scale in args.scales:
+            print(f"Running scale {scale}...", file=sys.stderr)
+            all_results[scale] = run_scale(
+                scale, args.latency_ms / 1000, args.background, workdir
+            )
+
+    print_table(all_results)
+
+    failures = [
+        (scale, name, r)
+        for scale, results in all_results.items()
+        for name, r in results.items()
+        if not r["ok"]
+    ]
+    for scale, name, r in failures:
+        print(f"\n{name} @ {scale} failed:\n{r['output_tail']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(all_results, f, indent=2)
+        print(f"\nWrote {args.json}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Append-only checkpoint journal for resumable imports.
+
+Each line of the journal is a JSON record ``{"key": ..., "state": ...}``
+where state is "started" (the request is about to be sent) or "done" (the
+server accepted it). The first line names the job, so a journal is never
+resumed against a different input.
+
+On --resume, keys with a "done" record are skipped without any request.
+Keys that were "started" but never finished are the ones that were in
+flight when the run died; the caller re-verifies only those against the
+server before deciding whether to send them again.
+
+A line torn by a crash mid-write is skipped on load, and the next record
+starts on a fresh line. Once a job finished without errors the caller
+removes its journal, so only interrupted or failed jobs leave one behind.
+
+Environment:
+- GALAGO_JOURNAL_DIR: Directory for journal files (default .galago-journal)
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
+
+JOURNAL_DIR = os.getenv("GALAGO_JOURNAL_DIR", ".galago-journal")
+
+
+class JournalError(Exception):
+    """The journal can not be resumed (e.g. it belongs to another job)."""
+
+
+def journal_path_for(job: str, directory: str = JOURNAL_DIR) -> str:
+    """Default journal file for a job description."""
+    slug = re.sub(r"[^A-Za-z0-9._-]+", "_", job).strip("_")[:120]
+    return os.path.join(directory, f"{slug}.jsonl")
+
+
+class CheckpointJournal:
+    """Thread-safe, append-only record of completed operations for one job."""
+
+    def __init__(self, path: str, job: str, resume: bool = False):
+        self.path = path
+        self.job = job
+        self._lock = threading.Lock()
+        self._state: Dict[str, str] = {}
+        self._file: Optional[TextIO] = None
+
+        if resume and os.path.exists(path):
+            torn = self._load()
+            self._file = open(path, "a", encoding="utf-8")
+            if torn:
+                self._file.write("\n")
+        else:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._file = open(path, "w", encoding="utf-8")
+            self._append({"job": job, "created": time.time()})
+
+    def _load(self) -> bool:
+        """Read the journal's records. Returns True if the last line is torn."""
+        with open(self.path, encoding="utf-8") as f:
+            content = f.read()
+
+        records: List[Dict[str, Any]] = []
+        for line in content.splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # A write cut short by a crash; that operation stays unconfirmed
+                continue
+
+        if not records or records[0].get("job") != self.job:
+            found = records[0].get("job") if records else None
+            raise JournalError(
+                f"Journal {self.path} is for job {found!r}, not {self.job!r}; "
+                "run without --resume to start over"
+            )
+
+        for record in records[1:]:
+            self._state[record["key"]] = record["state"]
+        return bool(content) and not content.endswith("\n")
+
+    def _append(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+
+    # ==================== RECORDING ====================
+
+    def start(self, key: str) -> None:
+        """Record that the operation for ``key`` is about to be sent."""
+        with self._lock:
+            self._state[key] = "started"
+            self._append({"key": key, "state": "started"})
+
+    def done(self, key: str) -> None:
+        """Record that the operation for ``key`` completed."""
+        with self._lock:
+            self._state[key] = "done"
+            self._append({"key": key, "state": "done"})
+
+    # ==================== QUERIES ====================
+
+    def is_done(self, key: str) -> bool:
+        with self._lock:
+            return self._state.get(key) == "done"
+
+    def in_flight(self) -> List[str]:
+        """Keys that were started but never recorded as done."""
+        with self._lock:
+            return [key for key, state in self._state.items() if state == "started"]
+
+    def done_count(self) -> int:
+        with self._lock:
+            return sum(1 for state in self._state.values() if state == "done")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove(self) -> None:
+        """Close and delete the journal; the job needs no resuming."""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "CheckpointJournal":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -8,100 +8,53 @@ Options:
     --delete    Delete plates entirely instead of just unassigning them from nests
 """
 
-import os
 import sys
-from typing import Any, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Tuple
 
-import requests
+from galago_api import GalagoApiError, GalagoClient
+from hotel_layout import plate_label
 
-API_BASE_URL = os.getenv("GALAGO_API_URL", "http://localhost:3010")
+client = GalagoClient()
 
+# Parallel requests for the per-plate fallback path
+CLEAR_CONCURRENCY = 8
 
-def get_hotels() -> List[Dict[str, Any]]:
-    """Fetch all hotels."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/hotels"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch hotels: {str(e)}")
-
-
-def get_hotel_by_name(hotel_name: str) -> Optional[Dict[str, Any]]:
-    """Find a hotel by name."""
-    hotels = get_hotels()
-    for hotel in hotels:
-        if hotel.get("name") == hotel_name:
-            return hotel
-    return None
-
-
-def get_nests() -> List[Dict[str, Any]]:
-    """Fetch all nests."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/nests"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch nests: {str(e)}")
-
-
-def get_nests_by_hotel(hotel_id: int) -> List[Dict[str, Any]]:
-    """Get all nests belonging to a hotel."""
-    nests = get_nests()
-    return [nest for nest in nests if nest.get("hotelId") == hotel_id]
-
-
-def get_plates() -> List[Dict[str, Any]]:
-    """Fetch all plates."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch plates: {str(e)}")
-
-
-def get_plates_in_hotel(hotel_id: int) -> List[Dict[str, Any]]:
-    """Get all plates assigned to nests in a hotel."""
-    hotel_nests = get_nests_by_hotel(hotel_id)
-    nest_ids = {nest["id"] for nest in hotel_nests}
 
-    plates = get_plates()
-    return [plate for plate in plates if plate.get("nestId") in nest_ids]
+def clear_plates_per_plate(
+    plates: List[Dict[str, Any]], delete_plates: bool
+) -> Tuple[int, List[str]]:
+    """Clear plates one request each, with at most CLEAR_CONCURRENCY in flight.
 
+    Used when the server has no hotel clear endpoint. Results are reported in
+    the order the plates were listed.
+    """
+    clear = client.delete_plate if delete_plates else client.unassign_plate
+    done = "Deleted" if delete_plates else "Unassigned"
+    cleared_count = 0
+    errors = []
 
-def unassign_plate(plate_id: int) -> Dict[str, Any]:
-    """Unassign a plate from its nest (set nestId to null)."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates/{plate_id}"
-        data = {"nestId": None}
-        response = requests.put(url, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to unassign plate: {str(e)}")
+    with ThreadPoolExecutor(max_workers=CLEAR_CONCURRENCY) as pool:
+        futures = [pool.submit(clear, plate["id"]) for plate in plates]
+        for plate, future in zip(plates, futures):
+            plate_name = plate_label(plate)
+            try:
+                future.result()
+                print(f"  {done} plate: {plate_name} (ID: {plate['id']})")
+                cleared_count += 1
+            except Exception as e:
+                error_msg = f"  Failed to process plate '{plate_name}': {str(e)}"
+                errors.append(error_msg)
+                print(error_msg)
 
-
-def delete_plate(plate_id: int) -> Dict[str, Any]:
-    """Delete a plate entirely."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates/{plate_id}"
-        response = requests.delete(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to delete plate: {str(e)}")
+    return cleared_count, errors
 
 
 def clear_hotel_plates(hotel_name: str, delete_plates: bool = False):
     """Clear all plates from a hotel."""
 
     print(f"Looking for hotel '{hotel_name}'...")
-    hotel = get_hotel_by_name(hotel_name)
+    hotel = client.get_hotel_by_name(hotel_name)
 
     if not hotel:
         print(f"Error: Hotel '{hotel_name}' not found")
@@ -109,39 +62,34 @@ def clear_hotel_plates(hotel_name: str, delete_plates: bool = False):
 
     print(f"Found hotel: {hotel['name']} (ID: {hotel['id']})")
 
-    # Get all plates in the hotel
-    plates = get_plates_in_hotel(hotel["id"])
+    mode = "delete" if delete_plates else "unassign"
+    done = "Deleted" if delete_plates else "Unassigned"
+    errors: List[str] = []
+
+    try:
+        # Clear the whole hotel server-side in one request
+        result = client.clear_hotel_plates(hotel["id"], mode)
+        plates = result["plates"]
+        cleared_count = result["count"]
+        if plates:
+            print(f"Found {len(plates)} plate(s) in hotel")
+            print("=" * 50)
+            for plate in plates:
+                print(f"  {done} plate: {plate_label(plate)} (ID: {plate['id']})")
+    except GalagoApiError as e:
+        if e.status_code not in (404, 405):
+            raise
+        print("Hotel clear not supported by the server, clearing plates one by one")
+        plates = client.get_plates_in_hotel(hotel["id"])
+        if plates:
+            print(f"Found {len(plates)} plate(s) in hotel")
+            print("=" * 50)
+            cleared_count, errors = clear_plates_per_plate(plates, delete_plates)
 
     if not plates:
         print(f"No plates found in hotel '{hotel_name}'")
         return
 
-    print(f"Found {len(plates)} plate(s) in hotel")
-    print("=" * 50)
-
-    action = "Deleting" if delete_plates else "Unassigning"
-    cleared_count = 0
-    errors = []
-
-    for plate in plates:
-        plate_id = plate["id"]
-        plate_name = plate.get("name") or plate.get("barcode") or f"ID:{plate_id}"
-
-        print(f"{action} plate: {plate_name} (ID: {plate_id})...")
-
-        try:
-            if delete_plates:
-                delete_plate(plate_id)
-                print(f"  Deleted plate: {plate_name}")
-            else:
-                unassign_plate(plate_id)
-                print(f"  Unassigned plate: {plate_name}")
-            cleared_count += 1
-        except Exception as e:
-            error_msg = f"  Failed to process plate '{plate_name}': {str(e)}"
-            errors.append(error_msg)
-            print(error_msg)
-
     # Print summary
     print("\n" + "=" * 50)
     print("Summary:")
@@ -5,223 +5,136 @@ Uses variables:
 - labware: The plate type (e.g., "96 well")
 - current_protocol: Determines the mode ("Reader Assay V1" or "Reader Assay V2")
 - plate_count: Number of plates to create (used in V1 mode)
-- tmp_file: CSV string with Barcode,Assay columns (used in V2 mode)
+- tmp_file: CSV string with Barcode,Assay columns, or a path to such a file
+  (used in V2 mode)
 
 V1 Mode: Creates plate_count plates with auto-generated barcodes
-V2 Mode: Parses CSV and creates plates using barcodes from the first column
+V2 Mode: Reads the CSV manifest and creates plates using its barcodes
+
+The desired layout is compared with the hotel's current state first, and
+only the operations needed to reach it (create hotel/nests/plates, move
+plates, unassign plates in the way) are printed and then sent. Re-running
+on a hotel that already matches sends no writes. With GALAGO_INVENTORY_MIRROR
+set, the current state is read from a local mirror that only downloads the
+rows changed since the previous run.
+
+Usage:
+    python create_hotel_plates.py [--manifest PATH] [--dry-run] [--prune]
+
+Options:
+    --manifest PATH    In V2 mode, read the manifest from PATH instead of tmp_file
+    --dry-run          Print the plan without changing anything
+    --prune            Also unassign hotel plates that are not in the layout
 """
 
-import csv
-import io
-import os
 import sys
-from typing import Any, Dict, List, Optional
-
-import requests
-from tools.toolbox.variables import get_variable
-
-API_BASE_URL = os.getenv("GALAGO_API_URL", "http://localhost:3010")
-
-
-def get_hotels() -> List[Dict[str, Any]]:
-    """Fetch all hotels."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/hotels"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch hotels: {str(e)}")
-
-
-def get_hotel_by_name(hotel_name: str) -> Optional[Dict[str, Any]]:
-    """Find a hotel by name."""
-    hotels = get_hotels()
-    for hotel in hotels:
-        if hotel.get("name") == hotel_name:
-            return hotel
-    return None
-
-
-def create_hotel(name: str, rows: int, columns: int) -> Dict[str, Any]:
-    """Create a new hotel."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/hotels"
-        data = {"name": name, "rows": rows, "columns": columns}
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to create hotel: {str(e)}")
-
-
-def get_nests() -> List[Dict[str, Any]]:
-    """Fetch all nests."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/nests"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch nests: {str(e)}")
-
-
-def create_nest(name: str, row: int, column: int, hotel_id: int) -> Dict[str, Any]:
-    """Create a nest in a hotel."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/nests"
-        data = {
-            "name": name,
-            "row": row,
-            "column": column,
-            "hotelId": hotel_id,
-            "toolId": None,
-        }
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to create nest: {str(e)}")
-
-
-def get_nest_by_position(
-    hotel_id: int, row: int, column: int
-) -> Optional[Dict[str, Any]]:
-    """Find a nest by its position in a hotel."""
-    nests = get_nests()
-    for nest in nests:
-        if (
-            nest.get("hotelId") == hotel_id
-            and nest.get("row") == row
-            and nest.get("column") == column
-        ):
-            return nest
-    return None
-
-
-def get_plates() -> List[Dict[str, Any]]:
-    """Fetch all plates."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates"
-        response = requests.get(url)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch plates: {str(e)}")
-
-
-def get_plate_by_barcode(barcode: str) -> Optional[Dict[str, Any]]:
-    """Find a plate by barcode."""
-    plates = get_plates()
-    for plate in plates:
-        if plate.get("barcode") == barcode:
-            return plate
-    return None
-
-
-def update_plate(plate_id: int, nest_id: int) -> Dict[str, Any]:
-    """Update a plate's nest assignment."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates/{plate_id}"
-        data = {"nestId": nest_id}
-        response = requests.put(url, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to update plate: {str(e)}")
-
-
-def create_plate(
-    name: str, barcode: str, plate_type: str, nest_id: int
-) -> Dict[str, Any]:
-    """Create a plate and assign it to a nest."""
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates"
-        data = {
-            "name": name,
-            "barcode": barcode,
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from galago_api import GalagoApiError, GalagoClient
+from hotel_layout import LayoutPlan, plan_hotel_layout, plate_label
+from inventory_mirror import synced_reader
+from inventory_snapshot import InventorySnapshot
+from plate_manifest import ManifestError, PlateManifest
+from variable_cache import VariableCache
+
+client = GalagoClient()
+variables = VariableCache(client)
+
+# Plates per bulk upsert request
+BULK_BATCH_SIZE = 200
+
+# Hotel column plates are placed in, and the size of a newly created hotel
+TARGET_COLUMN = 1
+MIN_HOTEL_ROWS = 5
+HOTEL_COLUMNS = 2
+
+# Parallel requests when unassigning plates one by one (servers without the
+# batched hotel clear)
+UNASSIGN_CONCURRENCY = 8
+
+
+def plan_plates_v1(
+    plate_count: int, plate_type: str, hotel_name: str
+) -> List[Dict[str, Any]]:
+    """V1 Mode: Build the plate plan with auto-generated barcodes."""
+    target_column = TARGET_COLUMN
+    hotel_slug = hotel_name.replace(" ", "")
+    return [
+        {
+            "name": f"Plate-{hotel_slug}-R{row}C{target_column}",
+            "barcode": f"BC-{hotel_slug}-{row:03d}",
             "plateType": plate_type,
-            "nestId": nest_id,
+            "row": row,
+            "column": target_column,
         }
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to create plate: {str(e)}")
-
-
-def create_or_update_plate(
-    name: str, barcode: str, plate_type: str, nest_id: int
-) -> tuple[Dict[str, Any], str]:
-    """Create a plate or update existing one. Returns (plate, status)."""
-    # First check if plate exists
-    existing = get_plate_by_barcode(barcode)
-    if existing:
-        # Update existing plate's nest assignment
-        updated = update_plate(existing["id"], nest_id)
-        return updated, "updated"
-
-    # Try to create new plate
-    try:
-        url = f"{API_BASE_URL}/api/inventory/plates"
-        data = {
-            "name": name,
+        for row in range(plate_count)
+    ]
+
+
+def plan_plates_v2(manifest: PlateManifest, plate_type: str) -> List[Dict[str, Any]]:
+    """V2 Mode: Build the plate plan using the manifest's barcodes."""
+    target_column = TARGET_COLUMN
+    for row_idx in manifest.blank_rows:
+        print(f"  Skipping row {row_idx}: No barcode found")
+    for row_idx, barcode in manifest.duplicate_rows:
+        print(f"  Skipping row {row_idx}: Duplicate barcode '{barcode}'")
+
+    # Use barcode from CSV as both name and barcode
+    return [
+        {
+            "name": barcode,
             "barcode": barcode,
             "plateType": plate_type,
-            "nestId": nest_id,
+            "row": row_idx,
+            "column": target_column,
         }
-        response = requests.post(url, json=data)
-        response.raise_for_status()
-        return response.json(), "created"
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 409:
-            # Conflict - plate exists (maybe with different name but same barcode)
-            # Try to find it again with fresh data
-            existing = get_plate_by_barcode(barcode)
-            if existing:
-                updated = update_plate(existing["id"], nest_id)
-                return updated, "updated"
-            else:
-                # Conflict - barcode/name exists in another workcell
-                return {"name": name, "barcode": barcode, "id": "existing"}, "exists_other_workcell"
-        raise Exception(f"Failed to create plate: {str(e)}")
-
-
-def parse_csv_string(csv_string: str) -> List[Dict[str, str]]:
-    """Parse CSV string and return list of rows as dicts."""
-    rows = []
-    reader = csv.DictReader(io.StringIO(csv_string.strip()))
-    for row in reader:
-        # Clean up keys and values (strip whitespace)
-        cleaned_row = {k.strip(): v.strip() for k, v in row.items()}
-        rows.append(cleaned_row)
-    return rows
-
-
-def create_plates_v1(hotel_id: int, plate_count: int, plate_type: str, hotel_name: str):
-    """V1 Mode: Create plates with auto-generated barcodes."""
-    print(f"V1 Mode: Creating/updating {plate_count} plates")
+        for row_idx, barcode in manifest
+    ]
+
+
+def report_plate_status(
+    counts: Dict[str, int], status: str, plate: Optional[Dict[str, Any]], barcode: str
+) -> None:
+    """Print the outcome for one plate and bump the matching counter."""
+    if status == "created":
+        print(f"  Created plate: {plate['name']} (ID: {plate['id']})")
+        counts["created"] += 1
+    elif status == "updated":
+        print(f"  Updated existing plate: {plate['name']} (ID: {plate['id']})")
+        counts["updated"] += 1
+    elif status == "name_conflict":
+        print(f"  Skipped: Plate name for barcode '{barcode}' is taken by another plate")
+        counts["skipped"] += 1
+    elif status == "exists_other_workcell":
+        print(f"  Skipped: Barcode '{barcode}' exists in another workcell")
+        counts["skipped"] += 1
+    else:
+        print(f"  Skipped (already exists): {barcode}")
+        counts["skipped"] += 1
 
-    target_column = 1
-    created_plates = 0
-    updated_plates = 0
-    skipped_plates = 0
-    errors = []
 
-    for row in range(plate_count):
-        print(f"\nProcessing row {row}...")
+def apply_plate_plan_per_plate(
+    hotel_id: int, plan: List[Dict[str, Any]], counts: Dict[str, int], errors: List[str]
+) -> None:
+    """Fallback for controllers without the bulk endpoint: one plate at a time."""
+    # Loaded on first lookup, and only on this path
+    inventory = InventorySnapshot(client)
+    for item in plan:
+        row, column = item["row"], item["column"]
+        print(f"\nProcessing row {row}: Barcode '{item['barcode']}'...")
 
         # Get or create nest at position
-        nest = get_nest_by_position(hotel_id, row, target_column)
+        nest = inventory.get_nest_by_position(hotel_id, row, column)
 
         if nest:
             print(f"  Found existing nest: {nest['name']} (ID: {nest['id']})")
         else:
-            nest_name = f"Nest {row + 1}-{target_column + 1}"
+            nest_name = f"Nest {row + 1}-{column + 1}"
             print(f"  Creating nest: {nest_name}")
             try:
-                nest = create_nest(
-                    name=nest_name, row=row, column=target_column, hotel_id=hotel_id
+                nest = inventory.create_nest(
+                    name=nest_name, row=row, column=column, hotel_id=hotel_id
                 )
                 print(f"  Created nest: {nest['name']} (ID: {nest['id']})")
             except Exception as e:
@@ -230,125 +143,135 @@ def create_plates_v1(hotel_id: int, plate_count: int, plate_type: str, hotel_nam
                 print(error_msg)
                 continue
 
-        nest_id = nest["id"]
-
-        # Create or update plate
-        plate_name = f"Plate-{hotel_name.replace(' ', '')}-R{row}C{target_column}"
-        barcode = f"BC-{hotel_name.replace(' ', '')}-{row:03d}"
-
-        print(f"  Processing plate: {plate_name} (barcode: {barcode})")
-
         try:
-            plate, status = create_or_update_plate(
-                name=plate_name,
-                barcode=barcode,
-                plate_type=plate_type,
-                nest_id=nest_id,
+            plate, status = inventory.create_or_update_plate(
+                name=item["name"],
+                barcode=item["barcode"],
+                plate_type=item["plateType"],
+                nest_id=nest["id"],
             )
-            if status == "created":
-                print(f"  Created plate: {plate['name']} (ID: {plate['id']})")
-                created_plates += 1
-            elif status == "updated":
-                print(f"  Updated existing plate: {plate['name']} (ID: {plate['id']})")
-                updated_plates += 1
-            elif status == "exists_other_workcell":
-                print(f"  Skipped: Barcode '{barcode}' exists in another workcell")
-                skipped_plates += 1
-            else:
-                print(f"  Skipped (already exists): {plate['name']}")
-                skipped_plates += 1
+            report_plate_status(counts, status, plate, item["barcode"])
         except Exception as e:
-            error_msg = f"  Failed to process plate '{plate_name}': {str(e)}"
+            error_msg = f"  Failed to process plate '{item['name']}': {str(e)}"
             errors.append(error_msg)
             print(error_msg)
 
-    return created_plates, updated_plates, skipped_plates, errors
-
 
-def create_plates_v2(hotel_id: int, csv_data: List[Dict[str, str]], plate_type: str):
-    """V2 Mode: Create plates from CSV data using barcodes from first column."""
-    print(f"V2 Mode: Creating/updating {len(csv_data)} plates from CSV data")
+def apply_plate_plan(hotel_id: int, plan: List[Dict[str, Any]]):
+    """Send the plate plan to the bulk upsert endpoint in batches.
 
-    target_column = 1
-    created_plates = 0
-    updated_plates = 0
-    skipped_plates = 0
-    errors = []
+    Each batch creates any missing nests and creates or moves its plates in a
+    single request, instead of 2-4 requests per plate.
+    """
+    counts = {"created": 0, "updated": 0, "skipped": 0}
+    errors: List[str] = []
 
-    for row_idx, csv_row in enumerate(csv_data):
-        # Get barcode from first column (usually "Barcode" key)
-        barcode = None
-        for key in csv_row.keys():
-            barcode = csv_row[key]
-            break  # Use first column value as barcode
+    for start in range(0, len(plan), BULK_BATCH_SIZE):
+        batch = plan[start : start + BULK_BATCH_SIZE]
+        first_row, last_row = batch[0]["row"], batch[-1]["row"]
+        print(f"\nUpserting rows {first_row}-{last_row} ({len(batch)} plates)...")
 
-        if not barcode:
-            print(f"  Skipping row {row_idx}: No barcode found")
+        try:
+            results = client.bulk_upsert_plates(hotel_id, batch)
+        except GalagoApiError as e:
+            if e.status_code in (404, 405):
+                print("  Bulk upsert not supported by the server, using per-plate requests")
+                apply_plate_plan_per_plate(hotel_id, plan[start:], counts, errors)
+                break
+            error_msg = f"  Failed to upsert rows {first_row}-{last_row}: {str(e)}"
+            errors.append(error_msg)
+            print(error_msg)
             continue
 
-        print(f"\nProcessing row {row_idx}: Barcode '{barcode}'...")
+        for item, result in zip(batch, results):
+            if result.get("nestCreated"):
+                print(f"  Row {item['row']}: Created nest (ID: {result['nestId']})")
+            print(f"  Row {item['row']}: '{item['barcode']}'")
+            report_plate_status(counts, result["status"], result.get("plate"), item["barcode"])
 
-        # Get or create nest at position
-        nest = get_nest_by_position(hotel_id, row_idx, target_column)
+    return counts["created"], counts["updated"], counts["skipped"], errors
 
-        if nest:
-            print(f"  Found existing nest: {nest['name']} (ID: {nest['id']})")
-        else:
-            nest_name = f"Nest {row_idx + 1}-{target_column + 1}"
-            print(f"  Creating nest: {nest_name}")
+
+def unassign_plates(hotel_id: int, plates: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+    """Unassign plates that are in the way of the layout, in batched requests."""
+    unassigned = 0
+    errors: List[str] = []
+    for start in range(0, len(plates), BULK_BATCH_SIZE):
+        batch = plates[start : start + BULK_BATCH_SIZE]
+        plate_ids = [plate["id"] for plate in batch]
+        try:
+            result = client.clear_hotel_plates(hotel_id, "unassign", plate_ids)
+        except GalagoApiError as e:
+            if e.status_code not in (404, 405):
+                raise
+            print("Batched unassign not supported by the server, unassigning one by one")
+            count, batch_errors = unassign_plates_per_plate(plates[start:])
+            return unassigned + count, errors + batch_errors
+
+        cleared = {plate["id"] for plate in result["plates"]}
+        for plate in batch:
+            if plate["id"] in cleared:
+                print(f"  Unassigned plate: {plate_label(plate)} (ID: {plate['id']})")
+                unassigned += 1
+            else:
+                # Moved or removed since the hotel was read: no longer in the way
+                print(f"  Not in hotel anymore: {plate_label(plate)} (ID: {plate['id']})")
+    return unassigned, errors
+
+
+def unassign_plates_per_plate(plates: List[Dict[str, Any]]) -> Tuple[int, List[str]]:
+    """Unassign plates one request each, for servers without the batched clear."""
+    unassigned = 0
+    errors: List[str] = []
+    with ThreadPoolExecutor(max_workers=UNASSIGN_CONCURRENCY) as pool:
+        futures = [pool.submit(client.unassign_plate, plate["id"]) for plate in plates]
+        for plate, future in zip(plates, futures):
             try:
-                nest = create_nest(
-                    name=nest_name, row=row_idx, column=target_column, hotel_id=hotel_id
-                )
-                print(f"  Created nest: {nest['name']} (ID: {nest['id']})")
+                future.result()
+                print(f"  Unassigned plate: {plate_label(plate)} (ID: {plate['id']})")
+                unassigned += 1
             except Exception as e:
-                error_msg = f"  Failed to create nest at row {row_idx}: {str(e)}"
+                error_msg = f"  Failed to unassign plate '{plate_label(plate)}': {str(e)}"
                 errors.append(error_msg)
                 print(error_msg)
-                continue
-
-        nest_id = nest["id"]
-
-        # Use barcode from CSV as both name and barcode
-        plate_name = barcode
+    return unassigned, errors
+
+
+def apply_layout_plan(plan: LayoutPlan):
+    """Send the plan's operations: hotel, then unassigns, then plate upserts.
+
+    A new hotel is created with its whole nest grid; in an existing hotel the
+    plate upsert creates missing nests along with the plates placed in them.
+    """
+    hotel = plan.hotel
+    if plan.create_hotel:
+        print(f"\nHotel '{plan.hotel_name}' not found, creating it...")
+        hotel = client.create_hotel(
+            name=plan.hotel_name,
+            rows=plan.create_hotel["rows"],
+            columns=plan.create_hotel["columns"],
+            create_nests=True,
+        )
+        nest_count = len(hotel.get("nests") or [])
+        print(f"Created hotel: {hotel['name']} (ID: {hotel['id']}) with {nest_count} nests")
 
-        print(f"  Processing plate: {plate_name} (barcode: {barcode})")
+    unassigned, errors = 0, []
+    if plan.unassign_plates:
+        print(f"\nUnassigning {len(plan.unassign_plates)} plate(s)...")
+        unassigned, errors = unassign_plates(hotel["id"], plan.unassign_plates)
 
-        try:
-            plate, status = create_or_update_plate(
-                name=plate_name,
-                barcode=barcode,
-                plate_type=plate_type,
-                nest_id=nest_id,
-            )
-            if status == "created":
-                print(f"  Created plate: {plate['name']} (ID: {plate['id']})")
-                created_plates += 1
-            elif status == "updated":
-                print(f"  Updated existing plate: {plate['name']} (ID: {plate['id']})")
-                updated_plates += 1
-            elif status == "exists_other_workcell":
-                print(f"  Skipped: Barcode '{barcode}' exists in another workcell")
-                skipped_plates += 1
-            else:
-                print(f"  Skipped (already exists): {plate['name']}")
-                skipped_plates += 1
-        except Exception as e:
-            error_msg = f"  Failed to process plate '{plate_name}': {str(e)}"
-            errors.append(error_msg)
-            print(error_msg)
-
-    return created_plates, updated_plates, skipped_plates, errors
+    created, updated, skipped, upsert_errors = apply_plate_plan(hotel["id"], plan.plate_items)
+    return hotel, created, updated, skipped, unassigned, errors + upsert_errors
 
 
 def main():
     """Main function to create plates in a hotel."""
 
-    # Get variables
-    labware_var = get_variable("labware")
-    current_protocol_var = get_variable("current_protocol")
-    plate_count_var = get_variable("plate_count")
-    tmp_file_var = get_variable("tmp_file")
+    # Get variables (one request for all of them)
+    labware_var = variables.get("labware")
+    current_protocol_var = variables.get("current_protocol")
+    plate_count_var = variables.get("plate_count")
+    tmp_file_var = variables.get("tmp_file")
 
     # Extract values
     plate_type = labware_var["value"] if labware_var else "96 well"
@@ -356,60 +279,80 @@ def main():
     plate_count = int(plate_count_var["value"]) if plate_count_var else 0
     tmp_file_content = tmp_file_var["value"] if tmp_file_var else ""
 
+    # An explicit --manifest path takes precedence over the tmp_file variable
+    manifest_source = tmp_file_content
+    if "--manifest" in sys.argv:
+        idx = sys.argv.index("--manifest")
+        if idx + 1 >= len(sys.argv):
+            print("Error: --manifest requires a file path")
+            sys.exit(1)
+        manifest_source = sys.argv[idx + 1]
+
     hotel_name = "Hotel 1"
+    dry_run = "--dry-run" in sys.argv
+    prune = "--prune" in sys.argv
 
     print(f"Protocol: {current_protocol}")
     print(f"Plate Type: {plate_type}")
     print("=" * 50)
 
-    # Step 1: Get or create hotel
-    print(f"\nLooking for hotel '{hotel_name}'...")
-    hotel = get_hotel_by_name(hotel_name)
-
-    # Determine number of rows needed
+    # Step 1: Build the desired layout
     if current_protocol == "Reader Assay V1":
+        items = plan_plates_v1(plate_count, plate_type, hotel_name)
         num_rows = plate_count
+        print(f"V1 Mode: Creating/updating {plate_count} plates")
     elif current_protocol == "Reader Assay V2":
-        csv_data = parse_csv_string(tmp_file_content) if tmp_file_content else []
-        num_rows = len(csv_data)
-    else:
-        print(f"Unknown protocol: {current_protocol}")
-        sys.exit(1)
-
-    if hotel:
-        print(f"Found existing hotel: {hotel['name']} (ID: {hotel['id']})")
-    else:
-        print(f"Hotel '{hotel_name}' not found, creating it...")
-        hotel = create_hotel(name=hotel_name, rows=max(num_rows, 5), columns=2)
-        print(f"Created hotel: {hotel['name']} (ID: {hotel['id']})")
-
-    hotel_id = hotel["id"]
-
-    # Step 2: Create plates based on protocol
-    if current_protocol == "Reader Assay V1":
-        created_plates, updated_plates, skipped_plates, errors = create_plates_v1(
-            hotel_id, plate_count, plate_type, hotel_name
-        )
-        total_expected = plate_count
-    elif current_protocol == "Reader Assay V2":
-        csv_data = parse_csv_string(tmp_file_content) if tmp_file_content else []
-        if not csv_data:
+        # Read the manifest once; the same pass gives the row count
+        try:
+            manifest = PlateManifest.load(manifest_source)
+        except (ManifestError, OSError) as e:
+            print(f"Error: Could not read CSV manifest: {str(e)}")
+            sys.exit(1)
+        if not manifest.entries:
             print("Error: No CSV data found in tmp_file variable")
             sys.exit(1)
-        created_plates, updated_plates, skipped_plates, errors = create_plates_v2(hotel_id, csv_data, plate_type)
-        total_expected = len(csv_data)
+        items = plan_plates_v2(manifest, plate_type)
+        num_rows = manifest.row_count
+        print(f"V2 Mode: Creating/updating {len(manifest)} plates from CSV data")
     else:
         print(f"Unknown protocol: {current_protocol}")
         sys.exit(1)
 
+    # Step 2: Read the hotel once and work out what has to change
+    print(f"\nLooking for hotel '{hotel_name}'...")
+    plan = plan_hotel_layout(
+        synced_reader(client),
+        hotel_name,
+        rows=max(num_rows, MIN_HOTEL_ROWS),
+        columns=HOTEL_COLUMNS,
+        items=items,
+        prune=prune,
+    )
+    if plan.hotel:
+        print(f"Found existing hotel: {plan.hotel['name']} (ID: {plan.hotel['id']})")
+    plan.print()
+
+    if dry_run:
+        print("\nDry run: no changes made")
+        return
+
+    # Step 3: Send only the planned operations
+    hotel, created_plates, updated_plates, skipped_plates, unassigned_plates, errors = (
+        apply_layout_plan(plan)
+    )
+    hotel_id = hotel["id"]
+    total_expected = len(items)
+
     # Print summary
-    total_processed = created_plates + updated_plates + skipped_plates
+    total_processed = created_plates + updated_plates + skipped_plates + plan.unchanged
     print("\n" + "=" * 50)
     print("Summary:")
     print(f"  Protocol: {current_protocol}")
     print(f"  Hotel: {hotel_name} (ID: {hotel_id})")
     print(f"  Plates created: {created_plates}")
     print(f"  Plates updated: {updated_plates}")
+    print(f"  Plates unchanged: {plan.unchanged}")
+    print(f"  Plates unassigned: {unassigned_plates}")
     print(f"  Plates skipped: {skipped_plates}")
     print(f"  Total processed: {total_processed}/{total_expected}")
     print(f"  Errors: {len(errors)}")
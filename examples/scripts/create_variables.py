@@ -2,7 +2,9 @@
 Script to create or reset variables for protocol runs.
 """
 
-from tools.toolbox.variables import get_variable, update_variable, create_variable
+from galago_api import GalagoApiError, GalagoClient
+
+client = GalagoClient()
 
 variables_to_create = [
     {
@@ -72,13 +74,29 @@ variables_to_create = [
     },
 ]
 
-for var in variables_to_create:
-    exists = get_variable(var["name"])
-    if not exists:
-        print(f"Variable {var['name']} does not exist. Creating it.")
-        create_variable(var)
-    else:
-        print(f"Variable {var['name']} exists. Resetting to default value.")
-        update_variable(var["name"], var["value"])
+
+def init_variables_one_by_one():
+    """Fallback for servers without the batch endpoint: one write per variable."""
+    existing = {var["name"] for var in client.get_variables()}
+    for var in variables_to_create:
+        if var["name"] not in existing:
+            print(f"Variable {var['name']} does not exist. Creating it.")
+            client.create_variable(var)
+        else:
+            print(f"Variable {var['name']} exists. Resetting to default value.")
+            client.update_variable(var["name"], var["value"])
+
+
+try:
+    # Create or reset every variable in a single request
+    result = client.upsert_variables(variables_to_create)
+    for name in result["created"]:
+        print(f"Variable {name} does not exist. Created it.")
+    for name in result["updated"]:
+        print(f"Variable {name} exists. Reset to default value.")
+except GalagoApiError as e:
+    if e.status_code not in (404, 405):
+        raise
+    init_variables_one_by_one()
 
 print("All variables initialized.")
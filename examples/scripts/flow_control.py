@@ -0,0 +1,184 @@
+"""
+Adaptive concurrency and rate limiting for the Galago API client.
+
+Bulk scripts share the controller with running protocols: its command
+queue and SQLite state serve both. A fixed number of parallel requests
+either starves a run or leaves the script crawling, so GalagoClient sends
+every request through an AdaptiveLimiter instead:
+
+- the in-flight limit grows by one per round of fast, successful replies
+  (additive increase) and is halved when the controller shows strain
+  (multiplicative decrease): a reply much slower than the fastest seen for
+  that endpoint, a 429/502/503/504, or no reply at all,
+- a Retry-After header on any reply holds back every new request of the
+  client until it has passed,
+- an optional requests-per-second ceiling spaces requests out evenly, so a
+  bulk job never goes faster than that even while the controller is idle.
+"""
+
+import email.utils
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from request_metrics import NO_RESPONSE, endpoint_for
+
+# Replies that mean the controller (or a proxy in front of it) is overloaded
+OVERLOAD_STATUS_CODES = (429, 502, 503, 504)
+
+# Longest Retry-After honoured; a misconfigured proxy must not stall a script
+MAX_RETRY_AFTER_S = 60.0
+
+# Latency below this never counts as slow, so fast endpoints don't flap on jitter
+LATENCY_SLACK_S = 0.05
+
+# Share of each slower reply folded into an endpoint's baseline, so a lasting
+# slowdown (e.g. a bigger table) stops counting as overload after a while
+BASELINE_DRIFT = 0.05
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay-seconds or HTTP date)."""
+    if not value:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = when.timestamp() - time.time()
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER_S)
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rps seconds apart across threads."""
+
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class AdaptiveLimiter:
+    """AIMD limit on in-flight requests, shared by every thread of a client.
+
+    Call acquire() before sending a request and release() with its outcome
+    afterwards. With ``adaptive`` off the limit stays at ``max_limit`` and
+    only Retry-After and the rate ceiling apply.
+    """
+
+    def __init__(
+        self,
+        max_limit: int,
+        min_limit: int = 1,
+        initial_limit: Optional[int] = None,
+        max_rps: Optional[float] = None,
+        latency_tolerance: float = 2.0,
+        decrease_factor: float = 0.5,
+        adaptive: bool = True,
+    ):
+        self.max_limit = max(max_limit, 1)
+        self.min_limit = min(max(min_limit, 1), self.max_limit)
+        self.limit = float(
+            self.max_limit
+            if initial_limit is None
+            else min(max(initial_limit, self.min_limit), self.max_limit)
+        )
+        self.latency_tolerance = latency_tolerance
+        self.decrease_factor = decrease_factor
+        self.adaptive = adaptive
+        self.rate = RateLimiter(max_rps) if max_rps else None
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._pause_until = 0.0
+        self._last_decrease = 0.0
+        self._baselines: Dict[str, float] = {}
+
+        # Reported at exit when the limiter held the script back
+        self.lowest_limit = int(self.limit)
+        self.decreases = 0
+        self.paused_s = 0.0
+
+    def acquire(self) -> None:
+        """Wait for a free slot (and any Retry-After pause), then take it."""
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                if now < self._pause_until:
+                    self._cond.wait(self._pause_until - now)
+                elif self._in_flight < int(self.limit):
+                    break
+                else:
+                    self._cond.wait()
+            self._in_flight += 1
+        if self.rate:
+            self.rate.wait()
+
+    def release(
+        self,
+        path: str,
+        status: int,
+        latency: float,
+        retry_after: Optional[float] = None,
+    ) -> None:
+        """Give the slot back and adjust the limit by the request's outcome.
+
+        ``status`` is NO_RESPONSE when the request got no reply.
+        """
+        with self._cond:
+            self._in_flight -= 1
+            now = time.monotonic()
+            if retry_after:
+                until = now + retry_after
+                if until > self._pause_until:
+                    self.paused_s += until - max(now, self._pause_until)
+                    self._pause_until = until
+
+            if self.adaptive:
+                if status == NO_RESPONSE or status in OVERLOAD_STATUS_CODES:
+                    self._decrease(now, latency)
+                elif status < 500:
+                    if self._is_slow(endpoint_for(path), latency):
+                        self._decrease(now, latency)
+                    elif self._in_flight + 1 >= int(self.limit):
+                        # Only grow a limit that is actually in use
+                        self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def _is_slow(self, endpoint: str, latency: float) -> bool:
+        baseline = self._baselines.get(endpoint)
+        if baseline is None or latency <= baseline:
+            self._baselines[endpoint] = latency
+            return False
+        self._baselines[endpoint] = baseline + (latency - baseline) * BASELINE_DRIFT
+        return latency > baseline * self.latency_tolerance + LATENCY_SLACK_S
+
+    def _decrease(self, now: float, latency: float) -> None:
+        # Replies to requests sent before the last cut say nothing about the
+        # new limit, so cut at most once per round trip
+        if now - self._last_decrease < latency:
+            return
+        self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        self._last_decrease = now
+        self.decreases += 1
+        self.lowest_limit = min(self.lowest_limit, int(self.limit))
+
+    def summary(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "lowest_limit": self.lowest_limit,
+                "decreases": self.decreases,
+                "paused_s": round(self.paused_s, 3),
+            }
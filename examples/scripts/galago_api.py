@@ -0,0 +1,548 @@
+"""
+Shared HTTP client for the Galago controller REST API.
+
+Used by the example scripts in place of bare requests.get/post calls so that
+every call goes through one keep-alive Session with a connection pool,
+consistent timeouts and retry/backoff on 5xx responses and connection resets.
+Create calls carry an Idempotency-Key, so they are retried on timeouts too:
+the controller answers a resent create with the original result.
+
+Requests also pass through an adaptive concurrency limit (see
+flow_control.py): it backs off when the controller slows down or answers
+429/503, honours Retry-After, and can cap the request rate, so bulk jobs
+use spare capacity without holding up a running protocol.
+
+Environment:
+- GALAGO_API_URL: Base URL of the controller (default http://localhost:3010)
+- GALAGO_API_TIMEOUT: Read timeout in seconds (default 30)
+- GALAGO_API_CONNECT_TIMEOUT: Connect timeout in seconds (default 5)
+- GALAGO_API_RETRIES: Retries for failed requests (default 3)
+- GALAGO_API_MAX_IN_FLIGHT: Most requests in flight at once (default 10)
+- GALAGO_API_MAX_RPS: Requests-per-second ceiling (default unset: no ceiling)
+- GALAGO_API_ADAPTIVE: Set to 0 to keep the in-flight limit fixed
+- GALAGO_API_METRICS: Set to 0 to skip the "Request Metrics:" block at exit
+- GALAGO_API_METRICS_FILE: Also write the metrics here at exit, as JSON for a
+  .json path and as a Prometheus textfile otherwise
+"""
+
+import atexit
+import os
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from flow_control import AdaptiveLimiter, parse_retry_after
+from request_metrics import NO_RESPONSE, RequestMetrics
+
+API_BASE_URL = os.getenv("GALAGO_API_URL", "http://localhost:3010")
+
+DEFAULT_CONNECT_TIMEOUT = float(os.getenv("GALAGO_API_CONNECT_TIMEOUT", "5"))
+DEFAULT_READ_TIMEOUT = float(os.getenv("GALAGO_API_TIMEOUT", "30"))
+DEFAULT_RETRIES = int(os.getenv("GALAGO_API_RETRIES", "3"))
+DEFAULT_BACKOFF_FACTOR = 0.3
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_IN_FLIGHT = int(os.getenv("GALAGO_API_MAX_IN_FLIGHT", str(DEFAULT_POOL_SIZE)))
+DEFAULT_MAX_RPS = float(os.getenv("GALAGO_API_MAX_RPS") or 0) or None
+ADAPTIVE_CONCURRENCY = os.getenv("GALAGO_API_ADAPTIVE", "1") != "0"
+REPORT_METRICS = os.getenv("GALAGO_API_METRICS", "1") != "0"
+METRICS_FILE = os.getenv("GALAGO_API_METRICS_FILE")
+
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Methods whose requests are safe to send again after a read error or 5xx
+IDEMPOTENT_METHODS = frozenset(Retry.DEFAULT_ALLOWED_METHODS)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+
+# Columns the inventory helpers use; lookups ask the server for only these
+HOTEL_FIELDS = ("id", "name", "rows", "columns", "workcellId")
+NEST_FIELDS = ("id", "name", "row", "column", "hotelId", "toolId")
+PLATE_FIELDS = ("id", "name", "barcode", "plateType", "nestId", "workcellId")
+
+
+class GalagoApiError(Exception):
+    """Raised when a Galago API call fails. Carries the HTTP status if there was one."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def inventory_params(
+    fields: Optional[Sequence[str]], filters: Dict[str, Any]
+) -> Optional[Dict[str, Any]]:
+    """Query parameters for an inventory list: filters plus a ``fields`` projection."""
+    params = dict(filters)
+    if fields:
+        params["fields"] = ",".join(fields)
+    return params or None
+
+
+def body_size(body: Any) -> int:
+    """Size in bytes of a prepared request body."""
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    if isinstance(body, (bytes, bytearray)):
+        return len(body)
+    return 0
+
+
+class GalagoClient:
+    """Pooled, retrying client for the Galago controller API."""
+
+    def __init__(
+        self,
+        base_url: str = API_BASE_URL,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        retries: int = DEFAULT_RETRIES,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        report_metrics: bool = REPORT_METRICS,
+        metrics_file: Optional[str] = METRICS_FILE,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        max_rps: Optional[float] = DEFAULT_MAX_RPS,
+        adaptive: bool = ADAPTIVE_CONCURRENCY,
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+
+        # Every call is recorded; the summary is printed/written when the script exits
+        self.metrics = RequestMetrics()
+        self.report_metrics = report_metrics
+        self.metrics_file = metrics_file
+        atexit.register(self.report)
+
+        # Shared by every thread using this client
+        self.limiter = AdaptiveLimiter(max_in_flight, max_rps=max_rps, adaptive=adaptive)
+
+        # Connection errors are retried for every method since nothing reached
+        # the server, and read errors for idempotent methods (GET/PUT/DELETE),
+        # so a POST is never sent twice. Retryable status codes are left to
+        # request(), so each attempt passes through the limiter and a 429/503
+        # lowers the limit and pauses for Retry-After; create() resends its
+        # POSTs itself, under an idempotency key.
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=0,
+            backoff_factor=backoff_factor,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size
+        )
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def close(self) -> None:
+        self.session.close()
+
+    def report(self) -> None:
+        """Print the request metrics and write the metrics file, if configured."""
+        if not len(self.metrics):
+            return
+        if self.report_metrics:
+            self.metrics.print_summary()
+            flow = self.limiter.summary()
+            if flow["decreases"] or flow["paused_s"]:
+                print(
+                    f"Flow control: in-flight limit lowered {flow['decreases']} times "
+                    f"(down to {flow['lowest_limit']}, now {flow['limit']}), "
+                    f"paused {flow['paused_s']:.1f}s for Retry-After"
+                )
+        if self.metrics_file:
+            try:
+                self.metrics.write_file(self.metrics_file)
+            except OSError as e:
+                print(f"Failed to write request metrics to {self.metrics_file}: {str(e)}")
+
+    def __enter__(self) -> "GalagoClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ==================== HTTP ====================
+
+    def request(self, method: str, path: str, action: str, **kwargs: Any) -> Any:
+        """Send a request and return the decoded JSON body.
+
+        ``action`` is used for the error message, e.g. "fetch hotels" gives
+        "Failed to fetch hotels: ...". Idempotent requests answered with a
+        retryable status are sent again, up to ``retries`` times.
+        """
+        url = f"{self.base_url}{path}"
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except requests.exceptions.RequestException as e:
+                ended = time.perf_counter()
+                self.limiter.release(path, NO_RESPONSE, ended - started)
+                self.metrics.record(method, path, NO_RESPONSE, started, ended, 0, 0)
+                raise GalagoApiError(f"Failed to {action}: {str(e)}") from e
+
+            ended = time.perf_counter()
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            self.limiter.release(path, response.status_code, ended - started, retry_after)
+            self.metrics.record(
+                method,
+                path,
+                response.status_code,
+                started,
+                ended,
+                body_size(response.request.body),
+                len(response.content),
+            )
+            if (
+                method not in IDEMPOTENT_METHODS
+                or response.status_code not in RETRY_STATUS_CODES
+                or attempt == self.retries
+            ):
+                break
+            # A Retry-After pause is waited out in the limiter's acquire()
+            if not retry_after:
+                time.sleep(self.backoff_factor * (2**attempt))
+
+        try:
+            response.raise_for_status()
+        except requests.exceptions.HTTPError as e:
+            raise GalagoApiError(
+                f"Failed to {action}: {str(e)}", e.response.status_code
+            ) from e
+
+        if not response.content:
+            return None
+        return response.json()
+
+    def get(self, path: str, action: str, **kwargs: Any) -> Any:
+        return self.request("GET", path, action, **kwargs)
+
+    def post(self, path: str, action: str, **kwargs: Any) -> Any:
+        return self.request("POST", path, action, **kwargs)
+
+    def create(self, path: str, action: str, **kwargs: Any) -> Any:
+        """POST a create request under a fresh idempotency key.
+
+        Unlike other POSTs this is safe to resend, so timeouts, connection
+        errors and 5xx responses are retried: a create that did reach the
+        server is answered with its original result, not a duplicate or 409.
+        """
+        headers = {**kwargs.pop("headers", {}), IDEMPOTENCY_HEADER: uuid.uuid4().hex}
+        for attempt in range(self.retries + 1):
+            try:
+                return self.post(path, action, headers=headers, **kwargs)
+            except GalagoApiError as e:
+                retryable = e.status_code is None or e.status_code in RETRY_STATUS_CODES
+                if not retryable or attempt == self.retries:
+                    raise
+            time.sleep(self.backoff_factor * (2**attempt))
+
+    def put(self, path: str, action: str, **kwargs: Any) -> Any:
+        return self.request("PUT", path, action, **kwargs)
+
+    def delete(self, path: str, action: str, **kwargs: Any) -> Any:
+        return self.request("DELETE", path, action, **kwargs)
+
+    # ==================== HOTELS ====================
+
+    def get_hotels(
+        self, fields: Optional[Sequence[str]] = HOTEL_FIELDS, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Fetch hotels, optionally filtered server-side (e.g. ``name="Hotel 1"``).
+
+        Only ``fields`` are returned; pass None for full records.
+        """
+        params = inventory_params(fields, filters)
+        return self.get("/api/inventory/hotels", "fetch hotels", params=params)
+
+    def get_hotel_by_name(self, hotel_name: str) -> Optional[Dict[str, Any]]:
+        """Find a hotel by name."""
+        # The match is re-checked because older controllers ignore the filter
+        for hotel in self.get_hotels(name=hotel_name):
+            if hotel.get("name") == hotel_name:
+                return hotel
+        return None
+
+    def create_hotel(
+        self, name: str, rows: int, columns: int, create_nests: bool = False
+    ) -> Dict[str, Any]:
+        """Create a new hotel.
+
+        With ``create_nests`` the server also creates every rows x columns nest
+        ("Nest {row+1}-{column+1}") in the same request and returns them as
+        ``nests``. Older controllers ignore the flag and return no ``nests``.
+        """
+        data = {"name": name, "rows": rows, "columns": columns}
+        if create_nests:
+            data["createNests"] = True
+        return self.create("/api/inventory/hotels", "create hotel", json=data)
+
+    # ==================== NESTS ====================
+
+    def get_nests(
+        self, fields: Optional[Sequence[str]] = NEST_FIELDS, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Fetch nests, optionally filtered server-side (hotelId, toolId, row, ...).
+
+        Only ``fields`` are returned; pass None for full records.
+        """
+        params = inventory_params(fields, filters)
+        return self.get("/api/inventory/nests", "fetch nests", params=params)
+
+    def get_nests_by_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all nests belonging to a hotel."""
+        nests = self.get_nests(hotelId=hotel_id)
+        return [nest for nest in nests if nest.get("hotelId") == hotel_id]
+
+    def get_nest_by_position(
+        self, hotel_id: int, row: int, column: int
+    ) -> Optional[Dict[str, Any]]:
+        """Find a nest by its position in a hotel."""
+        for nest in self.get_nests(hotelId=hotel_id, row=row, column=column):
+            if (
+                nest.get("hotelId") == hotel_id
+                and nest.get("row") == row
+                and nest.get("column") == column
+            ):
+                return nest
+        return None
+
+    def create_nest(
+        self, name: str, row: int, column: int, hotel_id: int
+    ) -> Dict[str, Any]:
+        """Create a nest in a hotel."""
+        data = {
+            "name": name,
+            "row": row,
+            "column": column,
+            "hotelId": hotel_id,
+            "toolId": None,
+        }
+        return self.create("/api/inventory/nests", "create nest", json=data)
+
+    # ==================== PLATES ====================
+
+    def get_plates(
+        self, fields: Optional[Sequence[str]] = PLATE_FIELDS, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Fetch plates, optionally filtered server-side (barcode, name, hotelId, ...).
+
+        Only ``fields`` are returned; pass None for full records.
+        """
+        params = inventory_params(fields, filters)
+        return self.get("/api/inventory/plates", "fetch plates", params=params)
+
+    def get_plate_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Find a plate by barcode."""
+        for plate in self.get_plates(barcode=barcode):
+            if plate.get("barcode") == barcode:
+                return plate
+        return None
+
+    def get_plates_in_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all plates assigned to nests in a hotel."""
+        nest_ids = {nest["id"] for nest in self.get_nests_by_hotel(hotel_id)}
+        plates = self.get_plates(hotelId=hotel_id)
+        return [plate for plate in plates if plate.get("nestId") in nest_ids]
+
+    def create_plate(
+        self, name: str, barcode: str, plate_type: str, nest_id: Optional[int]
+    ) -> Dict[str, Any]:
+        """Create a plate and assign it to a nest."""
+        data = {
+            "name": name,
+            "barcode": barcode,
+            "plateType": plate_type,
+            "nestId": nest_id,
+        }
+        return self.create("/api/inventory/plates", "create plate", json=data)
+
+    def update_plate(self, plate_id: int, nest_id: Optional[int]) -> Dict[str, Any]:
+        """Update a plate's nest assignment."""
+        return self.put(
+            f"/api/inventory/plates/{plate_id}",
+            "update plate",
+            json={"nestId": nest_id},
+        )
+
+    def unassign_plate(self, plate_id: int) -> Dict[str, Any]:
+        """Unassign a plate from its nest (set nestId to null)."""
+        return self.put(
+            f"/api/inventory/plates/{plate_id}",
+            "unassign plate",
+            json={"nestId": None},
+        )
+
+    def delete_plate(self, plate_id: int) -> Dict[str, Any]:
+        """Delete a plate entirely."""
+        return self.delete(f"/api/inventory/plates/{plate_id}", "delete plate")
+
+    def create_or_update_plate(
+        self, name: str, barcode: str, plate_type: str, nest_id: int
+    ) -> Tuple[Dict[str, Any], str]:
+        """Create a plate or update existing one. Returns (plate, status)."""
+        existing = self.get_plate_by_barcode(barcode)
+        if existing:
+            return self.update_plate(existing["id"], nest_id), "updated"
+
+        try:
+            return self.create_plate(name, barcode, plate_type, nest_id), "created"
+        except GalagoApiError as e:
+            if e.status_code != 409:
+                raise
+            # Conflict - plate exists (maybe with different name but same barcode)
+            # Try to find it again with fresh data
+            existing = self.get_plate_by_barcode(barcode)
+            if existing:
+                return self.update_plate(existing["id"], nest_id), "updated"
+            # Conflict - barcode/name exists in another workcell
+            return (
+                {"name": name, "barcode": barcode, "id": "existing"},
+                "exists_other_workcell",
+            )
+
+    def bulk_upsert_plates(
+        self, hotel_id: int, items: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Create or move plates into a hotel in one transaction, keyed by barcode.
+
+        Each item has name, barcode, plateType, row and column. Returns one
+        result per item, in order, with status "created", "updated" or
+        "name_conflict" (another barcode in the workcell has the name).
+        """
+        data = {"hotelId": hotel_id, "items": items}
+        result = self.post("/api/inventory/plates/bulk", "bulk upsert plates", json=data)
+        return result["results"]
+
+    def clear_hotel_plates(
+        self, hotel: Any, mode: str = "unassign", plate_ids: Optional[List[int]] = None
+    ) -> Dict[str, Any]:
+        """Unassign ("unassign") or delete ("delete") every plate in a hotel.
+
+        ``hotel`` is a hotel id or name. With ``plate_ids`` (up to 1000) only
+        those plates are cleared, if they are in the hotel. The server clears
+        them in one statement and returns the affected plates.
+        """
+        data: Dict[str, Any] = {"hotel": hotel, "mode": mode}
+        if plate_ids is not None:
+            data["plateIds"] = plate_ids
+        return self.post("/api/inventory/plates/clear", "clear hotel plates", json=data)
+
+    # ==================== CHANGES ====================
+
+    def get_inventory_changes(
+        self, since: int = 0, wait: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Fetch the hotels, nests and plates changed after sequence number ``since``.
+
+        Returns {seq, full, workcellId, hotels, nests, plates, deleted}. With
+        ``full`` set the response holds every row and replaces a local copy.
+        With ``wait`` the controller holds the request for up to that many
+        seconds until something changed (a long poll); an unchanged ``seq``
+        in the response means the wait ran out.
+        """
+        params: Dict[str, Any] = {"since": since}
+        timeout = self.timeout
+        if wait:
+            params["wait"] = wait
+            timeout = (self.timeout[0], self.timeout[1] + wait)
+        return self.get(
+            "/api/inventory/changes", "fetch inventory changes", params=params, timeout=timeout
+        )
+
+    # ==================== VARIABLES ====================
+
+    def get_variables(self, names: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Fetch variables of the selected workcell, optionally only ``names``."""
+        if names is None:
+            return self.get("/api/variables", "fetch variables")
+        if not names:
+            return []
+        params = {"names": ",".join(names)}
+        return self.get("/api/variables", "fetch variables", params=params)
+
+    def get_variable(self, name: str) -> Optional[Dict[str, Any]]:
+        """Fetch one variable by name, or None if it does not exist."""
+        try:
+            return self.get(f"/api/variables/{name}", f"fetch variable '{name}'")
+        except GalagoApiError as e:
+            if e.status_code == 404:
+                return None
+            raise
+
+    def create_variable(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a variable from {name, value, type}."""
+        return self.post("/api/variables", "create variable", json=data)
+
+    def update_variable(self, name: str, value: str) -> Dict[str, Any]:
+        """Set a variable's value."""
+        return self.put(
+            f"/api/variables/{name}", f"update variable '{name}'", json={"value": value}
+        )
+
+    def upsert_variables(self, variables: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create many variables or overwrite their values in one request.
+
+        Each item has name, value and type. An existing variable keeps its
+        type: an item of another type fails the request with 400. Returns {"created": [...names],
+        "updated": [...names], "variables": [...rows]}.
+        """
+        return self.put("/api/variables", "upsert variables", json=variables)
+
+    # ==================== TOOLS ====================
+
+    def get_tools(self) -> List[Dict[str, Any]]:
+        """Fetch every tool of the selected workcell."""
+        return self.get("/api/tools", "fetch tools")
+
+    def get_tool(self, tool_name: str) -> Dict[str, Any]:
+        """Fetch a tool by name or id."""
+        return self.get(f"/api/tools/{tool_name}", f"fetch tool '{tool_name}'")
+
+    # ==================== ROBOT ARM ====================
+
+    def get_locations(self, tool_id: Any) -> List[Dict[str, Any]]:
+        """Fetch all robot arm locations for a tool (id or name)."""
+        return self.get(
+            "/api/robot-arm/locations", "fetch locations", params={"toolId": tool_id}
+        )
+
+    def create_location(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a robot arm location."""
+        return self.create("/api/robot-arm/locations", "create location", json=data)
+
+    def bulk_create_locations(
+        self, tool_id: int, locations: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """Create many locations of one tool in one transaction.
+
+        Each location has name, locationType, coordinates and orientation.
+        Returns {toolId, inserted, results} with one result per location, in
+        order, with status "inserted" (and its id), "duplicate_name" or
+        "invalid" (and an error).
+        """
+        data = {"toolId": tool_id, "locations": locations}
+        return self.post("/api/robot-arm/locations/bulk", "bulk create locations", json=data)
+
+    def update_location(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update a robot arm location. ``data`` must include its id."""
+        return self.put("/api/robot-arm/locations", "update location", json=data)
+
+    def delete_location(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Delete a robot arm location. ``data`` holds its id and toolId."""
+        return self.delete("/api/robot-arm/locations", "delete location", json=data)
@@ -1,50 +1,86 @@
 """
 Script to import robot arm locations from a GBG XML Locations file
+
+Usage:
+    python gbg_pf400_locations_uploader.py [--sync] [--delete-missing] [--resume]
+    python gbg_pf400_locations_uploader.py --batch DIR_OR_GLOB [--map FILE=TOOL ...] [--resume]
+
+    Both forms also take --skip-near-duplicates.
+
+Options:
+    --sync              Only send locations that are new or whose joints changed
+    --delete-missing    With --sync, also delete tool locations not in the file
+    --resume            Continue an interrupted import: skip locations the
+                        checkpoint journal marks as imported
+    --batch DIR_OR_GLOB Import every XML file in a directory (or matching a
+                        glob), each into its own PF400: files are parsed in
+                        worker processes and the arms are uploaded in parallel
+    --map FILE=TOOL     With --batch, the tool for a file (default: the file
+                        name without .xml); may be repeated
+    --skip-near-duplicates
+                        Skip points whose joints match an earlier point's
+                        (they are only reported otherwise)
+
+Locations with non-numeric, all-zero or out-of-range joints (see
+location_checks.py for the PF400 limits) are skipped in every mode.
 """
 
+import array
+import glob
+import itertools
 import os
 import sys
 import xml.etree.ElementTree as ET
-from typing import Any, Dict, List
+from collections import deque
+from concurrent.futures import (
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
 
-import requests
+import location_checks
+from checkpoint_journal import CheckpointJournal, journal_path_for
+from galago_api import GalagoApiError, GalagoClient
 
-API_BASE_URL = os.getenv("GALAGO_API_URL", "http://localhost:3010")
+client = GalagoClient()
 
+# Element names (without namespace) that hold a single teach point
+LOCATION_TAGS = ("JointLocation", "Location")
+JOINT_COUNT = 6
 
-def get_tool_by_name(tool_name: str):
-    """Fetch tool by name and validate it's a pf400."""
-    try:
-        url = f"{API_BASE_URL}/api/tools/{tool_name}"
-        print(f"Fetching tool info from: {url}")
-        response = requests.get(url)
-        response.raise_for_status()
-        tool = response.json()
-
-        # Verify it's a pf400 type tool
-        if tool.get("type") != "pf400":
-            raise Exception(
-                f"Tool '{tool_name}' is type '{tool.get('type')}', but must be type 'pf400'"
-            )
+# Location uploads kept in flight at once (1 uploads serially)
+UPLOAD_CONCURRENCY = 4
 
-        print(f"✓ Found tool: {tool['name']} (ID: {tool['id']}, Type: {tool['type']})")
-        return tool
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to fetch tool '{tool_name}': {str(e)}")
+# Locations per bulk insert request (the controller accepts up to 1000)
+LOCATION_BATCH_SIZE = 500
 
+# Max per-joint difference for a taught point to count as unchanged in --sync
+JOINT_TOLERANCE = 0.001
 
-def create_location(data: Dict[str, Any]) -> Dict[str, Any]:
-    """Create a location via the API."""
-    try:
-        response = requests.post(
-            f"{API_BASE_URL}/api/robot-arm/locations",
-            json=data,
-            headers={"Content-Type": "application/json"},
+# Past tense of each upload action, for progress messages
+ACTION_DONE = {
+    "import": "Imported",
+    "create": "Created",
+    "update": "Updated",
+    "delete": "Deleted",
+}
+
+
+def get_tool_by_name(tool_name: str):
+    """Fetch tool by name and validate it's a pf400."""
+    print(f"Fetching tool info from: {client.base_url}/api/tools/{tool_name}")
+    tool = client.get_tool(tool_name)
+
+    # Verify it's a pf400 type tool
+    if tool.get("type") != "pf400":
+        raise Exception(
+            f"Tool '{tool_name}' is type '{tool.get('type')}', but must be type 'pf400'"
         )
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"Failed to create location: {str(e)}")
+
+    print(f"✓ Found tool: {tool['name']} (ID: {tool['id']}, Type: {tool['type']})")
+    return tool
 
 
 def is_valid_location_name(name: str) -> bool:
@@ -57,107 +93,748 @@ def is_valid_location_name(name: str) -> bool:
     return True
 
 
-def are_all_joints_zero(joints: List[str]) -> bool:
-    """Check if all joint values are zero."""
-    try:
-        return all(float(joint) == 0.0 for joint in joints)
-    except ValueError:
-        return False
-
+def local_name(tag: str) -> str:
+    """Strip the '{namespace}' prefix from an element tag."""
+    return tag.rsplit("}", 1)[-1]
 
-def parse_and_import_xml(file_path: str, tool_id: int):
-    """Parse XML file and import locations."""
-    print(f"Reading XML file: {file_path}")
 
-    # Parse XML file
-    tree = ET.parse(file_path)
-    root = tree.getroot()
+def location_record(elem: ET.Element) -> Dict[str, Any]:
+    """Normalize a location element into {'name': ..., 'joints': [...]}."""
+    fields: Dict[str, Optional[str]] = {
+        local_name(child.tag): child.text for child in elem
+    }
+    joints = [
+        (fields.get(f"Joint{i}") or "").strip() or "0"
+        for i in range(1, JOINT_COUNT + 1)
+    ]
+    return {"name": fields.get("Name"), "joints": joints}
 
-    # Find all Location elements
-    # Handle both with and without namespace
-    locations = root.findall(
-        ".//{http://www.w3.org/2001/XMLSchema-instance}JointLocation"
-    ) or root.findall(".//Location")
 
-    if not locations:
-        # Try without namespace prefix
-        locations = [elem for elem in root.iter() if "Location" in elem.tag]
+def iter_location_records(file_path: str) -> Iterator[Dict[str, Any]]:
+    """Stream location records out of a GBG XML file in a single pass.
 
-    print(f"Found {len(locations)} locations in XML file")
+    Namespaced and plain JointLocation/Location elements are both matched.
+    Every finished subtree outside a location is detached from its parent as
+    soon as it closes, so memory stays flat regardless of file size.
+    """
+    open_elems: List[ET.Element] = []
+    location_depth = 0
 
-    imported = 0
-    skipped = 0
-    errors = []
+    for event, elem in ET.iterparse(file_path, events=("start", "end")):
+        is_location = local_name(elem.tag) in LOCATION_TAGS
 
-    for location in locations:
-        # Get name
-        name_elem = location.find("Name")
-        if name_elem is None or name_elem.text is None:
-            skipped += 1
-            print("⏭️  Skipped: Empty or invalid name")
+        if event == "start":
+            open_elems.append(elem)
+            if is_location:
+                location_depth += 1
             continue
 
-        name = name_elem.text
+        open_elems.pop()
+        if is_location:
+            location_depth -= 1
+            if location_depth == 0:
+                yield location_record(elem)
+
+        # Children of a location are kept until the location itself closes
+        if location_depth == 0 and open_elems:
+            open_elems[-1].remove(elem)
+
+
+def screen_joints(
+    names: List[str],
+    values: "array.array",
+    stats: Dict[str, int],
+    skip_near_duplicates: bool = False,
+) -> Tuple[Set[int], Dict[int, str]]:
+    """Find locations whose joints can't be taught and flag near-duplicate points.
+
+    ``values`` holds each location's joint_values() in the order of
+    ``names``, and all of them are checked at once (see location_checks.py):
+    non-numeric, all-zero and out-of-range joints are skipped and counted in
+    ``stats["skipped"]``. A point within DUPLICATE_TOLERANCE of an earlier
+    point with another name is reported and counted in
+    ``stats["near_duplicates"]``, and with ``skip_near_duplicates`` skipped.
+    Without NumPy only all-zero joints are checked. Returns the indexes to
+    skip and a message per index.
+    """
+    notes: Dict[int, str] = {}
+    if not location_checks.available():
+        for i, name in enumerate(names):
+            row = values[i * JOINT_COUNT : (i + 1) * JOINT_COUNT]
+            if all(value == 0 for value in row):
+                notes[i] = f"⏭️  Skipped: '{name}' (all joints are zero)"
+        stats["skipped"] += len(notes)
+        return set(notes), notes
+
+    joints = location_checks.joint_array(values)
+    problems = location_checks.joint_problems(joints)
+    for i in problems["non_numeric"].nonzero()[0]:
+        notes[int(i)] = f"⏭️  Skipped: '{names[i]}' (non-numeric joints)"
+    for i in problems["all_zero"].nonzero()[0]:
+        notes[int(i)] = f"⏭️  Skipped: '{names[i]}' (all joints are zero)"
+    limits = location_checks.PF400_JOINT_LIMITS
+    for i in problems["out_of_range"].nonzero()[0]:
+        detail = ", ".join(
+            f"joint {j + 1} = {joints[i, j]:g} outside {limits[j][0]:g}..{limits[j][1]:g}"
+            for j in problems["out_of_range_joints"][i].nonzero()[0]
+        )
+        notes[int(i)] = f"⏭️  Skipped: '{names[i]}' ({detail})"
+    skipped = set(notes)
+    stats["skipped"] += len(skipped)
+
+    # Only points that would be imported are compared
+    joints[list(skipped)] = float("nan")
+    tolerance = location_checks.DUPLICATE_TOLERANCE
+    for first, later in location_checks.find_near_duplicates(joints, tolerance):
+        name, first_name = names[later], names[first]
+        if name == first_name:
+            continue
+        stats["near_duplicates"] += 1
+        if skip_near_duplicates:
+            skipped.add(later)
+            stats["skipped"] += 1
+            notes[later] = f"⏭️  Skipped: '{name}' (same joints as '{first_name}')"
+        else:
+            notes[later] = (
+                f"⚠️  '{name}' has the same joints as '{first_name}' (within {tolerance:g})"
+            )
+    return skipped, notes
+
+
+def screen_file(
+    file_path: str,
+    stats: Dict[str, int],
+    echo: Callable[[str], None] = print,
+    skip_near_duplicates: bool = False,
+    skipped_names: Optional[Set[str]] = None,
+) -> bytearray:
+    """Read the file once and flag, per location record, whether to import it.
+
+    Only the names and the joints as doubles are kept while reading, not
+    the records. Locations without a usable name are skipped, the rest are
+    checked by screen_joints(). Counts every location in ``stats["total"]``
+    and the skipped ones in ``stats["skipped"]``. The messages are echoed
+    afterwards in the order of the file. The names of skipped locations are
+    added to ``skipped_names`` when given.
+    """
+    notes: Dict[int, str] = {}
+    names: List[str] = []
+    # Record position (in the file) of each named location
+    positions = array.array("q")
+    values = array.array("d")
+
+    for position, location in enumerate(iter_location_records(file_path)):
+        stats["total"] += 1
+        name = location["name"]
+
+        if name is None:
+            notes[position] = "⏭️  Skipped: Empty or invalid name"
+            continue
 
         # Skip invalid names
         if not is_valid_location_name(name):
-            skipped += 1
-            print(f"⏭️  Skipped: '{name}' (invalid name)")
+            notes[position] = f"⏭️  Skipped: '{name}' (invalid name)"
+            if skipped_names is not None:
+                skipped_names.add(name)
             continue
 
-        # Extract joint values
-        joints = []
-        for i in range(1, 7):
-            joint_elem = location.find(f"Joint{i}")
-            if joint_elem is not None and joint_elem.text:
-                joints.append(joint_elem.text.strip())
-            else:
-                joints.append("0")
+        names.append(name)
+        positions.append(position)
+        values.extend(location_checks.joint_values(location["joints"]))
+    stats["skipped"] += len(notes)
+
+    skipped, joint_notes = screen_joints(names, values, stats, skip_near_duplicates)
+    for i, note in joint_notes.items():
+        notes[positions[i]] = note
+    if skipped_names is not None:
+        skipped_names.update(names[i] for i in skipped)
+
+    keep = bytearray(stats["total"])
+    for i, position in enumerate(positions):
+        if i not in skipped:
+            keep[position] = 1
+
+    for position in sorted(notes):
+        echo(notes[position])
+    return keep
+
+
+def load_importable_locations(
+    file_path: str,
+    stats: Dict[str, int],
+    echo: Callable[[str], None] = print,
+    skip_near_duplicates: bool = False,
+    skipped_names: Optional[Set[str]] = None,
+) -> Iterator[Tuple[str, List[str]]]:
+    """(name, joints) for every location in the file worth importing.
+
+    Screening needs every point, so the file is read twice: screen_file()
+    goes through it first, then the kept locations are streamed from a
+    second pass as the caller consumes them.
+    """
+    keep = screen_file(file_path, stats, echo, skip_near_duplicates, skipped_names)
+    for location, kept in zip(iter_location_records(file_path), keep):
+        if kept:
+            yield location["name"], location["joints"]
+
+
+def run_uploads(
+    operations: Iterable[Tuple[str, str, Callable[[Any], Any], Any]],
+    concurrency: int = UPLOAD_CONCURRENCY,
+    echo: Callable[[str], None] = print,
+) -> Tuple[Dict[str, int], List[str]]:
+    """Run (name, action, fn, payload) operations with bounded concurrency.
+
+    Up to ``concurrency`` requests run at once. Results are reported in the
+    order the operations were given, whatever order the requests finish in.
+    Returns the success count per action and the error messages.
+    """
+    concurrency = max(concurrency, 1)
+    done: Dict[str, int] = {action: 0 for action in ACTION_DONE}
+    errors: List[str] = []
+    pending: Deque[Tuple[str, str, Future]] = deque()
+
+    def report_next() -> None:
+        name, action, future = pending.popleft()
+        try:
+            future.result()
+            done[action] += 1
+            echo(f"✅ {ACTION_DONE[action]}: '{name}'")
+        except Exception as e:
+            error_msg = f"❌ Failed to {action} '{name}': {str(e)}"
+            errors.append(error_msg)
+            echo(error_msg)
 
-        # Skip if all joints are zero
-        if are_all_joints_zero(joints):
-            skipped += 1
-            print(f"⏭️  Skipped: '{name}' (all joints are zero)")
-            continue
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for name, action, fn, payload in operations:
+            pending.append((name, action, pool.submit(fn, payload)))
+            # Keep a bounded window so a huge file never queues every request at once
+            if len(pending) >= 2 * concurrency:
+                report_next()
 
-        # Create location data
-        location_data = {
-            "name": name,
-            "locationType": "j",
-            "coordinates": " ".join(joints),
-            "orientation": "landscape",
-            "toolId": tool_id,
-        }
+        while pending:
+            report_next()
 
-        try:
-            create_location(location_data)
+    return done, errors
+
+
+def location_payload(name: str, joints: List[str], tool_id: int) -> Dict[str, Any]:
+    """Build the API body for a joint location."""
+    return {
+        "name": name,
+        "locationType": "j",
+        "coordinates": " ".join(joints),
+        "orientation": "landscape",
+        "toolId": tool_id,
+    }
+
+
+def print_errors(errors: List[str]) -> None:
+    if errors:
+        print("\nErrors:")
+        for error in errors:
+            print(error)
+
+
+def journaled(
+    journal: CheckpointJournal, name: str, fn: Callable[[Any], Any]
+) -> Callable[[Any], Any]:
+    """Wrap an upload so the journal records it as started and then done."""
+
+    def run(payload: Any) -> Any:
+        journal.start(name)
+        result = fn(payload)
+        journal.done(name)
+        return result
+
+    return run
+
+
+def verify_in_flight(
+    journal: CheckpointJournal, tool_id: int, echo: Callable[[str], None] = print
+) -> None:
+    """Mark in-flight locations from the last run done if the server has them.
+
+    Only the few uploads that were in flight when the last run died are
+    uncertain; one fetch of the tool's locations settles all of them.
+    """
+    in_flight = journal.in_flight()
+    if not in_flight:
+        return
+    echo(f"Re-verifying {len(in_flight)} location(s) in flight when the last run stopped")
+    existing = {loc["name"] for loc in client.get_locations(tool_id)}
+    for name in in_flight:
+        if name in existing:
+            journal.done(name)
+            echo(f"✓ Already on server: '{name}'")
+
+
+def iter_batches(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    batch: List[Any] = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_batch(
+    journal: CheckpointJournal,
+    tool_id: int,
+    batch: List[Dict[str, Any]],
+    echo: Callable[[str], None] = print,
+) -> Tuple[int, int, List[str]]:
+    """Send one batch to the bulk endpoint and journal the outcome per location.
+
+    Returns (imported, already on server, error messages). Locations the
+    server already has count as done, so a resumed run does not resend them.
+    """
+    for payload in batch:
+        journal.start(payload["name"])
+    result = client.bulk_create_locations(
+        tool_id, [{k: v for k, v in payload.items() if k != "toolId"} for payload in batch]
+    )
+
+    imported = existing = 0
+    errors: List[str] = []
+    for item in result["results"]:
+        name = item["name"]
+        if item["status"] == "inserted":
+            journal.done(name)
             imported += 1
-            print(f"✅ Imported: '{name}'")
-        except Exception as e:
-            error_msg = f"❌ Failed to import '{name}': {str(e)}"
+            echo(f"✅ Imported: '{name}'")
+        elif item["status"] == "duplicate_name":
+            journal.done(name)
+            existing += 1
+            echo(f"⏭️  Skipped: '{name}' (already exists for this tool)")
+        else:
+            error_msg = f"❌ Failed to import '{name}': {item.get('error', 'invalid location')}"
             errors.append(error_msg)
-            print(error_msg)
+            echo(error_msg)
+    return imported, existing, errors
+
+
+def import_locations(
+    locations: Iterable[Tuple[str, List[str]]],
+    tool_id: int,
+    journal: CheckpointJournal,
+    stats: Dict[str, int],
+    concurrency: int = UPLOAD_CONCURRENCY,
+    batch_size: int = LOCATION_BATCH_SIZE,
+    echo: Callable[[str], None] = print,
+) -> List[str]:
+    """Import (name, joints) locations into a tool; returns the error messages.
+
+    Locations the journal marks as done are skipped. The rest are sent in
+    batches of ``batch_size`` to the bulk endpoint, or one request per
+    location, ``concurrency`` at a time, to controllers without it. Counts
+    go into ``stats`` ("resumed", "imported", "existing").
+    """
+    errors: List[str] = []
+
+    def pending_payloads() -> Iterator[Dict[str, Any]]:
+        for name, joints in locations:
+            if journal.is_done(name):
+                stats["resumed"] += 1
+                continue
+            yield location_payload(name, joints, tool_id)
+
+    def one_by_one(payloads: Iterable[Dict[str, Any]]) -> None:
+        operations = (
+            (p["name"], "import", journaled(journal, p["name"], client.create_location), p)
+            for p in payloads
+        )
+        done, upload_errors = run_uploads(operations, concurrency, echo)
+        stats["imported"] += done["import"]
+        errors.extend(upload_errors)
+
+    payloads = pending_payloads()
+    for batch in iter_batches(payloads, batch_size):
+        try:
+            imported, existing, batch_errors = import_batch(journal, tool_id, batch, echo)
+        except GalagoApiError as e:
+            if e.status_code not in (404, 405):
+                raise
+            # Older controller without the bulk endpoint
+            echo("Bulk endpoint not available; importing locations one by one")
+            one_by_one(itertools.chain(batch, payloads))
+            break
+        stats["imported"] += imported
+        stats["existing"] += existing
+        errors.extend(batch_errors)
+    return errors
+
+
+def import_journal(
+    file_path: str, tool_id: int, resume: bool, journal_path: Optional[str] = None
+) -> CheckpointJournal:
+    """Open the checkpoint journal of importing ``file_path`` into a tool."""
+    job = f"gbg-import tool {tool_id} {os.path.abspath(file_path)}"
+    return CheckpointJournal(journal_path or journal_path_for(job), job, resume)
+
+
+def new_import_stats() -> Dict[str, int]:
+    return {
+        "total": 0,
+        "skipped": 0,
+        "near_duplicates": 0,
+        "resumed": 0,
+        "imported": 0,
+        "existing": 0,
+    }
+
+
+def parse_and_import_xml(
+    file_path: str,
+    tool_id: int,
+    concurrency: int = UPLOAD_CONCURRENCY,
+    resume: bool = False,
+    journal_path: Optional[str] = None,
+    batch_size: int = LOCATION_BATCH_SIZE,
+    skip_near_duplicates: bool = False,
+):
+    """Parse XML file and import locations.
+
+    Locations are sent in batches of ``batch_size`` to the bulk endpoint,
+    which inserts each batch in one transaction and reports duplicates and
+    invalid coordinates per location. Controllers without the bulk endpoint
+    get one request per location, ``concurrency`` at a time.
+
+    Every import is recorded in a checkpoint journal. With ``resume``,
+    locations the journal marks as imported are skipped without a request.
+    The journal is removed once an import finishes without errors.
+    """
+    print(f"Reading XML file: {file_path}")
+
+    journal = import_journal(file_path, tool_id, resume, journal_path)
+    if resume:
+        print(f"Resuming from journal: {journal.path} ({journal.done_count()} done)")
+        verify_in_flight(journal, tool_id)
+
+    stats = new_import_stats()
+    with journal:
+        locations = load_importable_locations(
+            file_path, stats, skip_near_duplicates=skip_near_duplicates
+        )
+        errors = import_locations(
+            locations, tool_id, journal, stats, concurrency, batch_size
+        )
+    if not errors:
+        journal.remove()
 
     # Print summary
     print("\n" + "=" * 50)
     print("Import Summary:")
-    print(f"Total locations in file: {len(locations)}")
-    print(f"Successfully imported: {imported}")
-    print(f"Skipped: {skipped}")
+    print(f"Total locations in file: {stats['total']}")
+    print(f"Successfully imported: {stats['imported']}")
+    if stats["existing"]:
+        print(f"Already on server: {stats['existing']}")
+    if resume:
+        print(f"Already imported (journal): {stats['resumed']}")
+    print(f"Skipped: {stats['skipped']}")
+    if stats["near_duplicates"]:
+        print(f"Near-duplicate points: {stats['near_duplicates']}")
     print(f"Errors: {len(errors)}")
     print("=" * 50)
 
-    if errors:
-        print("\nErrors:")
-        for error in errors:
-            print(error)
+    print_errors(errors)
+
+
+def joints_match(coordinates: str, joints: List[str], tolerance: float) -> bool:
+    """Compare a stored coordinate string with file joints within a tolerance."""
+    try:
+        stored = [float(value) for value in coordinates.split()]
+        wanted = [float(value) for value in joints]
+    except ValueError:
+        return False
+    if len(stored) != len(wanted):
+        return False
+    return all(abs(a - b) <= tolerance for a, b in zip(stored, wanted))
+
+
+def sync_locations(
+    file_path: str,
+    tool_id: int,
+    tolerance: float = JOINT_TOLERANCE,
+    delete_missing: bool = False,
+    concurrency: int = UPLOAD_CONCURRENCY,
+    skip_near_duplicates: bool = False,
+):
+    """Sync a tool's locations to the file, sending only what changed.
+
+    Existing locations are fetched once and matched by name. New names are
+    created, names whose joints moved by more than ``tolerance`` are updated,
+    and with ``delete_missing`` names that are no longer in the file are
+    deleted. Names that are in the file but skipped by screening are never
+    deleted. Unchanged locations cost no requests.
+    """
+    print(f"Reading XML file: {file_path}")
+
+    existing = {loc["name"]: loc for loc in client.get_locations(tool_id)}
+    print(f"Tool has {len(existing)} existing locations")
+
+    stats = {"total": 0, "skipped": 0, "near_duplicates": 0, "unchanged": 0, "kept": 0}
+    seen = set()
+    screened = set()
+
+    def plan() -> Iterator[Tuple[str, str, Callable[[Any], Any], Any]]:
+        locations = load_importable_locations(
+            file_path, stats, skip_near_duplicates=skip_near_duplicates, skipped_names=screened
+        )
+        for name, joints in locations:
+            if name in seen:
+                stats["skipped"] += 1
+                print(f"⏭️  Skipped: '{name}' (duplicate name in file)")
+                continue
+            seen.add(name)
+
+            current = existing.get(name)
+            if current is None:
+                payload = location_payload(name, joints, tool_id)
+                yield name, "create", client.create_location, payload
+            elif current.get("locationType") != "j" or not joints_match(
+                current.get("coordinates", ""), joints, tolerance
+            ):
+                payload = {
+                    "id": current["id"],
+                    "locationType": "j",
+                    "coordinates": " ".join(joints),
+                }
+                yield name, "update", client.update_location, payload
+            else:
+                stats["unchanged"] += 1
+
+        if delete_missing:
+            for name, current in existing.items():
+                if name in seen:
+                    continue
+                if name in screened:
+                    stats["kept"] += 1
+                else:
+                    payload = {"id": current["id"], "toolId": tool_id}
+                    yield name, "delete", client.delete_location, payload
+
+    done, errors = run_uploads(plan(), concurrency)
+
+    # Print summary
+    print("\n" + "=" * 50)
+    print("Sync Summary:")
+    print(f"Total locations in file: {stats['total']}")
+    print(f"Created: {done['create']}")
+    print(f"Updated: {done['update']}")
+    print(f"Unchanged: {stats['unchanged']}")
+    if delete_missing:
+        print(f"Deleted: {done['delete']}")
+        print(f"Not deleted (skipped in file): {stats['kept']}")
+    print(f"Skipped: {stats['skipped']}")
+    if stats["near_duplicates"]:
+        print(f"Near-duplicate points: {stats['near_duplicates']}")
+    print(f"Errors: {len(errors)}")
+    print("=" * 50)
+
+    print_errors(errors)
+
+
+# A parsed file: importable (name, joints) pairs, parse stats and skip messages
+ParsedFile = Tuple[List[Tuple[str, List[str]]], Dict[str, int], List[str]]
+
+
+def parse_locations_file(file_path: str, skip_near_duplicates: bool = False) -> ParsedFile:
+    """Parse one GBG file (run in a worker process).
+
+    Returns the importable (name, joints) pairs, the parse stats and the
+    skip messages, which the parent prints in the arm's report.
+    """
+    stats = new_import_stats()
+    messages: List[str] = []
+    locations = list(
+        load_importable_locations(file_path, stats, messages.append, skip_near_duplicates)
+    )
+    return locations, stats, messages
+
+
+def batch_files(source: str, tool_map: Dict[str, str]) -> List[Tuple[str, str]]:
+    """(file, tool name) for every XML file in a directory or matching a glob.
+
+    A file's tool is its ``tool_map`` entry (keyed by file name, with or
+    without the .xml extension) or else its file name without the extension.
+    """
+    pattern = os.path.join(source, "*.xml") if os.path.isdir(source) else source
+    assignments = []
+    for file_path in sorted(glob.glob(pattern)):
+        file_name = os.path.basename(file_path)
+        stem = os.path.splitext(file_name)[0]
+        assignments.append((file_path, tool_map.get(file_name) or tool_map.get(stem) or stem))
+    return assignments
+
+
+def import_arm(
+    file_path: str,
+    tool: Dict[str, Any],
+    parsed: ParsedFile,
+    resume: bool,
+    concurrency: int,
+) -> Dict[str, Any]:
+    """Upload one parsed file into its arm; returns the arm's report."""
+    locations, stats, messages = parsed
+    journal = import_journal(file_path, tool["id"], resume)
+    try:
+        with journal:
+            if resume:
+                verify_in_flight(journal, tool["id"], messages.append)
+            errors = import_locations(
+                locations, tool["id"], journal, stats, concurrency, echo=messages.append
+            )
+        if not errors:
+            journal.remove()
+    except Exception as e:
+        errors = [f"❌ Import into '{tool['name']}' failed: {str(e)}"]
+    return {
+        "file": file_path,
+        "tool": tool,
+        "stats": stats,
+        "messages": messages,
+        "errors": errors,
+    }
+
+
+def import_batch_files(
+    assignments: List[Tuple[str, str]],
+    resume: bool = False,
+    concurrency: int = UPLOAD_CONCURRENCY,
+    workers: Optional[int] = None,
+    skip_near_duplicates: bool = False,
+) -> bool:
+    """Import several GBG files, each into its own arm, in parallel.
+
+    Tools are resolved with one request, files are parsed in worker
+    processes, and each arm's upload starts as soon as its file is parsed,
+    alongside the others. Prints one report per arm and a summary table;
+    returns False if any arm had errors.
+    """
+    tools = {tool["name"]: tool for tool in client.get_tools()}
+    problems = []
+    for file_path, tool_name in assignments:
+        tool = tools.get(tool_name)
+        if tool is None:
+            problems.append(f"No tool '{tool_name}' for {file_path}")
+        elif tool.get("type") != "pf400":
+            problems.append(f"Tool '{tool_name}' is type '{tool.get('type')}', not 'pf400'")
+    if problems:
+        for problem in problems:
+            print(f"Error: {problem}")
+        return False
+
+    print(f"Importing {len(assignments)} file(s) into {len({t for _, t in assignments})} arm(s)")
+    reports: List[Dict[str, Any]] = []
+    uploaders = ThreadPoolExecutor(max_workers=len(assignments))
+    with ProcessPoolExecutor(max_workers=workers) as parsers, uploaders:
+        parsing = {
+            parsers.submit(parse_locations_file, file_path, skip_near_duplicates): (
+                file_path,
+                tools[tool_name],
+            )
+            for file_path, tool_name in assignments
+        }
+        uploads: List[Future] = []
+        for future in as_completed(parsing):
+            file_path, tool = parsing[future]
+            try:
+                parsed = future.result()
+            except Exception as e:
+                error_msg = f"❌ Failed to parse {file_path}: {str(e)}"
+                reports.append(
+                    {
+                        "file": file_path,
+                        "tool": tool,
+                        "stats": new_import_stats(),
+                        "messages": [],
+                        "errors": [error_msg],
+                    }
+                )
+                continue
+            print(f"Parsed {file_path}: {len(parsed[0])} location(s) for '{tool['name']}'")
+            uploads.append(
+                uploaders.submit(import_arm, file_path, tool, parsed, resume, concurrency)
+            )
+        reports.extend(upload.result() for upload in uploads)
+
+    reports.sort(key=lambda report: (report["tool"]["name"], report["file"]))
+    for report in reports:
+        print(f"\n--- {report['tool']['name']} <- {report['file']} ---")
+        for message in report["messages"]:
+            print(message)
+        print_errors(report["errors"])
+
+    # Print summary
+    print("\n" + "=" * 50)
+    print("Batch Import Summary:")
+    for report in reports:
+        stats = report["stats"]
+        line = (
+            f"{report['tool']['name']}: {stats['imported']} imported, "
+            f"{stats['existing']} already on server, {stats['skipped']} skipped, "
+            f"{stats['near_duplicates']} near-duplicate points, "
+            f"{len(report['errors'])} errors (of {stats['total']} in "
+            f"{os.path.basename(report['file'])})"
+        )
+        if resume:
+            line += f", {stats['resumed']} already imported (journal)"
+        print(line)
+    print("=" * 50)
+
+    return not any(report["errors"] for report in reports)
+
+
+def option_values(argv: List[str], option: str) -> List[str]:
+    """Values given for a repeatable ``--option VALUE`` argument."""
+    return [argv[i + 1] for i, arg in enumerate(argv[:-1]) if arg == option]
 
 
 def main():
     """Main function."""
+    batch = option_values(sys.argv, "--batch")
+    skip_near_duplicates = "--skip-near-duplicates" in sys.argv
+    if batch:
+        tool_map: Dict[str, str] = {}
+        for value in option_values(sys.argv, "--map"):
+            file_name, sep, tool_name = value.partition("=")
+            if not sep or not file_name or not tool_name:
+                print(f"Error: --map expects FILE=TOOL, got: {value}")
+                print(
+                    "Usage: python gbg_pf400_locations_uploader.py --batch DIR_OR_GLOB "
+                    "[--map FILE=TOOL ...] [--resume]"
+                )
+                sys.exit(1)
+            tool_map[file_name] = tool_name
+        assignments = batch_files(batch[0], tool_map)
+        if not assignments:
+            print(f"Error: No XML files found for: {batch[0]}")
+            sys.exit(1)
+        batch_names = set()
+        for file_path, _ in assignments:
+            file_name = os.path.basename(file_path)
+            batch_names.update((file_name, os.path.splitext(file_name)[0]))
+        for file_name in tool_map:
+            if file_name not in batch_names:
+                print(f"⚠️  --map {file_name}=... matches no file in the batch")
+        if not import_batch_files(
+            assignments,
+            resume="--resume" in sys.argv,
+            skip_near_duplicates=skip_near_duplicates,
+        ):
+            sys.exit(1)
+        print("\n✨ Import completed!")
+        return
 
     file_path = "/Users/<username>/Downloads/PreciseArm Locations.xml"
     tool_name = "Pf400"
+    sync = "--sync" in sys.argv
+    delete_missing = "--delete-missing" in sys.argv
+    resume = "--resume" in sys.argv
 
     tool = get_tool_by_name(tool_name)
     if not tool:
@@ -172,7 +849,17 @@ def main():
         sys.exit(1)
 
     try:
-        parse_and_import_xml(file_path, tool_id)
+        if sync:
+            sync_locations(
+                file_path,
+                tool_id,
+                delete_missing=delete_missing,
+                skip_near_duplicates=skip_near_duplicates,
+            )
+        else:
+            parse_and_import_xml(
+                file_path, tool_id, resume=resume, skip_near_duplicates=skip_near_duplicates
+            )
         print("\n✨ Import completed!")
     except Exception as e:
         print(f"\n❌ Import failed: {str(e)}")
@@ -0,0 +1,219 @@
+"""
+Declarative reconciler for the plates in a hotel.
+
+Instead of looking up and writing row by row, a script describes the layout
+it wants (hotel name and size, and a barcode for each row/column position)
+and the reconciler:
+
+1. reads the current state once: the hotel, its nests and the plates in
+   them (plus the workcell's plates, only if a wanted barcode is not
+   already in the hotel),
+2. computes the smallest set of operations that reaches the layout: create
+   the hotel (with its nest grid), create missing nests, create or move
+   plates, and unassign plates sitting where another plate belongs (all of
+   them in one batched step),
+3. prints that plan, so it can be reviewed as a dry run, and
+4. leaves execution to the caller, which only sends those operations.
+
+A hotel that already matches the layout produces an empty plan.
+"""
+
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from galago_api import GalagoClient
+
+Position = Tuple[int, int]
+
+
+class LayoutPlan:
+    """Operations that bring one hotel to its desired layout."""
+
+    def __init__(self, hotel_name: str):
+        self.hotel_name = hotel_name
+        # Existing hotel, or None when it has to be created
+        self.hotel: Optional[Dict[str, Any]] = None
+        self.create_hotel: Optional[Dict[str, int]] = None
+        self.create_nests: List[Position] = []
+        # Plate items ({name, barcode, plateType, row, column}) that are new
+        self.create_plates: List[Dict[str, Any]] = []
+        # (item, current plate) pairs for plates that exist but sit elsewhere
+        self.move_plates: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        # Plates to take out of the hotel
+        self.unassign_plates: List[Dict[str, Any]] = []
+        self.unchanged = 0
+
+    @property
+    def plate_items(self) -> List[Dict[str, Any]]:
+        """Items to send to the plate upsert: every create and move, by row."""
+        items = self.create_plates + [item for item, _ in self.move_plates]
+        return sorted(items, key=lambda item: (item["row"], item["column"]))
+
+    @property
+    def unassign_plate_ids(self) -> List[int]:
+        """Ids of the plates to unassign, sent together in one clear request."""
+        return [plate["id"] for plate in self.unassign_plates]
+
+    @property
+    def operation_count(self) -> int:
+        return (
+            (1 if self.create_hotel else 0)
+            + len(self.create_nests)
+            + len(self.create_plates)
+            + len(self.move_plates)
+            + len(self.unassign_plates)
+        )
+
+    def is_empty(self) -> bool:
+        return self.operation_count == 0
+
+    def print(self) -> None:
+        """Print the plan as a dry-run listing."""
+        print(f"\nPlan for hotel '{self.hotel_name}':")
+        if self.create_hotel:
+            size = self.create_hotel
+            print(
+                f"  + create hotel '{self.hotel_name}' ({size['rows']}x{size['columns']}) "
+                f"with its {size['rows'] * size['columns']} nests"
+            )
+        for row, column in self.create_nests:
+            print(f"  + create nest at row {row}, column {column}")
+        if self.unassign_plates:
+            print(f"  - unassign {len(self.unassign_plates)} plate(s) in one batch:")
+        for plate in self.unassign_plates:
+            print(f"    - unassign plate '{plate_label(plate)}' (ID: {plate['id']})")
+        for item, plate in self.move_plates:
+            print(
+                f"  ~ move plate '{item['barcode']}' (ID: {plate['id']}) "
+                f"to row {item['row']}, column {item['column']}"
+            )
+        for item in self.create_plates:
+            print(
+                f"  + create plate '{item['barcode']}' "
+                f"at row {item['row']}, column {item['column']}"
+            )
+        print(
+            f"  {self.operation_count} operation(s); "
+            f"{self.unchanged} plate(s) already in place"
+        )
+
+
+def plate_label(plate: Dict[str, Any]) -> str:
+    """Human readable name for a plate."""
+    return plate.get("name") or plate.get("barcode") or f"ID:{plate['id']}"
+
+
+def row_in_grid(position: Position, rows: int, columns: int) -> bool:
+    """True if a (row, column) position lies inside a rows x columns hotel."""
+    return 0 <= position[0] < rows and 0 <= position[1] < columns
+
+
+def read_hotel_state(
+    client: GalagoClient, hotel_name: str, barcodes: Set[str]
+) -> Dict[str, Any]:
+    """Read what the plan needs to know about a hotel and the wanted barcodes.
+
+    Returns the hotel (or None), its nests, the plates in those nests, and
+    ``other_plates_by_barcode`` for wanted barcodes found outside the hotel.
+    ``client`` may also be a synced InventoryMirror.
+    """
+    hotel = client.get_hotel_by_name(hotel_name)
+    nests: List[Dict[str, Any]] = []
+    hotel_plates: List[Dict[str, Any]] = []
+    if hotel:
+        nests = client.get_nests_by_hotel(hotel["id"])
+        nest_ids = {nest["id"] for nest in nests}
+        if nest_ids:
+            hotel_plates = [
+                plate
+                for plate in client.get_plates(hotelId=hotel["id"])
+                if plate.get("nestId") in nest_ids
+            ]
+
+    # Only barcodes not already in the hotel need a workcell-wide lookup
+    missing = barcodes - {plate.get("barcode") for plate in hotel_plates}
+    other_plates_by_barcode: Dict[str, Dict[str, Any]] = {}
+    if missing:
+        for plate in client.get_plates():
+            if plate.get("barcode") in missing:
+                other_plates_by_barcode[plate["barcode"]] = plate
+
+    return {
+        "hotel": hotel,
+        "nests": nests,
+        "hotel_plates": hotel_plates,
+        "other_plates_by_barcode": other_plates_by_barcode,
+    }
+
+
+def compute_plan(
+    state: Dict[str, Any],
+    hotel_name: str,
+    rows: int,
+    columns: int,
+    items: List[Dict[str, Any]],
+    prune: bool = False,
+) -> LayoutPlan:
+    """Diff the desired plate items against ``state`` (see read_hotel_state).
+
+    ``items`` are {name, barcode, plateType, row, column} dicts, one per
+    wanted position. Plates occupying a wanted position under another
+    barcode are unassigned. With ``prune``, so are plates in the hotel that
+    are not part of the layout at all.
+    """
+    plan = LayoutPlan(hotel_name)
+    plan.hotel = state["hotel"]
+    if plan.hotel is None:
+        plan.create_hotel = {"rows": rows, "columns": columns}
+
+    nests_by_position: Dict[Position, Dict[str, Any]] = {
+        (nest["row"], nest["column"]): nest for nest in state["nests"]
+    }
+    position_by_nest_id = {nest["id"]: pos for pos, nest in nests_by_position.items()}
+    hotel_plates_by_barcode = {
+        plate["barcode"]: plate for plate in state["hotel_plates"] if plate.get("barcode")
+    }
+    wanted_positions: Dict[Position, str] = {
+        (item["row"], item["column"]): item["barcode"] for item in items
+    }
+    wanted_barcodes = set(wanted_positions.values())
+
+    for item in items:
+        position = (item["row"], item["column"])
+        nest = nests_by_position.get(position)
+        # A new hotel comes with every nest of its grid
+        in_new_grid = plan.create_hotel is not None and row_in_grid(position, rows, columns)
+        if nest is None and not in_new_grid and position not in plan.create_nests:
+            plan.create_nests.append(position)
+
+        current = hotel_plates_by_barcode.get(item["barcode"])
+        if current is None:
+            current = state["other_plates_by_barcode"].get(item["barcode"])
+
+        if current is None:
+            plan.create_plates.append(item)
+        elif nest is not None and current.get("nestId") == nest["id"]:
+            plan.unchanged += 1
+        else:
+            plan.move_plates.append((item, current))
+
+    for plate in state["hotel_plates"]:
+        if plate.get("barcode") in wanted_barcodes:
+            continue
+        position = position_by_nest_id.get(plate.get("nestId"))
+        if prune or position in wanted_positions:
+            plan.unassign_plates.append(plate)
+
+    return plan
+
+
+def plan_hotel_layout(
+    client: GalagoClient,
+    hotel_name: str,
+    rows: int,
+    columns: int,
+    items: List[Dict[str, Any]],
+    prune: bool = False,
+) -> LayoutPlan:
+    """Read the hotel's current state and compute the plan to reach ``items``."""
+    state = read_hotel_state(client, hotel_name, {item["barcode"] for item in items})
+    return compute_plan(state, hotel_name, rows, columns, items, prune)
@@ -0,0 +1,221 @@
+"""
+Live in-memory view of the inventory, kept current by the change feed.
+
+Long-running helpers that look plates and nests up (a scan loop, a warm
+worker) would otherwise re-download ``/api/inventory/plates`` and
+``/nests`` to see what the UI or other scripts changed, or go stale.
+InventoryFeed loads the hotels, nests and plates once and then follows
+``/api/inventory/changes`` in a background thread with long polls: each
+request waits on the controller until something changed after the last
+sequence number and brings back only those rows, so an idle inventory
+costs one request per wait period and a change shows up within a poll.
+
+Lookups are answered from memory with the same names and filter semantics
+as the GalagoClient read methods (see inventory_mirror.py, which holds the
+rows), so a started feed can be passed wherever a client is only read from.
+
+The feed uses a client of its own: a long poll keeps its request open for
+the whole wait and must not take a slot from the script's client.
+
+Usage:
+    python inventory_feed.py    # print inventory changes as they happen
+
+Environment:
+- GALAGO_INVENTORY_FEED_WAIT: Seconds each long poll waits for a change (default 25)
+"""
+
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from galago_api import API_BASE_URL, GalagoApiError, GalagoClient
+from inventory_mirror import InventoryMirror
+
+FEED_WAIT = float(os.getenv("GALAGO_INVENTORY_FEED_WAIT", "25"))
+
+# Seconds between full reloads from a controller without the change feed
+FALLBACK_POLL_S = 10.0
+
+# Longest pause between retries while the controller can't be reached
+MAX_RETRY_DELAY_S = 30.0
+
+# Extra time stop() gives a long poll in progress to come back
+STOP_MARGIN_S = 5.0
+
+
+class InventoryFeed:
+    """Inventory lookups from memory, updated in the background by long polls."""
+
+    def __init__(
+        self,
+        client: Optional[GalagoClient] = None,
+        wait: float = FEED_WAIT,
+        on_change: Optional[Callable[[Dict[str, Any]], None]] = None,
+    ):
+        base_url = client.base_url if client else API_BASE_URL
+        self.client = GalagoClient(base_url=base_url, report_metrics=False, adaptive=False)
+        self.mirror = InventoryMirror(self.client, ":memory:", check_same_thread=False)
+        self.wait = wait
+        self.on_change = on_change
+        # Last error of the background thread; None while the feed is current
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "InventoryFeed":
+        """Load the inventory, then follow its changes in the background."""
+        self._apply(self._fetch())
+        self._thread = threading.Thread(
+            target=self._follow, name="inventory-feed", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        # Drops the idle pooled connections; a long poll in progress still runs
+        # until the controller answers it, at the latest after ``wait``
+        self.client.close()
+        if self._thread:
+            self._thread.join(timeout=self.wait + STOP_MARGIN_S)
+        with self._lock:
+            self.mirror.close()
+
+    def __enter__(self) -> "InventoryFeed":
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    @property
+    def seq(self) -> int:
+        """Change sequence number the feed is up to date with."""
+        with self._lock:
+            return self.mirror.seq
+
+    def _fetch(self, wait: Optional[float] = None) -> Dict[str, Any]:
+        # The mirror's connection is shared with lookups: read where to start
+        # under the lock, then wait on the controller without holding it
+        with self._lock:
+            cursor = self.mirror.cursor()
+        return self.mirror.fetch(wait, cursor)
+
+    def _apply(self, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._stop.is_set():
+                return None
+            return self.mirror.apply(changes)
+
+    def _follow(self) -> None:
+        delay = 1.0
+        while not self._stop.is_set():
+            try:
+                changes = self._fetch(self.wait)
+                result = self._apply(changes)
+                if result is None:
+                    break
+                if self.on_change and (result["full"] or result["upserted"] or result["deleted"]):
+                    self.on_change(result)
+            except Exception as e:
+                # Unreachable controller, a malformed response or a failing
+                # callback: report it and retry, the thread must keep running
+                if self._stop.is_set():
+                    break
+                self.error = str(e) if isinstance(e, GalagoApiError) else repr(e)
+                self._stop.wait(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY_S)
+                continue
+            self.error = None
+            delay = 1.0
+
+            if changes["seq"] == 0:
+                # No change log to wait on (older controller or none yet): reload later
+                self._stop.wait(FALLBACK_POLL_S)
+
+    # ==================== LOOKUPS ====================
+
+    def _read(self, method: str, *args: Any, **kwargs: Any) -> Any:
+        with self._lock:
+            return getattr(self.mirror, method)(*args, **kwargs)
+
+    def get_hotels(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Hotels matching every filter (e.g. ``name="Hotel 1"``)."""
+        return self._read("get_hotels", fields, **filters)
+
+    def get_hotel_by_name(self, hotel_name: str) -> Optional[Dict[str, Any]]:
+        """Find a hotel by name."""
+        return self._read("get_hotel_by_name", hotel_name)
+
+    def get_nests(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Nests matching every filter (hotelId, toolId, row, column, name)."""
+        return self._read("get_nests", fields, **filters)
+
+    def get_nests_by_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all nests belonging to a hotel."""
+        return self._read("get_nests_by_hotel", hotel_id)
+
+    def get_nest_by_position(
+        self, hotel_id: int, row: int, column: int
+    ) -> Optional[Dict[str, Any]]:
+        """Find a nest by its position in a hotel."""
+        return self._read("get_nest_by_position", hotel_id, row, column)
+
+    def get_plates(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Plates matching every filter; hotelId/toolId match the plate's nest."""
+        return self._read("get_plates", fields, **filters)
+
+    def get_plate_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Find a plate by barcode."""
+        return self._read("get_plate_by_barcode", barcode)
+
+    def get_plates_in_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all plates assigned to nests in a hotel."""
+        return self._read("get_plates_in_hotel", hotel_id)
+
+    def count(self, table: str) -> int:
+        return self._read("count", table)
+
+
+def main():
+    """Follow the inventory and print each change until interrupted."""
+
+    def report(result: Dict[str, Any]) -> None:
+        kind = "full reload" if result["full"] else "change"
+        print(
+            f"seq {result['seq']}: {kind}, {result['upserted']} changed, "
+            f"{result['deleted']} deleted (hotels {feed.count('hotels')}, "
+            f"nests {feed.count('nests')}, plates {feed.count('plates')})"
+        )
+
+    feed = InventoryFeed(on_change=report)
+    try:
+        feed.start()
+    except GalagoApiError as e:
+        print(f"Error: {str(e)}")
+        sys.exit(1)
+
+    print(
+        f"Following inventory at {feed.client.base_url} from seq {feed.seq} "
+        f"(hotels {feed.count('hotels')}, nests {feed.count('nests')}, "
+        f"plates {feed.count('plates')}); Ctrl+C to stop"
+    )
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        feed.stop()
+
+
+if __name__ == "__main__":
+    main()
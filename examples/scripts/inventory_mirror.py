@@ -0,0 +1,294 @@
+"""
+Persistent on-disk mirror of the hotel/nest/plate inventory.
+
+Keeps the hotels, nests and plates of the selected workcell in a local
+SQLite file together with the controller's change sequence number (the
+high-water mark). Each sync asks ``/api/inventory/changes?since=<seq>`` for
+the rows changed or deleted since the last run and applies only those, so a
+script that starts cold downloads a handful of rows instead of every table.
+
+Lookups are answered from indexed local tables and have the same names and
+filter semantics as the GalagoClient read methods, so a synced mirror can be
+passed wherever a client is only read from (e.g. plan_hotel_layout).
+
+The mirror starts over with a full download when it is new, when the
+workcell or controller URL changed, or when the controller answers with a
+full response (its change log no longer covers our sequence number).
+Controllers without the changes endpoint are mirrored with full list loads.
+A ``path`` of ":memory:" keeps the mirror in memory only (see inventory_feed.py).
+
+Environment:
+- GALAGO_INVENTORY_MIRROR: SQLite file to keep the mirror in; unset disables it
+"""
+
+import json
+import os
+import sqlite3
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from galago_api import GalagoApiError, GalagoClient
+
+MIRROR_PATH = os.getenv("GALAGO_INVENTORY_MIRROR")
+
+TABLES = ("hotels", "nests", "plates")
+
+# Filterable fields per table, mapped to their indexed local columns
+FILTER_COLUMNS: Dict[str, Dict[str, str]] = {
+    "hotels": {"id": "id", "name": "name"},
+    "nests": {
+        "id": "id",
+        "name": "name",
+        "hotelId": "hotel_id",
+        "toolId": "tool_id",
+        "row": "row",
+        "column": "col",
+    },
+    "plates": {"id": "id", "name": "name", "barcode": "barcode", "nestId": "nest_id"},
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS hotels (id INTEGER PRIMARY KEY, name TEXT, data TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS hotels_name_idx ON hotels (name);
+CREATE TABLE IF NOT EXISTS nests (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    hotel_id INTEGER,
+    tool_id INTEGER,
+    row INTEGER,
+    col INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS nests_hotel_position_idx ON nests (hotel_id, row, col);
+CREATE INDEX IF NOT EXISTS nests_tool_idx ON nests (tool_id);
+CREATE TABLE IF NOT EXISTS plates (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    barcode TEXT,
+    nest_id INTEGER,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plates_barcode_idx ON plates (barcode);
+CREATE INDEX IF NOT EXISTS plates_name_idx ON plates (name);
+CREATE INDEX IF NOT EXISTS plates_nest_idx ON plates (nest_id);
+"""
+
+
+class InventoryMirror:
+    """Local SQLite copy of the inventory, brought up to date by sync()."""
+
+    def __init__(self, client: GalagoClient, path: str, check_same_thread: bool = True):
+        self.client = client
+        self.path = path
+        if path != ":memory:":
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=check_same_thread)
+        self.conn.executescript(SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "InventoryMirror":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    # ==================== SYNC ====================
+
+    @property
+    def seq(self) -> int:
+        """Change sequence number the mirror is up to date with (0 when empty)."""
+        return int(self._get_meta("seq") or 0)
+
+    def sync(self, wait: Optional[float] = None) -> Dict[str, Any]:
+        """Apply the changes since the last sync.
+
+        With ``wait`` the controller holds the request for up to that many
+        seconds until there is a change. Returns {full, upserted, deleted,
+        seq} describing what was applied.
+        """
+        return self.apply(self.fetch(wait))
+
+    def cursor(self) -> Dict[str, Any]:
+        """Where the next fetch() starts: {since, workcell_id} from the last applied sync."""
+        same_api = self._get_meta("api_url") == self.client.base_url
+        return {
+            "since": self.seq if same_api else 0,
+            "workcell_id": self._get_meta("workcell_id"),
+        }
+
+    def fetch(
+        self, wait: Optional[float] = None, cursor: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Download the changes since the last applied sync, without applying them.
+
+        ``cursor`` (see cursor()) lets a caller that shares the connection
+        across threads read it under its own lock; the download then does
+        not touch the database.
+        """
+        if cursor is None:
+            cursor = self.cursor()
+        changes = self._fetch_changes(cursor["since"], wait)
+        if not changes["full"] and str(changes["workcellId"]) != cursor["workcell_id"]:
+            # Another workcell was selected since the last run
+            changes = self._fetch_changes(0)
+        return changes
+
+    def apply(self, changes: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply a response of fetch() in one transaction."""
+        upserted = deleted = 0
+        with self.conn:
+            if changes["full"]:
+                for table in TABLES:
+                    self.conn.execute(f"DELETE FROM {table}")
+            for table in TABLES:
+                self._upsert(table, changes[table])
+                upserted += len(changes[table])
+                ids = changes["deleted"][table]
+                self.conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(i,) for i in ids])
+                deleted += len(ids)
+            self._set_meta("seq", changes["seq"])
+            self._set_meta("workcell_id", changes["workcellId"])
+            self._set_meta("api_url", self.client.base_url)
+
+        return {
+            "full": changes["full"],
+            "upserted": upserted,
+            "deleted": deleted,
+            "seq": changes["seq"],
+        }
+
+    def _fetch_changes(self, since: int, wait: Optional[float] = None) -> Dict[str, Any]:
+        try:
+            return self.client.get_inventory_changes(since, wait)
+        except GalagoApiError as e:
+            if e.status_code not in (404, 405):
+                raise
+        # Older controller: mirror full lists; seq 0 makes every sync a full one
+        return {
+            "seq": 0,
+            "full": True,
+            "workcellId": None,
+            "hotels": self.client.get_hotels(fields=None),
+            "nests": self.client.get_nests(fields=None),
+            "plates": self.client.get_plates(fields=None),
+            "deleted": {table: [] for table in TABLES},
+        }
+
+    def _upsert(self, table: str, rows: List[Dict[str, Any]]) -> None:
+        columns = FILTER_COLUMNS[table]
+        names = list(columns.values()) + ["data"]
+        placeholders = ", ".join("?" for _ in names)
+        self.conn.executemany(
+            f"INSERT OR REPLACE INTO {table} ({', '.join(names)}) VALUES ({placeholders})",
+            [[row.get(field) for field in columns] + [json.dumps(row)] for row in rows],
+        )
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        found = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return found[0] if found else None
+
+    def _set_meta(self, key: str, value: Any) -> None:
+        self.conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    # ==================== LOOKUPS ====================
+
+    def _select(
+        self,
+        table: str,
+        fields: Optional[Sequence[str]],
+        filters: Dict[str, Any],
+        extra: Optional[Tuple[str, List[Any]]] = None,
+    ) -> List[Dict[str, Any]]:
+        columns = FILTER_COLUMNS[table]
+        unknown = [name for name in filters if name not in columns]
+        if unknown:
+            raise ValueError(f"Unknown {table} filters: {', '.join(unknown)}")
+
+        conditions = [f"{columns[name]} IS ?" for name in filters]
+        params = list(filters.values())
+        if extra:
+            conditions.append(extra[0])
+            params += extra[1]
+        sql = f"SELECT data FROM {table}"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        rows = [json.loads(data) for (data,) in self.conn.execute(sql, params)]
+        if fields:
+            rows = [{field: row.get(field) for field in fields} for row in rows]
+        return rows
+
+    def get_hotels(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Hotels matching every filter (e.g. ``name="Hotel 1"``)."""
+        return self._select("hotels", fields, filters)
+
+    def get_hotel_by_name(self, hotel_name: str) -> Optional[Dict[str, Any]]:
+        """Find a hotel by name."""
+        hotels = self.get_hotels(name=hotel_name)
+        return hotels[0] if hotels else None
+
+    def get_nests(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Nests matching every filter (hotelId, toolId, row, column, name)."""
+        return self._select("nests", fields, filters)
+
+    def get_nests_by_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all nests belonging to a hotel."""
+        return self.get_nests(hotelId=hotel_id)
+
+    def get_nest_by_position(
+        self, hotel_id: int, row: int, column: int
+    ) -> Optional[Dict[str, Any]]:
+        """Find a nest by its position in a hotel."""
+        nests = self.get_nests(hotelId=hotel_id, row=row, column=column)
+        return nests[0] if nests else None
+
+    def get_plates(
+        self, fields: Optional[Sequence[str]] = None, **filters: Any
+    ) -> List[Dict[str, Any]]:
+        """Plates matching every filter; hotelId/toolId match the plate's nest."""
+        nest_filters = [(key, filters.pop(key)) for key in ("hotelId", "toolId") if key in filters]
+        extra = None
+        if nest_filters:
+            columns = FILTER_COLUMNS["nests"]
+            where = " AND ".join(f"{columns[key]} = ?" for key, _ in nest_filters)
+            extra = (
+                f"nest_id IN (SELECT id FROM nests WHERE {where})",
+                [value for _, value in nest_filters],
+            )
+        return self._select("plates", fields, filters, extra)
+
+    def get_plate_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Find a plate by barcode."""
+        plates = self.get_plates(barcode=barcode)
+        return plates[0] if plates else None
+
+    def get_plates_in_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all plates assigned to nests in a hotel."""
+        return self.get_plates(hotelId=hotel_id)
+
+    def count(self, table: str) -> int:
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def synced_reader(
+    client: GalagoClient, path: Optional[str] = MIRROR_PATH
+) -> Union[GalagoClient, InventoryMirror]:
+    """The synced mirror when ``path`` is set (GALAGO_INVENTORY_MIRROR), else the client."""
+    if not path:
+        return client
+    mirror = InventoryMirror(client, path)
+    result = mirror.sync()
+    kind = "full download" if result["full"] else "delta"
+    print(
+        f"Inventory mirror synced ({kind}: {result['upserted']} changed, "
+        f"{result['deleted']} deleted; seq {result['seq']})"
+    )
+    return mirror
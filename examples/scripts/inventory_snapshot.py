@@ -0,0 +1,190 @@
+"""
+In-process snapshot of the hotel/nest/plate inventory.
+
+Loads hotels, nests and plates once and answers lookups from dict indexes
+instead of re-downloading a full table per lookup. Writes made through the
+snapshot go to the API and are applied to the local indexes; a 409 from a
+write means someone else changed the inventory, so the snapshot is dropped
+and reloaded before deciding what to do.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from galago_api import GalagoApiError, GalagoClient
+
+
+class InventorySnapshot:
+    """Indexed, write-through view of the inventory for one script run."""
+
+    def __init__(self, client: GalagoClient):
+        self.client = client
+        self._loaded = False
+        self.hotels_by_id: Dict[int, Dict[str, Any]] = {}
+        self.hotels_by_name: Dict[str, Dict[str, Any]] = {}
+        self.nests_by_id: Dict[int, Dict[str, Any]] = {}
+        self.nests_by_position: Dict[Tuple[int, int, int], Dict[str, Any]] = {}
+        self.plates_by_id: Dict[int, Dict[str, Any]] = {}
+        self.plates_by_barcode: Dict[str, Dict[str, Any]] = {}
+
+    # ==================== LOADING ====================
+
+    def load(self) -> None:
+        """Fetch hotels, nests and plates and rebuild every index."""
+        hotels = self.client.get_hotels()
+        nests = self.client.get_nests()
+        plates = self.client.get_plates()
+
+        self.hotels_by_id.clear()
+        self.hotels_by_name.clear()
+        self.nests_by_id.clear()
+        self.nests_by_position.clear()
+        self.plates_by_id.clear()
+        self.plates_by_barcode.clear()
+
+        for hotel in hotels:
+            self._index_hotel(hotel)
+        for nest in nests:
+            self._index_nest(nest)
+        for plate in plates:
+            self._index_plate(plate)
+
+        self._loaded = True
+
+    def invalidate(self) -> None:
+        """Drop the snapshot; the next lookup reloads it."""
+        self._loaded = False
+
+    def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            self.load()
+
+    def _index_hotel(self, hotel: Dict[str, Any]) -> None:
+        self.hotels_by_id[hotel["id"]] = hotel
+        if hotel.get("name") is not None:
+            self.hotels_by_name[hotel["name"]] = hotel
+
+    def _index_nest(self, nest: Dict[str, Any]) -> None:
+        self.nests_by_id[nest["id"]] = nest
+        if nest.get("hotelId") is not None:
+            key = (nest["hotelId"], nest["row"], nest["column"])
+            self.nests_by_position[key] = nest
+
+    def _index_plate(self, plate: Dict[str, Any]) -> None:
+        previous = self.plates_by_id.get(plate["id"])
+        if previous is not None:
+            self._unindex_plate(previous)
+
+        self.plates_by_id[plate["id"]] = plate
+        if plate.get("barcode") is not None:
+            self.plates_by_barcode[plate["barcode"]] = plate
+
+    def _unindex_plate(self, plate: Dict[str, Any]) -> None:
+        self.plates_by_id.pop(plate["id"], None)
+        if self.plates_by_barcode.get(plate.get("barcode")) is plate:
+            del self.plates_by_barcode[plate["barcode"]]
+
+    # ==================== LOOKUPS ====================
+
+    def get_hotel_by_name(self, hotel_name: str) -> Optional[Dict[str, Any]]:
+        """Find a hotel by name."""
+        self._ensure_loaded()
+        return self.hotels_by_name.get(hotel_name)
+
+    def get_nest_by_position(
+        self, hotel_id: int, row: int, column: int
+    ) -> Optional[Dict[str, Any]]:
+        """Find a nest by its position in a hotel."""
+        self._ensure_loaded()
+        return self.nests_by_position.get((hotel_id, row, column))
+
+    def get_nests_by_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all nests belonging to a hotel."""
+        self._ensure_loaded()
+        return [
+            nest for nest in self.nests_by_id.values() if nest.get("hotelId") == hotel_id
+        ]
+
+    def get_plate_by_barcode(self, barcode: str) -> Optional[Dict[str, Any]]:
+        """Find a plate by barcode."""
+        self._ensure_loaded()
+        return self.plates_by_barcode.get(barcode)
+
+    def get_plates_in_hotel(self, hotel_id: int) -> List[Dict[str, Any]]:
+        """Get all plates assigned to nests in a hotel."""
+        nest_ids = {nest["id"] for nest in self.get_nests_by_hotel(hotel_id)}
+        return [
+            plate
+            for plate in self.plates_by_id.values()
+            if plate.get("nestId") in nest_ids
+        ]
+
+    # ==================== WRITES ====================
+
+    def create_hotel(self, name: str, rows: int, columns: int) -> Dict[str, Any]:
+        """Create a new hotel and add it to the snapshot."""
+        self._ensure_loaded()
+        hotel = self._write(self.client.create_hotel, name, rows, columns)
+        self._index_hotel(hotel)
+        return hotel
+
+    def create_nest(
+        self, name: str, row: int, column: int, hotel_id: int
+    ) -> Dict[str, Any]:
+        """Create a nest in a hotel and add it to the snapshot."""
+        self._ensure_loaded()
+        nest = self._write(self.client.create_nest, name, row, column, hotel_id)
+        self._index_nest(nest)
+        return nest
+
+    def update_plate(self, plate_id: int, nest_id: Optional[int]) -> Dict[str, Any]:
+        """Update a plate's nest assignment and apply it to the snapshot."""
+        self._ensure_loaded()
+        plate = self._write(self.client.update_plate, plate_id, nest_id)
+        self._index_plate(plate)
+        return plate
+
+    def delete_plate(self, plate_id: int) -> None:
+        """Delete a plate and remove it from the snapshot."""
+        self._ensure_loaded()
+        self._write(self.client.delete_plate, plate_id)
+        plate = self.plates_by_id.get(plate_id)
+        if plate is not None:
+            self._unindex_plate(plate)
+
+    def create_or_update_plate(
+        self, name: str, barcode: str, plate_type: str, nest_id: int
+    ) -> Tuple[Dict[str, Any], str]:
+        """Create a plate or update existing one. Returns (plate, status)."""
+        existing = self.get_plate_by_barcode(barcode)
+        if existing:
+            return self.update_plate(existing["id"], nest_id), "updated"
+
+        try:
+            plate = self._write(
+                self.client.create_plate, name, barcode, plate_type, nest_id
+            )
+        except GalagoApiError as e:
+            if e.status_code != 409:
+                raise
+            # The snapshot was reloaded by _write, so this sees the fresh table
+            existing = self.get_plate_by_barcode(barcode)
+            if existing:
+                return self.update_plate(existing["id"], nest_id), "updated"
+            # Conflict - barcode/name exists in another workcell
+            return (
+                {"name": name, "barcode": barcode, "id": "existing"},
+                "exists_other_workcell",
+            )
+
+        self._index_plate(plate)
+        return plate, "created"
+
+    def _write(self, fn, *args: Any) -> Any:
+        """Run a write; on 409 the snapshot is stale, so reload it and re-raise."""
+        try:
+            return fn(*args)
+        except GalagoApiError as e:
+            if e.status_code == 409:
+                self.invalidate()
+                self.load()
+            raise
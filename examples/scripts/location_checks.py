@@ -0,0 +1,157 @@
+"""
+Vectorized checks for taught robot-arm joint locations.
+
+Takes every location's joints as one NumPy array (built up from a flat
+array of doubles while a file is read) and checks them all at once:
+non-numeric values, all-zero joint sets, joints outside the arm's limits,
+and near-duplicate teach points (different names, joints within a
+tolerance of each other). Near duplicates are found by sorting on the most
+spread-out joint and comparing each point only with the points within the
+tolerance along it, so tens of thousands of points take milliseconds
+instead of a pairwise loop.
+
+Environment:
+- GALAGO_PF400_JOINT_LIMITS: Joint limits as "min:max" per joint, comma
+  separated (e.g. "0:750,-93:93,10:350,-970:970,70:140,0:0")
+"""
+
+import array
+import math
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # Checks beyond all-zero joints need NumPy
+    np = None
+
+JOINT_COUNT = 6
+
+# Generous bounds on PF400 travel per joint: Z (mm), shoulder, elbow and wrist
+# (degrees), gripper (mm) and rail (mm). Set GALAGO_PF400_JOINT_LIMITS to the
+# limits in the arm's parameter database for a tighter check.
+DEFAULT_PF400_JOINT_LIMITS: Tuple[Tuple[float, float], ...] = (
+    (0.0, 1000.0),
+    (-100.0, 100.0),
+    (0.0, 360.0),
+    (-1000.0, 1000.0),
+    (0.0, 200.0),
+    (-2000.0, 2000.0),
+)
+
+# Max per-joint difference for two teach points to count as the same point
+DUPLICATE_TOLERANCE = 0.01
+
+# Candidate pairs compared per step of the near-duplicate sweep (bounds memory)
+PAIR_CHUNK = 1_000_000
+
+
+def parse_joint_limits(value: Optional[str]) -> Tuple[Tuple[float, float], ...]:
+    """Joint limits from a "min:max,min:max,..." string (defaults when unset)."""
+    if not value:
+        return DEFAULT_PF400_JOINT_LIMITS
+    limits = []
+    for part in value.split(","):
+        low, high = part.split(":")
+        limits.append((float(low), float(high)))
+    if len(limits) != JOINT_COUNT:
+        raise ValueError(f"Expected {JOINT_COUNT} joint limits, got {len(limits)}")
+    return tuple(limits)
+
+
+PF400_JOINT_LIMITS = parse_joint_limits(os.getenv("GALAGO_PF400_JOINT_LIMITS"))
+
+
+def available() -> bool:
+    return np is not None
+
+
+def joint_values(joints: Sequence[str]) -> List[float]:
+    """Floats of one location's joint strings; NaN where not a number."""
+    values = []
+    for joint in joints:
+        try:
+            value = float(joint)
+        except ValueError:
+            value = math.nan
+        # "nan"/"inf" parse as floats but are no more usable than text
+        values.append(value if math.isfinite(value) else math.nan)
+    return values
+
+
+def joint_array(values: "array.array") -> "np.ndarray":
+    """(n, JOINT_COUNT) view of joint_values() rows appended to a flat double array."""
+    return np.frombuffer(values, dtype=np.float64).reshape(-1, JOINT_COUNT)
+
+
+def joint_problems(
+    joints: "np.ndarray",
+    limits: Sequence[Tuple[float, float]] = PF400_JOINT_LIMITS,
+) -> Dict[str, "np.ndarray"]:
+    """Boolean masks over the rows of ``joints``.
+
+    "non_numeric": some joint is not a number; "all_zero": every joint is 0;
+    "out_of_range": some joint is outside ``limits`` (per-joint detail in
+    "out_of_range_joints", shape (n, JOINT_COUNT)).
+    """
+    bounds = np.asarray(limits, dtype=np.float64)
+    non_numeric = np.isnan(joints).any(axis=1)
+    all_zero = ~non_numeric & (joints == 0).all(axis=1)
+    with np.errstate(invalid="ignore"):
+        outside = (joints < bounds[:, 0]) | (joints > bounds[:, 1])
+    out_of_range = ~non_numeric & ~all_zero & outside.any(axis=1)
+    return {
+        "non_numeric": non_numeric,
+        "all_zero": all_zero,
+        "out_of_range": out_of_range,
+        "out_of_range_joints": outside & out_of_range[:, None],
+    }
+
+
+def find_near_duplicates(
+    joints: "np.ndarray", tolerance: float = DUPLICATE_TOLERANCE
+) -> List[Tuple[int, int]]:
+    """Pairs (first, later) of rows whose joints all differ by at most ``tolerance``.
+
+    Rows with NaN joints are ignored. Each later row is paired with the
+    earliest row it duplicates, so a cluster of k copies gives k - 1 pairs.
+    """
+    valid = np.flatnonzero(~np.isnan(joints).any(axis=1))
+    if len(valid) < 2:
+        return []
+    points = joints[valid]
+
+    # Sweep along the joint that separates the points best
+    cell = tolerance if tolerance > 0 else 1.0
+    spread = [len(np.unique(np.floor(points[:, d] / cell))) for d in range(JOINT_COUNT)]
+    axis = int(np.argmax(spread))
+    order = np.argsort(points[:, axis], kind="stable")
+    keys = points[order, axis]
+    points = points[order]
+
+    # For each point, the sorted points after it that are within reach on the key
+    ends = np.searchsorted(keys, keys + tolerance, side="right")
+    counts = ends - np.arange(1, len(keys) + 1)
+    total = np.cumsum(counts)
+
+    found: Dict[int, int] = {}
+    start = 0
+    while start < len(keys):
+        # Take as many points as fit in one chunk of candidate pairs (at least one)
+        done = total[start - 1] if start else 0
+        stop = max(int(np.searchsorted(total, done + PAIR_CHUNK, side="right")), start + 1)
+        chunk_counts = counts[start:stop]
+        left = np.repeat(np.arange(start, stop), chunk_counts)
+        # Offsets 1..count after each left point
+        offsets = np.arange(len(left)) - np.repeat(
+            np.cumsum(chunk_counts) - chunk_counts, chunk_counts
+        )
+        right = left + offsets + 1
+        close = np.abs(points[left] - points[right]).max(axis=1) <= tolerance
+        for a, b in zip(valid[order[left[close]]], valid[order[right[close]]]):
+            first, later = (int(a), int(b)) if a < b else (int(b), int(a))
+            if later not in found or first < found[later]:
+                found[later] = first
+        start = stop
+
+    return sorted(((first, later) for later, first in found.items()), key=lambda p: p[1])
@@ -0,0 +1,114 @@
+"""
+Single-pass reader for plate barcode manifests (Reader Assay V2).
+
+A manifest is a CSV with a header row whose barcode column is named
+"Barcode" (any case) or, failing that, is the first column. The file is read
+once, row by row: the header is validated up front, and each barcode is
+stripped and checked against the ones already seen. Only (row, barcode)
+pairs are kept, so a large manifest is never held as a list of row dicts,
+and the row count used to size the hotel comes from the same pass.
+"""
+
+import csv
+import io
+import os
+from typing import Iterator, List, Optional, TextIO, Tuple
+
+BARCODE_COLUMN = "Barcode"
+
+
+class ManifestError(Exception):
+    """The manifest is missing or its header is unusable."""
+
+
+class PlateManifest:
+    """Barcodes of a manifest keyed by their data row index.
+
+    ``entries`` holds (row, barcode) for every usable row. Rows without a
+    barcode and repeats of an earlier barcode are left out but still count
+    towards ``row_count``, so each barcode keeps the hotel row matching its
+    manifest row.
+    """
+
+    def __init__(self):
+        self.entries: List[Tuple[int, str]] = []
+        self.row_count = 0
+        self.blank_rows: List[int] = []
+        self.duplicate_rows: List[Tuple[int, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[Tuple[int, str]]:
+        return iter(self.entries)
+
+    # ==================== READING ====================
+
+    @classmethod
+    def from_stream(cls, stream: TextIO) -> "PlateManifest":
+        """Read a manifest from an open text stream in one pass."""
+        reader = csv.reader(stream)
+        header = next(reader, None)
+        barcode_idx = cls._barcode_index(header)
+
+        manifest = cls()
+        seen = set()
+        for fields in reader:
+            # Blank lines carry no row at all, as with csv.DictReader
+            if not fields:
+                continue
+            row_idx = manifest.row_count
+            manifest.row_count += 1
+
+            barcode = fields[barcode_idx].strip() if barcode_idx < len(fields) else ""
+            if not barcode:
+                manifest.blank_rows.append(row_idx)
+            elif barcode in seen:
+                manifest.duplicate_rows.append((row_idx, barcode))
+            else:
+                seen.add(barcode)
+                manifest.entries.append((row_idx, barcode))
+        return manifest
+
+    @classmethod
+    def from_text(cls, text: str) -> "PlateManifest":
+        """Read a manifest held in a string, e.g. the tmp_file variable."""
+        return cls.from_stream(io.StringIO(text.strip()))
+
+    @classmethod
+    def from_path(cls, path: str) -> "PlateManifest":
+        """Read a manifest file without loading it into memory first."""
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return cls.from_stream(f)
+
+    @classmethod
+    def load(cls, source: Optional[str]) -> "PlateManifest":
+        """Read a manifest from a file path or from CSV text.
+
+        A single-line ``source`` naming an existing file is read as a path;
+        anything else is treated as the CSV content itself.
+        """
+        if not source or not source.strip():
+            raise ManifestError("Manifest is empty")
+        if "\n" not in source and os.path.isfile(source.strip()):
+            return cls.from_path(source.strip())
+        return cls.from_text(source)
+
+    @staticmethod
+    def _barcode_index(header: Optional[List[str]]) -> int:
+        """Validate the header row and return the barcode column's index."""
+        if not header:
+            raise ManifestError("Manifest has no header row")
+
+        columns = [name.strip().lstrip("\ufeff") for name in header]
+        if not any(columns):
+            raise ManifestError("Manifest header row is empty")
+
+        duplicates = sorted({name for name in columns if name and columns.count(name) > 1})
+        if duplicates:
+            raise ManifestError(f"Duplicate manifest columns: {', '.join(duplicates)}")
+
+        for idx, name in enumerate(columns):
+            if name.lower() == BARCODE_COLUMN.lower():
+                return idx
+        return 0
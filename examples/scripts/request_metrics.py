@@ -0,0 +1,234 @@
+"""
+Per-request metrics for the Galago API client.
+
+GalagoClient records every call it makes (method, endpoint, status, latency
+and bytes each way) in a RequestMetrics. At the end of a script the
+metrics are printed as a "Request Metrics:" block with p50/p95/max latency,
+requests per second and bytes moved, overall and per endpoint. They can
+also be written as JSON or as a Prometheus textfile for the node exporter's
+textfile collector.
+
+Endpoints are recorded with numeric path segments replaced by "{id}", so
+"/api/inventory/plates/17" and "/api/inventory/plates/18" are grouped.
+"""
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Status recorded when a request failed without a response (timeout, reset, ...)
+NO_RESPONSE = 0
+
+
+def endpoint_for(path: str) -> str:
+    """Group a request path by replacing numeric segments with "{id}"."""
+    return re.sub(r"/\d+(?=/|$)", "/{id}", path.split("?", 1)[0])
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class RequestMetrics:
+    """Thread-safe record of every API call made by one client."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._records: List[Tuple[str, str, int, float, int, int]] = []
+        self._first_start: Optional[float] = None
+        self._last_end: Optional[float] = None
+
+    def record(
+        self,
+        method: str,
+        path: str,
+        status: int,
+        started: float,
+        ended: float,
+        bytes_sent: int,
+        bytes_received: int,
+    ) -> None:
+        """Record one call; ``started``/``ended`` are time.perf_counter() values."""
+        entry = (method, endpoint_for(path), status, ended - started, bytes_sent, bytes_received)
+        with self._lock:
+            self._records.append(entry)
+            if self._first_start is None or started < self._first_start:
+                self._first_start = started
+            if self._last_end is None or ended > self._last_end:
+                self._last_end = ended
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._records)
+
+    # ==================== AGGREGATION ====================
+
+    def summary(self) -> Dict[str, Any]:
+        """Aggregate the calls overall and per (method, endpoint)."""
+        with self._lock:
+            records = list(self._records)
+            elapsed = (
+                self._last_end - self._first_start
+                if self._first_start is not None and self._last_end is not None
+                else 0.0
+            )
+
+        groups: Dict[Tuple[str, str], List[Tuple[str, str, int, float, int, int]]] = {}
+        for entry in records:
+            groups.setdefault((entry[0], entry[1]), []).append(entry)
+
+        summary = self._aggregate(records)
+        summary["elapsed_s"] = round(elapsed, 3)
+        summary["requests_per_second"] = (
+            round(len(records) / elapsed, 2) if elapsed > 0 else 0.0
+        )
+        summary["endpoints"] = [
+            {"method": method, "endpoint": endpoint, **self._aggregate(entries)}
+            for (method, endpoint), entries in sorted(groups.items(), key=lambda g: g[0][1])
+        ]
+        return summary
+
+    @staticmethod
+    def _aggregate(records: List[Tuple[str, str, int, float, int, int]]) -> Dict[str, Any]:
+        latencies = sorted(entry[3] for entry in records)
+        statuses: Dict[str, int] = {}
+        for entry in records:
+            key = str(entry[2]) if entry[2] != NO_RESPONSE else "error"
+            statuses[key] = statuses.get(key, 0) + 1
+        return {
+            "requests": len(records),
+            "statuses": statuses,
+            "latency_ms": {
+                "p50": round(percentile(latencies, 50) * 1000, 2),
+                "p95": round(percentile(latencies, 95) * 1000, 2),
+                "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+                "total": round(sum(latencies) * 1000, 2),
+            },
+            "bytes_sent": sum(entry[4] for entry in records),
+            "bytes_received": sum(entry[5] for entry in records),
+        }
+
+    # ==================== OUTPUT ====================
+
+    def print_summary(self) -> None:
+        """Print the metrics in the same style as the scripts' Summary block."""
+        summary = self.summary()
+        latency = summary["latency_ms"]
+        print("\n" + "=" * 50)
+        print("Request Metrics:")
+        print(
+            f"  Requests: {summary['requests']} in {summary['elapsed_s']:.2f}s "
+            f"({summary['requests_per_second']:.1f} req/s)"
+        )
+        print(
+            f"  Latency: p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+            f"max {latency['max']:.1f} ms"
+        )
+        print(
+            f"  Bytes: {summary['bytes_sent'] / 1024:.1f} KB sent, "
+            f"{summary['bytes_received'] / 1024:.1f} KB received"
+        )
+        if summary["endpoints"]:
+            print("  By endpoint:")
+        for group in summary["endpoints"]:
+            latency = group["latency_ms"]
+            statuses = ", ".join(f"{s}x{n}" for s, n in sorted(group["statuses"].items()))
+            print(
+                f"    {group['method']} {group['endpoint']}: {group['requests']} req, "
+                f"p50 {latency['p50']:.1f} ms, p95 {latency['p95']:.1f} ms, "
+                f"max {latency['max']:.1f} ms [{statuses}]"
+            )
+        print("=" * 50)
+
+    def write_json(self, path: str) -> None:
+        """Write the summary as JSON."""
+        _write_atomic(path, json.dumps(self.summary(), indent=2) + "\n")
+
+    def write_prometheus(self, path: str, job: str = "galago_script") -> None:
+        """Write the summary in the Prometheus text exposition format.
+
+        Written to a temp file and renamed, so the textfile collector never
+        reads a partial file.
+        """
+        summary = self.summary()
+        lines = [
+            "# HELP galago_api_requests API requests made by the last script run.",
+            "# TYPE galago_api_requests gauge",
+        ]
+        for group in summary["endpoints"]:
+            for status, count in sorted(group["statuses"].items()):
+                labels = _labels(job, group, status=status)
+                lines.append(f"galago_api_requests{{{labels}}} {count}")
+
+        lines += [
+            "# HELP galago_api_request_latency_seconds API request latency.",
+            "# TYPE galago_api_request_latency_seconds summary",
+        ]
+        for group in summary["endpoints"]:
+            for key, quantile in (("p50", "0.5"), ("p95", "0.95"), ("max", "1")):
+                labels = _labels(job, group, quantile=quantile)
+                value = group["latency_ms"][key] / 1000
+                lines.append(f"galago_api_request_latency_seconds{{{labels}}} {value:.6f}")
+            labels = _labels(job, group)
+            total = group["latency_ms"]["total"] / 1000
+            lines += [
+                f"galago_api_request_latency_seconds_sum{{{labels}}} {total:.6f}",
+                f"galago_api_request_latency_seconds_count{{{labels}}} {group['requests']}",
+            ]
+
+        lines += [
+            "# HELP galago_api_body_bytes Request and response body bytes.",
+            "# TYPE galago_api_body_bytes gauge",
+        ]
+        for group in summary["endpoints"]:
+            for direction in ("sent", "received"):
+                labels = _labels(job, group, direction=direction)
+                value = group[f"bytes_{direction}"]
+                lines.append(f"galago_api_body_bytes{{{labels}}} {value}")
+
+        lines += [
+            "# HELP galago_api_requests_per_second Requests per second over the run.",
+            "# TYPE galago_api_requests_per_second gauge",
+            f'galago_api_requests_per_second{{job="{job}"}} {summary["requests_per_second"]}',
+            "# HELP galago_api_last_run_timestamp_seconds When the metrics were written.",
+            "# TYPE galago_api_last_run_timestamp_seconds gauge",
+            f'galago_api_last_run_timestamp_seconds{{job="{job}"}} {int(time.time())}',
+        ]
+        _write_atomic(path, "\n".join(lines) + "\n")
+
+    def write_file(self, path: str, job: str = "galago_script") -> None:
+        """Write JSON for a .json path, otherwise a Prometheus textfile."""
+        if path.endswith(".json"):
+            self.write_json(path)
+        else:
+            self.write_prometheus(path, job)
+
+
+def _labels(job: str, group: Dict[str, Any], **extra: str) -> str:
+    labels = {"job": job, "method": group["method"], "endpoint": group["endpoint"], **extra}
+    return ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write_atomic(path: str, content: str) -> None:
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".metrics")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
@@ -0,0 +1,65 @@
+"""
+Run-scoped read cache for workcell variables.
+
+A script step usually reads several variables. Instead of one request per
+get_variable call, VariableCache fetches every variable of the selected
+workcell once and answers reads locally. Writes go straight through to the
+server and update the cached row with what the server returned. Call
+refresh() to re-read everything, or invalidate() to re-read on next access.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from galago_api import GalagoClient
+
+
+class VariableCache:
+    """Prefetched, write-through view of the workcell's variables."""
+
+    def __init__(self, client: GalagoClient):
+        self.client = client
+        self._variables: Optional[Dict[str, Dict[str, Any]]] = None
+
+    def refresh(self) -> None:
+        """Fetch every variable from the server, replacing the cache."""
+        self._variables = {var["name"]: var for var in self.client.get_variables()}
+
+    def invalidate(self) -> None:
+        """Drop the cache; the next read fetches everything again."""
+        self._variables = None
+
+    def _cached(self) -> Dict[str, Dict[str, Any]]:
+        if self._variables is None:
+            self.refresh()
+        return self._variables
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Return the variable record, or None if it does not exist."""
+        return self._cached().get(name)
+
+    def value(self, name: str, default: Any = None) -> Any:
+        """Return the variable's raw string value, or ``default`` if missing."""
+        var = self.get(name)
+        return var["value"] if var else default
+
+    def set(self, name: str, value: str, var_type: str = "string") -> Dict[str, Any]:
+        """Write a variable through to the server, creating it if needed.
+
+        ``var_type`` is only used when the variable does not exist yet.
+        """
+        if name in self._cached():
+            var = self.client.update_variable(name, value)
+        else:
+            var = self.client.create_variable(
+                {"name": name, "value": value, "type": var_type}
+            )
+        self._cached()[name] = var
+        return var
+
+    def set_many(self, variables: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Create or overwrite many {name, value, type} variables in one request."""
+        result = self.client.upsert_variables(variables)
+        cached = self._cached()
+        for var in result["variables"]:
+            cached[var["name"]] = var
+        return result
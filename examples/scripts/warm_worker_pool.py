@@ -0,0 +1,393 @@
+"""
+Pool of warm Python workers for running short helper scripts.
+
+Running a script cold pays for interpreter startup and for importing
+requests, csv, xml.etree and the Galago client on every step, which is
+most of the wall time of a short helper. The pool keeps worker processes
+that have already imported those modules (and hold a connected
+GalagoClient), and runs each script in one of them:
+
+- every run gets a fresh ``__main__`` namespace, its own sys.argv and the
+  original working directory, and its stdout/stderr are captured,
+- ``sys.exit()`` ends the script, not the worker, and the script's atexit
+  handlers (e.g. the client's "Request Metrics:" block) run when it ends,
+- a worker is replaced after ``max_runs`` scripts, when its resident
+  memory grew by more than ``max_rss_growth_mb``, or when a script times out,
+- workers are ordinary (non-daemonic) processes, so scripts can start
+  processes of their own (e.g. a ProcessPoolExecutor); the pool stops them
+  when it is closed, or at interpreter exit if it never was.
+
+Scripts share the worker's imported modules, so module-level state in an
+imported helper lives on between runs; state in the script itself does not.
+A ``galago_client`` name is available to scripts that want the worker's
+warm client instead of creating their own.
+
+Usage:
+    python warm_worker_pool.py [--workers N] [--repeat N] SCRIPT [ARGS...]
+
+Environment:
+- GALAGO_WORKERS: Number of workers (default 2)
+- GALAGO_WORKER_MAX_RUNS: Scripts per worker before it is replaced (default 100)
+- GALAGO_WORKER_MAX_RSS_MB: Resident memory growth in MB that gets a worker
+  replaced (default 200; not checked where memory use can't be read)
+"""
+
+import atexit
+import builtins
+import contextlib
+import importlib
+import io
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+import types
+from multiprocessing.connection import Connection
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DEFAULT_WORKERS = int(os.getenv("GALAGO_WORKERS", "2"))
+DEFAULT_MAX_RUNS = int(os.getenv("GALAGO_WORKER_MAX_RUNS", "100"))
+DEFAULT_MAX_RSS_MB = float(os.getenv("GALAGO_WORKER_MAX_RSS_MB", "200"))
+
+# Imported once per worker, before its first script
+PRELOAD_MODULES = (
+    "csv",
+    "json",
+    "xml.etree.ElementTree",
+    "requests",
+    "galago_api",
+    "inventory_snapshot",
+    "variable_cache",
+)
+
+
+class ScriptResult:
+    """Outcome of one script run."""
+
+    def __init__(
+        self,
+        success: bool,
+        output: str,
+        exit_code: Optional[int] = 0,
+        error: Optional[str] = None,
+        duration_s: float = 0.0,
+    ):
+        self.success = success
+        self.output = output
+        self.exit_code = exit_code
+        self.error = error
+        self.duration_s = duration_s
+
+
+def _rss_mb() -> float:
+    """Current resident memory of this process in MB (0 where unknown).
+
+    Read from /proc on Linux. Elsewhere only the peak is available, which
+    still never misses growth but does not go down after a script frees memory.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    if resource is None:
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def _run_in_namespace(
+    script: str, name: str, argv: Sequence[str], client: Any
+) -> Tuple[Optional[int], Optional[str], str]:
+    """Run ``script`` as __main__ in a fresh namespace; returns (exit code, error, output)."""
+    output = io.StringIO()
+    exit_handlers: List[Tuple[Callable[..., Any], tuple, dict]] = []
+    saved_argv, saved_cwd, saved_register = sys.argv, os.getcwd(), atexit.register
+
+    def register(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Callable[..., Any]:
+        exit_handlers.append((fn, args, kwargs))
+        return fn
+
+    # A real module registered as __main__, so functions the script hands to
+    # child processes (pickled as __main__.<name>) can be found again
+    main_module = types.ModuleType("__main__")
+    namespace: Dict[str, Any] = main_module.__dict__
+    namespace.update(
+        {"__file__": name, "__builtins__": builtins, "galago_client": client}
+    )
+    saved_main = sys.modules["__main__"]
+    exit_code: Optional[int] = 0
+    error: Optional[str] = None
+    sys.argv = [name, *argv]
+    sys.modules["__main__"] = main_module
+    atexit.register = register
+    try:
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            try:
+                exec(compile(script, name, "exec"), namespace)
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    exit_code = e.code or 0
+                else:
+                    # sys.exit("message") prints the message and exits with 1
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except BaseException:
+                exit_code = 1
+                error = traceback.format_exc()
+                print(error, file=sys.stderr, end="")
+            # What the script registered with atexit runs when the script ends
+            for fn, args, kwargs in reversed(exit_handlers):
+                try:
+                    fn(*args, **kwargs)
+                except Exception:
+                    traceback.print_exc()
+    finally:
+        atexit.register = saved_register
+        sys.modules["__main__"] = saved_main
+        sys.argv = saved_argv
+        os.chdir(saved_cwd)
+    return exit_code, error, output.getvalue()
+
+
+def _worker_main(conn: Connection, preload: Sequence[str], script_dir: Optional[str]) -> None:
+    """Worker process: import the common modules, then run scripts until told to stop."""
+    if script_dir and script_dir not in sys.path:
+        sys.path.insert(0, script_dir)
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+    client = None
+    if "galago_api" in sys.modules:
+        galago_api = sys.modules["galago_api"]
+        client = galago_api.GalagoClient(report_metrics=False)
+
+    baseline = _rss_mb()
+    conn.send({"ready": True, "pid": os.getpid()})
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        started = time.perf_counter()
+        exit_code, error, output = _run_in_namespace(
+            job["script"], job["name"], job["argv"], client
+        )
+        conn.send(
+            {
+                "exit_code": exit_code,
+                "error": error,
+                "output": output,
+                "duration_s": time.perf_counter() - started,
+                "rss_growth_mb": _rss_mb() - baseline,
+            }
+        )
+
+
+class _Worker:
+    """One warm worker process and the pipe to it."""
+
+    def __init__(self, context, preload: Sequence[str], script_dir: Optional[str]):
+        self.conn, child_conn = context.Pipe()
+        # Not daemonic: daemonic processes may not start children of their own
+        self.process = context.Process(
+            target=_worker_main, args=(child_conn, preload, script_dir)
+        )
+        self.process.start()
+        child_conn.close()
+        self.runs = 0
+        self.rss_growth_mb = 0.0
+        self.ready = False
+
+    def wait_ready(self) -> None:
+        if not self.ready:
+            self.conn.recv()
+            self.ready = True
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (BrokenPipeError, OSError):
+            pass
+        self.process.join(timeout=2)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class WarmWorkerPool:
+    """Fixed-size pool of pre-imported Python workers; run() is thread-safe."""
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        max_runs: int = DEFAULT_MAX_RUNS,
+        max_rss_growth_mb: float = DEFAULT_MAX_RSS_MB,
+        preload: Sequence[str] = PRELOAD_MODULES,
+        script_dir: Optional[str] = os.path.dirname(os.path.abspath(__file__)),
+    ):
+        self.max_runs = max_runs
+        self.max_rss_growth_mb = max_rss_growth_mb
+        self.preload = tuple(preload)
+        self.script_dir = script_dir
+        # Spawned, not forked: the parent may be threaded (e.g. a gRPC server)
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._closed = False
+        self._idle: "queue.Queue[_Worker]" = queue.Queue()
+        self._workers: List[_Worker] = []
+        # Registered after multiprocessing's own exit hook (multiprocessing.util
+        # is imported above), so it runs first and the workers are stopped
+        # before multiprocessing waits for them
+        atexit.register(self.close)
+        for _ in range(workers):
+            self._add_worker()
+
+    def _add_worker(self) -> None:
+        worker = _Worker(self._context, self.preload, self.script_dir)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+
+    def _retire(self, worker: _Worker) -> None:
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+        worker.stop()
+        if not self._closed:
+            self._add_worker()
+
+    def run(
+        self,
+        script: str,
+        argv: Sequence[str] = (),
+        name: str = "<script>",
+        timeout: Optional[float] = None,
+    ) -> ScriptResult:
+        """Run script source in the next idle worker and wait for its result."""
+        worker = self._idle.get()
+        started = time.perf_counter()
+        try:
+            worker.wait_ready()
+            worker.conn.send({"script": script, "name": name, "argv": list(argv)})
+            if not worker.conn.poll(timeout):
+                self._retire(worker)
+                return ScriptResult(
+                    False,
+                    "",
+                    exit_code=None,
+                    error=f"Script timed out after {timeout}s",
+                    duration_s=time.perf_counter() - started,
+                )
+            reply = worker.conn.recv()
+        except (EOFError, BrokenPipeError, OSError) as e:
+            self._retire(worker)
+            return ScriptResult(
+                False,
+                "",
+                exit_code=None,
+                error=f"Worker died: {str(e)}",
+                duration_s=time.perf_counter() - started,
+            )
+
+        worker.runs += 1
+        worker.rss_growth_mb = reply["rss_growth_mb"]
+        if worker.runs >= self.max_runs or (
+            self.max_rss_growth_mb and worker.rss_growth_mb > self.max_rss_growth_mb
+        ):
+            self._retire(worker)
+        else:
+            self._idle.put(worker)
+
+        return ScriptResult(
+            reply["exit_code"] == 0,
+            reply["output"],
+            exit_code=reply["exit_code"],
+            error=reply["error"],
+            duration_s=reply["duration_s"],
+        )
+
+    def run_file(
+        self, path: str, argv: Sequence[str] = (), timeout: Optional[float] = None
+    ) -> ScriptResult:
+        """Run a script file in a warm worker."""
+        with open(path, encoding="utf-8") as f:
+            script = f.read()
+        return self.run(script, argv, name=os.path.abspath(path), timeout=timeout)
+
+    def close(self) -> None:
+        self._closed = True
+        atexit.unregister(self.close)
+        with self._lock:
+            workers = list(self._workers)
+            self._workers.clear()
+        for worker in workers:
+            worker.stop()
+
+    def __enter__(self) -> "WarmWorkerPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def main():
+    """Run a script through the pool, optionally several times, and time it."""
+    args = sys.argv[1:]
+    workers, repeat = DEFAULT_WORKERS, 1
+    while args and args[0] in ("--workers", "--repeat"):
+        if len(args) < 2:
+            print(f"Error: {args[0]} requires a number")
+            sys.exit(1)
+        if args[0] == "--workers":
+            workers = int(args[1])
+        else:
+            repeat = int(args[1])
+        args = args[2:]
+    if not args:
+        print(__doc__)
+        sys.exit(1)
+
+    script_path, script_args = args[0], args[1:]
+    durations: List[float] = []
+    failures = 0
+    with WarmWorkerPool(workers=workers) as pool:
+        for _ in range(repeat):
+            result = pool.run_file(script_path, script_args)
+            print(result.output, end="")
+            durations.append(result.duration_s)
+            if not result.success:
+                failures += 1
+
+    print("\n" + "=" * 50)
+    print("Summary:")
+    print(f"  Runs: {repeat} ({failures} failed)")
+    ordered = sorted(durations)
+    print(
+        f"  Run time: median {ordered[len(ordered) // 2] * 1000:.1f} ms, "
+        f"max {ordered[-1] * 1000:.1f} ms"
+    )
+    print("=" * 50)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()